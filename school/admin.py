@@ -1,5 +1,7 @@
 from django.contrib import admin
+from django.db import transaction
 from .models import Attendance,StudentExtra,TeacherExtra,Notice,AuditLog
+from .counters import apply_attendance_delta, attendance_row
 # Register your models here. (by sumit.luv)
 class StudentExtraAdmin(admin.ModelAdmin):
     pass
@@ -10,7 +12,23 @@ class TeacherExtraAdmin(admin.ModelAdmin):
 admin.site.register(TeacherExtra, TeacherExtraAdmin)
 
 class AttendanceAdmin(admin.ModelAdmin):
-    pass
+    # Edits here must keep the attendance rollups in step
+    def save_model(self, request, obj, form, change):
+        with transaction.atomic():
+            previous = [attendance_row(Attendance.objects.get(pk=obj.pk))] if change else []
+            super().save_model(request, obj, form, change)
+            apply_attendance_delta(previous, [attendance_row(obj)])
+
+    def delete_model(self, request, obj):
+        with transaction.atomic():
+            super().delete_model(request, obj)
+            apply_attendance_delta(removed=[attendance_row(obj)])
+
+    def delete_queryset(self, request, queryset):
+        with transaction.atomic():
+            removed = list(queryset.values_list('cl', 'date', 'roll', 'present_status'))
+            super().delete_queryset(request, queryset)
+            apply_attendance_delta(removed=removed)
 admin.site.register(Attendance, AttendanceAdmin)
 
 class NoticeAdmin(admin.ModelAdmin):
@@ -16,6 +16,7 @@ router.register(r'library-books', api_views.LibraryBookViewSet)
 router.register(r'book-borrowings', api_views.BookBorrowingViewSet)
 router.register(r'events', api_views.SchoolEventViewSet)
 router.register(r'attendance', api_views.AttendanceViewSet)
+router.register(r'audit-logs', api_views.AuditLogViewSet)
 router.register(r'dashboard', api_views.DashboardViewSet, basename='dashboard')
 
 urlpatterns = [
@@ -4,71 +4,90 @@ from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.filters import SearchFilter, OrderingFilter
 from django.contrib.auth.models import User
+from django.db import transaction
 from django.db.models import Q, Count, Avg
 from django.utils import timezone
 from datetime import datetime, timedelta
 import logging
 
-from . import models, serializers
+from . import counters, dashboard, models, roles, serializers
+from .filters import FullTextSearchFilter, RankedOrderingFilter
+from .pagination import AttendanceCursorPagination, KeysetCursorPagination
+from .statistics import (
+    attendance_statistics, cached_statistics, fee_statistics, student_statistics, teacher_statistics,
+)
 
 logger = logging.getLogger('school')
 
 
-class TeacherViewSet(viewsets.ModelViewSet):
+class QueryOptimizationMixin:
+    """Join the relations the serializer renders instead of querying them per row.
+
+    The lookups are derived from the serializer's nested fields unless the viewset
+    declares ``select_related_fields`` / ``prefetch_related_fields`` itself. On reads,
+    ``?fields=`` and ``?expand=`` prune the serializer first, so relations the client
+    did not ask for are neither serialized nor joined.
+    """
+    select_related_fields = None
+    prefetch_related_fields = None
+
+    def get_serializer(self, *args, **kwargs):
+        request = getattr(self, 'request', None)
+        if request is not None and request.method in permissions.SAFE_METHODS:
+            for param in ('fields', 'expand'):
+                value = request.query_params.get(param)
+                if value:
+                    kwargs.setdefault(param, [path.strip() for path in value.split(',') if path.strip()])
+        return super().get_serializer(*args, **kwargs)
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.select_related_fields is None and self.prefetch_related_fields is None:
+            return serializers.optimize_queryset(queryset, self.get_serializer())
+        if self.select_related_fields:
+            queryset = queryset.select_related(*self.select_related_fields)
+        if self.prefetch_related_fields:
+            queryset = queryset.prefetch_related(*self.prefetch_related_fields)
+        return queryset
+
+
+class TeacherViewSet(QueryOptimizationMixin, viewsets.ModelViewSet):
     queryset = models.TeacherExtra.objects.all()
     serializer_class = serializers.TeacherExtraSerializer
     permission_classes = [permissions.IsAuthenticated]
-    filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
+    filter_backends = [DjangoFilterBackend, FullTextSearchFilter, RankedOrderingFilter]
     filterset_fields = ['status', 'salary']
     search_fields = ['user__first_name', 'user__last_name', 'user__username']
+    search_entity = 'teacher'
     ordering_fields = ['salary', 'joindate']
     ordering = ['-joindate']
 
     @action(detail=False, methods=['get'])
+    @cached_statistics('teachers')
     def statistics(self, request):
         """Get teacher statistics"""
-        total_teachers = self.queryset.count()
-        active_teachers = self.queryset.filter(status=True).count()
-        pending_teachers = self.queryset.filter(status=False).count()
-        avg_salary = self.queryset.filter(status=True).aggregate(avg_salary=Avg('salary'))['avg_salary'] or 0
-        
-        return Response({
-            'total_teachers': total_teachers,
-            'active_teachers': active_teachers,
-            'pending_teachers': pending_teachers,
-            'average_salary': round(avg_salary, 2)
-        })
+        return teacher_statistics()
 
 
-class StudentViewSet(viewsets.ModelViewSet):
+class StudentViewSet(QueryOptimizationMixin, viewsets.ModelViewSet):
     queryset = models.StudentExtra.objects.all()
     serializer_class = serializers.StudentExtraSerializer
     permission_classes = [permissions.IsAuthenticated]
-    filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
+    filter_backends = [DjangoFilterBackend, FullTextSearchFilter, RankedOrderingFilter]
     filterset_fields = ['status', 'cl', 'fee']
     search_fields = ['user__first_name', 'user__last_name', 'user__username', 'roll']
+    search_entity = 'student'
     ordering_fields = ['roll', 'fee']
     ordering = ['roll']
 
     @action(detail=False, methods=['get'])
+    @cached_statistics('students')
     def statistics(self, request):
         """Get student statistics"""
-        total_students = self.queryset.count()
-        active_students = self.queryset.filter(status=True).count()
-        pending_students = self.queryset.filter(status=False).count()
-        
-        # Class-wise distribution
-        class_distribution = self.queryset.filter(status=True).values('cl').annotate(count=Count('id'))
-        
-        return Response({
-            'total_students': total_students,
-            'active_students': active_students,
-            'pending_students': pending_students,
-            'class_distribution': list(class_distribution)
-        })
+        return student_statistics()
 
 
-class SubjectViewSet(viewsets.ModelViewSet):
+class SubjectViewSet(QueryOptimizationMixin, viewsets.ModelViewSet):
     queryset = models.Subject.objects.all()
     serializer_class = serializers.SubjectSerializer
     permission_classes = [permissions.IsAuthenticated]
@@ -78,13 +97,14 @@ class SubjectViewSet(viewsets.ModelViewSet):
     ordering = ['name']
 
 
-class AssignmentViewSet(viewsets.ModelViewSet):
+class AssignmentViewSet(QueryOptimizationMixin, viewsets.ModelViewSet):
     queryset = models.Assignment.objects.all()
     serializer_class = serializers.AssignmentSerializer
     permission_classes = [permissions.IsAuthenticated]
-    filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
+    filter_backends = [DjangoFilterBackend, FullTextSearchFilter, RankedOrderingFilter]
     filterset_fields = ['subject', 'class_name', 'teacher', 'is_active']
     search_fields = ['title', 'description']
+    search_entity = 'assignment'
     ordering_fields = ['due_date', 'created_at']
     ordering = ['-created_at']
 
@@ -92,14 +112,17 @@ class AssignmentViewSet(viewsets.ModelViewSet):
     def submissions(self, request, pk=None):
         """Get all submissions for an assignment"""
         assignment = self.get_object()
-        submissions = models.AssignmentSubmission.objects.filter(assignment=assignment)
+        submissions = serializers.optimize_queryset(
+            models.AssignmentSubmission.objects.filter(assignment=assignment),
+            serializers.AssignmentSubmissionSerializer()
+        )
         serializer = serializers.AssignmentSubmissionSerializer(submissions, many=True)
         return Response(serializer.data)
 
     @action(detail=False, methods=['get'])
     def upcoming(self, request):
         """Get upcoming assignments"""
-        upcoming = self.queryset.filter(
+        upcoming = self.get_queryset().filter(
             due_date__gte=timezone.now(),
             is_active=True
         ).order_by('due_date')[:10]
@@ -107,7 +130,7 @@ class AssignmentViewSet(viewsets.ModelViewSet):
         return Response(serializer.data)
 
 
-class AssignmentSubmissionViewSet(viewsets.ModelViewSet):
+class AssignmentSubmissionViewSet(QueryOptimizationMixin, viewsets.ModelViewSet):
     queryset = models.AssignmentSubmission.objects.all()
     serializer_class = serializers.AssignmentSubmissionSerializer
     permission_classes = [permissions.IsAuthenticated]
@@ -135,7 +158,7 @@ class AssignmentSubmissionViewSet(viewsets.ModelViewSet):
         return Response({'error': 'Marks are required'}, status=status.HTTP_400_BAD_REQUEST)
 
 
-class NotificationViewSet(viewsets.ModelViewSet):
+class NotificationViewSet(QueryOptimizationMixin, viewsets.ModelViewSet):
     queryset = models.Notification.objects.all()
     serializer_class = serializers.NotificationSerializer
     permission_classes = [permissions.IsAuthenticated]
@@ -143,11 +166,12 @@ class NotificationViewSet(viewsets.ModelViewSet):
     filterset_fields = ['notification_type', 'is_read', 'recipient']
     search_fields = ['title', 'message']
     ordering_fields = ['created_at']
-    ordering = ['-created_at']
+    ordering = ['-created_at', '-id']
+    pagination_class = KeysetCursorPagination
 
     def get_queryset(self):
         """Filter notifications by current user"""
-        return self.queryset.filter(recipient=self.request.user)
+        return super().get_queryset().filter(recipient=self.request.user)
 
     @action(detail=False, methods=['get'])
     def unread_count(self, request):
@@ -165,27 +189,28 @@ class NotificationViewSet(viewsets.ModelViewSet):
         return Response(serializer.data)
 
 
-class ExamViewSet(viewsets.ModelViewSet):
+class ExamViewSet(QueryOptimizationMixin, viewsets.ModelViewSet):
     queryset = models.Exam.objects.all()
     serializer_class = serializers.ExamSerializer
     permission_classes = [permissions.IsAuthenticated]
-    filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
+    filter_backends = [DjangoFilterBackend, FullTextSearchFilter, RankedOrderingFilter]
     filterset_fields = ['exam_type', 'subject', 'class_name', 'created_by']
     search_fields = ['name', 'instructions']
+    search_entity = 'exam'
     ordering_fields = ['exam_date', 'created_at']
     ordering = ['exam_date']
 
     @action(detail=False, methods=['get'])
     def upcoming(self, request):
         """Get upcoming exams"""
-        upcoming = self.queryset.filter(
+        upcoming = self.get_queryset().filter(
             exam_date__gte=timezone.now()
         ).order_by('exam_date')[:10]
         serializer = self.get_serializer(upcoming, many=True)
         return Response(serializer.data)
 
 
-class ExamResultViewSet(viewsets.ModelViewSet):
+class ExamResultViewSet(QueryOptimizationMixin, viewsets.ModelViewSet):
     queryset = models.ExamResult.objects.all()
     serializer_class = serializers.ExamResultSerializer
     permission_classes = [permissions.IsAuthenticated]
@@ -212,7 +237,7 @@ class ExamResultViewSet(viewsets.ModelViewSet):
         return Response({'error': 'student_id is required'}, status=status.HTTP_400_BAD_REQUEST)
 
 
-class FeePaymentViewSet(viewsets.ModelViewSet):
+class FeePaymentViewSet(QueryOptimizationMixin, viewsets.ModelViewSet):
     queryset = models.FeePayment.objects.all()
     serializer_class = serializers.FeePaymentSerializer
     permission_classes = [permissions.IsAuthenticated]
@@ -224,7 +249,7 @@ class FeePaymentViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'])
     def overdue(self, request):
         """Get overdue payments"""
-        overdue = self.queryset.filter(
+        overdue = self.get_queryset().filter(
             status='pending',
             due_date__lt=timezone.now().date()
         )
@@ -232,39 +257,32 @@ class FeePaymentViewSet(viewsets.ModelViewSet):
         return Response(serializer.data)
 
     @action(detail=False, methods=['get'])
+    @cached_statistics('fees')
     def statistics(self, request):
         """Get fee payment statistics"""
-        total_amount = self.queryset.aggregate(total=Sum('amount'))['total'] or 0
-        paid_amount = self.queryset.filter(status='paid').aggregate(total=Sum('amount'))['total'] or 0
-        pending_amount = self.queryset.filter(status='pending').aggregate(total=Sum('amount'))['total'] or 0
-        
-        return Response({
-            'total_amount': total_amount,
-            'paid_amount': paid_amount,
-            'pending_amount': pending_amount,
-            'collection_rate': round((paid_amount / total_amount * 100) if total_amount > 0 else 0, 2)
-        })
+        return fee_statistics()
 
 
-class LibraryBookViewSet(viewsets.ModelViewSet):
+class LibraryBookViewSet(QueryOptimizationMixin, viewsets.ModelViewSet):
     queryset = models.LibraryBook.objects.all()
     serializer_class = serializers.LibraryBookSerializer
     permission_classes = [permissions.IsAuthenticated]
-    filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
+    filter_backends = [DjangoFilterBackend, FullTextSearchFilter, RankedOrderingFilter]
     filterset_fields = ['status', 'category']
     search_fields = ['title', 'author', 'isbn']
+    search_entity = 'book'
     ordering_fields = ['title', 'added_date']
     ordering = ['title']
 
     @action(detail=False, methods=['get'])
     def available(self, request):
         """Get available books"""
-        available = self.queryset.filter(status='available')
+        available = self.get_queryset().filter(status='available')
         serializer = self.get_serializer(available, many=True)
         return Response(serializer.data)
 
 
-class BookBorrowingViewSet(viewsets.ModelViewSet):
+class BookBorrowingViewSet(QueryOptimizationMixin, viewsets.ModelViewSet):
     queryset = models.BookBorrowing.objects.all()
     serializer_class = serializers.BookBorrowingSerializer
     permission_classes = [permissions.IsAuthenticated]
@@ -295,20 +313,21 @@ class BookBorrowingViewSet(viewsets.ModelViewSet):
         return Response(serializer.data)
 
 
-class SchoolEventViewSet(viewsets.ModelViewSet):
+class SchoolEventViewSet(QueryOptimizationMixin, viewsets.ModelViewSet):
     queryset = models.SchoolEvent.objects.all()
     serializer_class = serializers.SchoolEventSerializer
     permission_classes = [permissions.IsAuthenticated]
-    filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
+    filter_backends = [DjangoFilterBackend, FullTextSearchFilter, RankedOrderingFilter]
     filterset_fields = ['event_type', 'is_public', 'organizer']
     search_fields = ['title', 'description', 'location']
+    search_entity = 'event'
     ordering_fields = ['start_date', 'created_at']
     ordering = ['start_date']
 
     @action(detail=False, methods=['get'])
     def upcoming(self, request):
         """Get upcoming events"""
-        upcoming = self.queryset.filter(
+        upcoming = self.get_queryset().filter(
             start_date__gte=timezone.now(),
             is_public=True
         ).order_by('start_date')[:10]
@@ -316,42 +335,58 @@ class SchoolEventViewSet(viewsets.ModelViewSet):
         return Response(serializer.data)
 
 
-class AttendanceViewSet(viewsets.ModelViewSet):
+class AttendanceViewSet(QueryOptimizationMixin, viewsets.ModelViewSet):
     queryset = models.Attendance.objects.all()
     serializer_class = serializers.AttendanceSerializer
     permission_classes = [permissions.IsAuthenticated]
     filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
     filterset_fields = ['cl', 'date', 'present_status']
     ordering_fields = ['date']
-    ordering = ['-date']
+    ordering = ['-date', '-id']
+    pagination_class = AttendanceCursorPagination
+
+    # Keep the attendance rollups (school.counters) in step with every API write
+    def perform_create(self, serializer):
+        with transaction.atomic():
+            record = serializer.save()
+            counters.apply_attendance_delta(added=[counters.attendance_row(record)])
+
+    def perform_update(self, serializer):
+        with transaction.atomic():
+            previous = counters.attendance_row(models.Attendance.objects.select_for_update().get(pk=serializer.instance.pk))
+            record = serializer.save()
+            counters.apply_attendance_delta([previous], [counters.attendance_row(record)])
+
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            instance.delete()
+            counters.apply_attendance_delta(removed=[counters.attendance_row(instance)])
 
     @action(detail=False, methods=['get'])
+    @cached_statistics('attendance', params=('class_name', 'date_from', 'date_to'))
     def statistics(self, request):
         """Get attendance statistics"""
-        class_name = request.query_params.get('class_name')
-        date_from = request.query_params.get('date_from')
-        date_to = request.query_params.get('date_to')
-        
-        queryset = self.queryset
-        if class_name:
-            queryset = queryset.filter(cl=class_name)
-        if date_from:
-            queryset = queryset.filter(date__gte=date_from)
-        if date_to:
-            queryset = queryset.filter(date__lte=date_to)
-        
-        total_records = queryset.count()
-        present_count = queryset.filter(present_status='Present').count()
-        absent_count = queryset.filter(present_status='Absent').count()
-        
-        attendance_percentage = (present_count / total_records * 100) if total_records > 0 else 0
-        
-        return Response({
-            'total_records': total_records,
-            'present_count': present_count,
-            'absent_count': absent_count,
-            'attendance_percentage': round(attendance_percentage, 2)
-        })
+        return attendance_statistics(
+            request.query_params.get('class_name'),
+            request.query_params.get('date_from'),
+            request.query_params.get('date_to'),
+        )
+
+
+class IsSchoolAdmin(permissions.BasePermission):
+    def has_permission(self, request, view):
+        return bool(request.user and request.user.is_authenticated and roles.is_admin(request.user))
+
+
+class AuditLogViewSet(QueryOptimizationMixin, viewsets.ReadOnlyModelViewSet):
+    queryset = models.AuditLog.objects.all()
+    serializer_class = serializers.AuditLogSerializer
+    permission_classes = [IsSchoolAdmin]
+    filter_backends = [DjangoFilterBackend, OrderingFilter]
+    filterset_fields = ['user', 'method', 'status_code']
+    ordering_fields = ['created_at']
+    ordering = ['-created_at', '-id']
+    pagination_class = KeysetCursorPagination
 
 
 class DashboardViewSet(viewsets.ViewSet):
@@ -360,17 +395,18 @@ class DashboardViewSet(viewsets.ViewSet):
     @action(detail=False, methods=['get'])
     def admin_stats(self, request):
         """Get admin dashboard statistics"""
-        teacher_count = models.TeacherExtra.objects.filter(status=True).count()
-        student_count = models.StudentExtra.objects.filter(status=True).count()
-        pending_teachers = models.TeacherExtra.objects.filter(status=False).count()
-        pending_students = models.StudentExtra.objects.filter(status=False).count()
+        metrics = dashboard.get_dashboard_metrics()
+        teacher_count = metrics['teachercount']
+        student_count = metrics['studentcount']
+        pending_teachers = metrics['pendingteachercount']
+        pending_students = metrics['pendingstudentcount']
         
         # Recent activities
         recent_notices = models.Notice.objects.all().order_by('-date')[:5]
-        upcoming_events = models.SchoolEvent.objects.filter(
+        upcoming_events = serializers.optimize_queryset(models.SchoolEvent.objects.filter(
             start_date__gte=timezone.now(),
             is_public=True
-        ).order_by('start_date')[:5]
+        ), serializers.SchoolEventSerializer()).order_by('start_date')[:5]
         
         return Response({
             'teacher_count': teacher_count,
@@ -388,24 +424,19 @@ class DashboardViewSet(viewsets.ViewSet):
             student = models.StudentExtra.objects.get(user=request.user)
             
             # Attendance statistics
-            attendance_records = models.Attendance.objects.filter(
-                cl=student.cl,
-                roll=student.roll
-            )
-            total_days = attendance_records.count()
-            present_days = attendance_records.filter(present_status='Present').count()
+            total_days, present_days = counters.student_attendance(student.cl, student.roll)
             attendance_percentage = (present_days / total_days * 100) if total_days > 0 else 0
             
             # Recent assignments
-            recent_assignments = models.Assignment.objects.filter(
+            recent_assignments = serializers.optimize_queryset(models.Assignment.objects.filter(
                 class_name=student.cl,
                 is_active=True
-            ).order_by('-created_at')[:5]
+            ), serializers.AssignmentSerializer()).order_by('-created_at')[:5]
             
             # Recent notifications
             recent_notifications = models.Notification.objects.filter(
                 recipient=request.user
-            ).order_by('-created_at')[:5]
+            ).select_related('recipient').order_by('-created_at')[:5]
             
             return Response({
                 'attendance_percentage': round(attendance_percentage, 2),
@@ -429,14 +460,14 @@ class DashboardViewSet(viewsets.ViewSet):
             ).values('class_name').distinct()
             
             # Recent assignments created
-            recent_assignments = models.Assignment.objects.filter(
+            recent_assignments = serializers.optimize_queryset(models.Assignment.objects.filter(
                 teacher=teacher
-            ).order_by('-created_at')[:5]
+            ), serializers.AssignmentSerializer()).order_by('-created_at')[:5]
             
             # Recent notifications
             recent_notifications = models.Notification.objects.filter(
                 recipient=request.user
-            ).order_by('-created_at')[:5]
+            ).select_related('recipient').order_by('-created_at')[:5]
             
             return Response({
                 'classes_taught': list(classes_taught),
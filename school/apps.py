@@ -1,4 +1,7 @@
 from django.apps import AppConfig
 
 class SchoolConfig(AppConfig):
-    name = 'school'
\ No newline at end of file
+    name = 'school'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,36 @@
+"""Live attendance feed for the admin dashboards.
+
+``AttendanceConsumer`` sockets join ``FEED_GROUP``; a ``group_send`` to it
+while no dashboard is open costs next to nothing. A socket that connects
+gets a snapshot of the day's per-class totals from the attendance counters,
+then the live updates, coalesced per (class, date).
+"""
+from django.utils import timezone
+
+from . import models
+
+FEED_GROUP = 'attendance_updates'
+
+
+def attendance_update(class_name, date, total_students, present_count, absent_count):
+    """The payload of one class's attendance for one day, as sent to the sockets"""
+    return {
+        'class_name': class_name,
+        'date': date.isoformat() if hasattr(date, 'isoformat') else date,
+        'total_students': total_students,
+        'present_count': present_count,
+        'absent_count': absent_count,
+    }
+
+
+def day_snapshot(date=None):
+    """Per-class totals of one day (today by default) from the daily counters"""
+    date = date or timezone.localdate()
+    rows = models.AttendanceDailyCount.objects.filter(date=date).order_by('cl').values_list(
+        'cl', 'present_count', 'absent_count'
+    )
+    return [
+        attendance_update(cl, date, present_count + absent_count, present_count, absent_count)
+        for cl, present_count, absent_count in rows
+        if present_count + absent_count
+    ]
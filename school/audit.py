@@ -0,0 +1,174 @@
+"""Buffered, write-behind audit logging.
+
+``AuditLoggingMiddleware`` hands every response to :func:`record_request`.
+Events are kept in a bounded in-process ring buffer and written to
+``AuditLog`` with a single ``bulk_create`` once ``AUDIT_LOG_FLUSH_SIZE``
+events are queued or the oldest one is ``AUDIT_LOG_FLUSH_INTERVAL`` seconds
+old. When the buffer is full the oldest event is dropped and counted.
+"""
+import atexit
+import logging
+import random
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+from celery import shared_task
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+
+logger = logging.getLogger('school')
+
+DEFAULT_EXCLUDE_PATHS = ['/static/', '/media/', '/favicon.ico']
+
+
+class AuditBuffer:
+    """Thread-safe bounded buffer of pending audit events"""
+
+    def __init__(self, max_size=10000, flush_size=200, flush_interval=5.0):
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.dropped = 0
+        self.flushed = 0
+        self._events = deque(maxlen=max_size)
+        self._lock = threading.Lock()
+        self._oldest = None
+        self._timer = None
+
+    def record(self, event):
+        with self._lock:
+            if len(self._events) == self._events.maxlen:
+                self.dropped += 1
+            self._events.append(event)
+            now = time.monotonic()
+            if self._oldest is None:
+                self._oldest = now
+                self._start_timer()
+            due = (
+                len(self._events) >= self.flush_size
+                or now - self._oldest >= self.flush_interval
+            )
+        if due:
+            self.flush()
+
+    def drain(self):
+        with self._lock:
+            events = list(self._events)
+            self._events.clear()
+            self._oldest = None
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        return events
+
+    def flush(self):
+        events = self.drain()
+        if not events:
+            return 0
+        try:
+            if getattr(settings, 'AUDIT_LOG_FLUSH_ASYNC', False):
+                flush_audit_events.delay([_serialize(event) for event in events])
+            else:
+                write_events(events)
+            self.flushed += len(events)
+        except Exception as e:
+            self.dropped += len(events)
+            logger.error(f"Error flushing {len(events)} audit events: {str(e)}")
+        return len(events)
+
+    def stats(self):
+        with self._lock:
+            buffered = len(self._events)
+        return {'buffered': buffered, 'flushed': self.flushed, 'dropped': self.dropped}
+
+    def _start_timer(self):
+        # Makes sure a quiet worker still writes its tail within the interval
+        self._timer = threading.Timer(self.flush_interval, self._timed_flush)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _timed_flush(self):
+        try:
+            self.flush()
+        finally:
+            connection.close()
+
+
+_buffer = None
+_buffer_lock = threading.Lock()
+
+
+def get_buffer():
+    global _buffer
+    if _buffer is None:
+        with _buffer_lock:
+            if _buffer is None:
+                _buffer = AuditBuffer(
+                    max_size=getattr(settings, 'AUDIT_LOG_BUFFER_SIZE', 10000),
+                    flush_size=getattr(settings, 'AUDIT_LOG_FLUSH_SIZE', 200),
+                    flush_interval=getattr(settings, 'AUDIT_LOG_FLUSH_INTERVAL', 5.0),
+                )
+                atexit.register(_buffer.flush)
+    return _buffer
+
+
+def should_record(path, status_code):
+    """Apply the configured exclusion list and per-path sampling"""
+    for prefix in getattr(settings, 'AUDIT_LOG_EXCLUDE_PATHS', DEFAULT_EXCLUDE_PATHS):
+        if path.startswith(prefix):
+            return False
+    # Server errors are always kept, sampling only thins out normal traffic
+    if status_code >= 500:
+        return True
+    rate = getattr(settings, 'AUDIT_LOG_SAMPLE_RATE', 1.0)
+    matched = ''
+    for prefix, prefix_rate in getattr(settings, 'AUDIT_LOG_PATH_SAMPLE_RATES', {}).items():
+        if path.startswith(prefix) and len(prefix) > len(matched):
+            matched, rate = prefix, prefix_rate
+    return rate >= 1 or random.random() < rate
+
+
+def record_request(request, response):
+    path = request.path
+    status_code = getattr(response, 'status_code', 0)
+    if not should_record(path, status_code):
+        return
+    user = getattr(request, 'user', None)
+    get_buffer().record((
+        user.id if user is not None and user.is_authenticated else None,
+        path[:255],
+        getattr(request, 'method', 'GET')[:10],
+        status_code,
+        timezone.now(),
+    ))
+
+
+def write_events(events):
+    from .models import AuditLog
+    AuditLog.objects.bulk_create([
+        AuditLog(user_id=user_id, path=path, method=method, status_code=status_code, created_at=created_at)
+        for user_id, path, method, status_code, created_at in events
+    ], batch_size=500)
+
+
+def get_stats():
+    return get_buffer().stats()
+
+
+def _serialize(event):
+    user_id, path, method, status_code, created_at = event
+    return [user_id, path, method, status_code, created_at.isoformat()]
+
+
+@shared_task
+def flush_audit_events(events):
+    """Write a batch of audit events handed over by a web worker"""
+    try:
+        write_events([
+            (user_id, path, method, status_code, datetime.fromisoformat(created_at))
+            for user_id, path, method, status_code, created_at in events
+        ])
+    except Exception as e:
+        logger.error(f"Error writing audit events: {str(e)}")
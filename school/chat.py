@@ -0,0 +1,274 @@
+"""Chat room storage, history and rate limiting for ``ChatConsumer``.
+
+Every message gets a per-room sequence number from an atomic counter in the
+default cache (seeded from the table the first time a room is used) and a
+server timestamp. Messages are not saved one by one: like the audit log they
+collect in an in-process buffer that is written with one ``bulk_create`` once
+``CHAT_FLUSH_SIZE`` messages are queued or every ``CHAT_FLUSH_INTERVAL``
+seconds. A batch that fails to write goes back into the buffer and is
+retried up to ``CHAT_WRITE_ATTEMPTS`` times; the buffer holds at most
+``CHAT_BUFFER_MAX`` messages, so during a long database outage the oldest
+ones are dropped and counted in the error log. A message whose sequence
+number is already taken (the counter was lost and re-seeded while another
+process still held numbers) is given the next free one, and the room is
+sent a ``chat_renumbered`` event so clients can correct the id. History is read by cursor
+(``before`` a sequence number) and includes the messages still waiting in
+the buffer.
+"""
+import atexit
+import logging
+import threading
+import time
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from . import models
+
+logger = logging.getLogger('school')
+
+
+def room_group(room):
+    return f'chat_{room}'
+
+
+def seq_key(room):
+    return f'school:chat:{room}:seq'
+
+
+def last_stored_seq(room):
+    return models.ChatMessage.objects.filter(room=room).aggregate(last=Max('seq'))['last'] or 0
+
+
+def next_seq(room):
+    key = seq_key(room)
+    if cache.get(key) is None:
+        cache.add(key, last_stored_seq(room), None)
+    return cache.incr(key)
+
+
+def renumber(message):
+    """Give a message whose sequence number is taken the next free one"""
+    key = seq_key(message.room)
+    last = last_stored_seq(message.room)
+    # Skip past the stored rows without moving the counter backwards
+    if not cache.add(key, last, None) and cache.get(key, 0) < last:
+        cache.set(key, last, None)
+    old_seq, message.seq = message.seq, cache.incr(key)
+    logger.warning(f"Chat message {old_seq} in room {message.room} collided and was renumbered {message.seq}")
+
+
+def announce_renumbered(message, old_seq):
+    """Tell the room's sockets, which saw ``old_seq`` when the message was posted"""
+    try:
+        async_to_sync(get_channel_layer().group_send)(
+            room_group(message.room),
+            dict(serialize(message), type='chat_renumbered', old_id=old_seq),
+        )
+    except Exception as e:
+        logger.error(f"Error announcing renumbered chat message {message.seq}: {str(e)}")
+
+
+def allow_message(room, user_id):
+    """Fixed-window limit of CHAT_RATE_LIMIT messages per user and room"""
+    window = getattr(settings, 'CHAT_RATE_WINDOW', 10)
+    key = f'school:chat:{room}:rate:{user_id}:{int(time.time() // window)}'
+    try:
+        cache.add(key, 0, window)
+        return cache.incr(key) <= getattr(settings, 'CHAT_RATE_LIMIT', 20)
+    except Exception as e:
+        logger.error(f"Error checking chat rate limit: {str(e)}")
+        return True
+
+
+def serialize(message):
+    return {
+        'id': message.seq,
+        'message': message.message,
+        'username': message.username,
+        'timestamp': message.created_at.isoformat(),
+    }
+
+
+class ChatBuffer:
+    """Thread-safe buffer of chat messages waiting to be written"""
+
+    def __init__(self, flush_size=100, flush_interval=1.0, max_size=10000, max_attempts=5):
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.max_size = max_size
+        self.max_attempts = max_attempts
+        self.dropped = 0
+        self._messages = []
+        # Taken out of the buffer but not committed yet, still visible to history
+        self._writing = []
+        self._lock = threading.Lock()
+        self._timer = None
+
+    def record(self, message):
+        with self._lock:
+            self._messages.append(message)
+            self._trim()
+            due = len(self._messages) >= self.flush_size
+            if not due:
+                self._schedule()
+        if due:
+            self.flush()
+
+    def _trim(self):
+        # Called with the lock held; a buffer that can't be written drops its oldest messages
+        overflow = len(self._messages) - self.max_size
+        if overflow > 0:
+            del self._messages[:overflow]
+            self._drop(overflow, 'the chat buffer is full')
+
+    def _drop(self, count, reason):
+        self.dropped += count
+        logger.error(f"Dropped {count} chat messages because {reason} ({self.dropped} dropped in total)")
+
+    def _schedule(self):
+        # Called with the lock held
+        if self._timer is None:
+            self._timer = threading.Timer(self.flush_interval, self._timed_flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def pending(self, room):
+        with self._lock:
+            return [message for message in self._writing + self._messages if message.room == room]
+
+    def flush(self):
+        with self._lock:
+            messages, self._messages = self._messages, []
+            self._writing = self._writing + messages
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        if not messages:
+            return 0
+        try:
+            unwritten = self._write(messages)
+        finally:
+            with self._lock:
+                written = {id(message) for message in messages}
+                self._writing = [message for message in self._writing if id(message) not in written]
+        retry = []
+        for message in unwritten:
+            message.pk = None
+            message.write_attempts = getattr(message, 'write_attempts', 0) + 1
+            if message.write_attempts < self.max_attempts:
+                retry.append(message)
+        given_up = len(unwritten) - len(retry)
+        with self._lock:
+            if given_up:
+                self._drop(given_up, f'they failed to write {self.max_attempts} times')
+            if retry:
+                # Back in front of anything recorded since, for the next flush
+                self._messages = retry + self._messages
+                self._trim()
+                self._schedule()
+        return len(messages) - len(unwritten)
+
+    def _write(self, messages):
+        """Write a batch; returns the messages an error left unwritten"""
+        try:
+            with transaction.atomic():
+                models.ChatMessage.objects.bulk_create(messages, batch_size=500)
+            return []
+        except IntegrityError:
+            # Some sequence number is taken: write one by one, renumbering the collisions
+            pass
+        except Exception as e:
+            logger.error(f"Error writing {len(messages)} chat messages, will retry: {str(e)}")
+            return messages
+        unwritten = []
+        for message in messages:
+            # Ids handed out by the rolled back bulk insert aren't theirs
+            message.pk = None
+            try:
+                self._write_one(message)
+            except Exception as e:
+                logger.error(f"Error writing chat message {message.seq} in room {message.room}, will retry: {str(e)}")
+                unwritten.append(message)
+        return unwritten
+
+    def _write_one(self, message):
+        # The number clients saw, kept across retries for the correction
+        message.posted_seq = posted_seq = getattr(message, 'posted_seq', message.seq)
+        while True:
+            try:
+                with transaction.atomic():
+                    message.save(force_insert=True)
+                break
+            except IntegrityError:
+                if not models.ChatMessage.objects.filter(room=message.room, seq=message.seq).exists():
+                    raise
+                renumber(message)
+        if message.seq != posted_seq:
+            announce_renumbered(message, posted_seq)
+
+    def _timed_flush(self):
+        try:
+            self.flush()
+        finally:
+            connection.close()
+
+
+_buffer = None
+_buffer_lock = threading.Lock()
+
+
+def get_buffer():
+    global _buffer
+    if _buffer is None:
+        with _buffer_lock:
+            if _buffer is None:
+                _buffer = ChatBuffer(
+                    flush_size=getattr(settings, 'CHAT_FLUSH_SIZE', 100),
+                    flush_interval=getattr(settings, 'CHAT_FLUSH_INTERVAL', 1.0),
+                    max_size=getattr(settings, 'CHAT_BUFFER_MAX', 10000),
+                    max_attempts=getattr(settings, 'CHAT_WRITE_ATTEMPTS', 5),
+                )
+                atexit.register(_buffer.flush)
+    return _buffer
+
+
+def post_message(room, user, text):
+    """Number, timestamp and buffer one message; None when the user is over the rate limit"""
+    if not allow_message(room, user.id):
+        return None
+    message = models.ChatMessage(
+        room=room,
+        seq=next_seq(room),
+        user_id=user.id,
+        username=user.username,
+        message=text[:getattr(settings, 'CHAT_MESSAGE_MAX_LENGTH', 2000)],
+        created_at=timezone.now(),
+    )
+    get_buffer().record(message)
+    return serialize(message)
+
+
+def history(room, before=None, limit=None):
+    """Up to ``limit`` messages older than sequence number ``before``, oldest first"""
+    limit = min(limit or getattr(settings, 'CHAT_HISTORY_PAGE_SIZE', 50), 200)
+    messages = {message.seq: message for message in get_buffer().pending(room)}
+    stored = models.ChatMessage.objects.filter(room=room)
+    if before is not None:
+        stored = stored.filter(seq__lt=before)
+    for message in stored.order_by('-seq')[:limit]:
+        messages.setdefault(message.seq, message)
+    page = sorted(
+        (message for seq, message in messages.items() if before is None or seq < before),
+        key=lambda message: message.seq,
+    )[-limit:]
+    return {
+        'messages': [serialize(message) for message in page],
+        # Cursor for the next (older) page, None once the start of the room is reached
+        'before': page[0].seq if len(page) == limit else None,
+    }
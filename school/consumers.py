@@ -1,15 +1,38 @@
+import asyncio
 import json
+import logging
+from collections import deque
+
 from channels.generic.websocket import AsyncWebsocketConsumer
 from channels.db import database_sync_to_async
+from django.conf import settings
 from django.contrib.auth.models import User
-from . import models
+from . import attendance_feed, chat, models, roles
+
+logger = logging.getLogger('school')
+
+# Most ids a single bulk mark_read may touch
+NOTIFICATION_MARK_READ_LIMIT = 1000
 
 
 class NotificationConsumer(AsyncWebsocketConsumer):
+    """Per-user notifications, delivered in batches.
+
+    Events are queued per socket and flushed as one frame every
+    ``NOTIFICATION_BATCH_WINDOW`` seconds, so a school-wide fan-out costs one
+    ``send`` per window instead of one per notification. When a slow client
+    lets the queue reach ``NOTIFICATION_QUEUE_HIGH_WATER`` the oldest entries
+    are dropped and the next frame reports how many, so the client can
+    reload its inbox instead.
+    """
+
     async def connect(self):
         self.user = self.scope["user"]
         if self.user.is_authenticated:
             self.room_group_name = f"notifications_{self.user.id}"
+            self.pending = deque()
+            self.dropped = 0
+            self.flusher = None
             
             # Join room group
             await self.channel_layer.group_add(
@@ -23,6 +46,8 @@ class NotificationConsumer(AsyncWebsocketConsumer):
 
     async def disconnect(self, close_code):
         if hasattr(self, 'room_group_name'):
+            if self.flusher is not None:
+                self.flusher.cancel()
             # Leave room group
             await self.channel_layer.group_discard(
                 self.room_group_name,
@@ -34,37 +59,85 @@ class NotificationConsumer(AsyncWebsocketConsumer):
         message_type = text_data_json.get('type')
         
         if message_type == 'mark_read':
-            notification_id = text_data_json.get('notification_id')
-            await self.mark_notification_read(notification_id)
+            notification_ids = text_data_json.get('notification_ids')
+            if notification_ids is None:
+                await self.mark_notifications_read([text_data_json.get('notification_id')])
+            elif not isinstance(notification_ids, (list, tuple)):
+                await self.send(text_data=json.dumps({'type': 'error', 'error': 'notification_ids must be a list'}))
+            else:
+                # Bulk variant: one UPDATE for the whole list, acknowledged with the row count
+                updated = await self.mark_notifications_read(notification_ids)
+                await self.send(text_data=json.dumps({'type': 'marked_read', 'updated': updated}))
 
     async def notification_message(self, event):
-        # Send message to WebSocket
-        await self.send(text_data=json.dumps({
-            'type': 'notification',
+        self.enqueue({
             'title': event['title'],
             'message': event['message'],
             'notification_type': event['notification_type'],
             'created_at': event['created_at']
-        }))
+        })
 
-    @database_sync_to_async
-    def mark_notification_read(self, notification_id):
+    def enqueue(self, notification):
+        if len(self.pending) >= getattr(settings, 'NOTIFICATION_QUEUE_HIGH_WATER', 500):
+            self.pending.popleft()
+            self.dropped += 1
+        self.pending.append(notification)
+        if self.flusher is None or self.flusher.done():
+            self.flusher = asyncio.ensure_future(self.flush())
+
+    async def flush(self):
+        window = getattr(settings, 'NOTIFICATION_BATCH_WINDOW', 0.05)
+        batch_size = getattr(settings, 'NOTIFICATION_BATCH_SIZE', 100)
         try:
-            notification = models.Notification.objects.get(
-                id=notification_id,
-                recipient=self.user
-            )
-            notification.is_read = True
-            notification.save()
-        except models.Notification.DoesNotExist:
-            pass
+            while self.pending:
+                # Events arriving during the window (or the previous send) join this frame
+                await asyncio.sleep(window)
+                batch = [self.pending.popleft() for _ in range(min(batch_size, len(self.pending)))]
+                dropped, self.dropped = self.dropped, 0
+                if len(batch) == 1 and not dropped:
+                    await self.send(text_data=json.dumps(dict(batch[0], type='notification')))
+                else:
+                    await self.send(text_data=json.dumps({
+                        'type': 'notifications',
+                        'notifications': batch,
+                        'dropped': dropped,
+                    }))
+        except Exception as e:
+            logger.error(f"Error delivering notifications to user {self.user.id}: {str(e)}")
+
+    @database_sync_to_async
+    def mark_notifications_read(self, notification_ids):
+        ids = []
+        for notification_id in notification_ids[:NOTIFICATION_MARK_READ_LIMIT]:
+            if isinstance(notification_id, bool):
+                continue
+            try:
+                ids.append(int(notification_id))
+            except (TypeError, ValueError):
+                pass
+        if not ids:
+            return 0
+        return models.Notification.objects.filter(
+            id__in=ids,
+            recipient=self.user,
+            is_read=False,
+        ).update(is_read=True)
 
 
 class AttendanceConsumer(AsyncWebsocketConsumer):
+    """Live attendance for admin dashboards.
+
+    On connect the socket gets the day's per-class totals; after that updates
+    are held for ``ATTENDANCE_COALESCE_WINDOW`` seconds and only the latest
+    state of each (class, date) is sent.
+    """
+
     async def connect(self):
         self.user = self.scope["user"]
-        if self.user.is_authenticated and self.user.groups.filter(name='ADMIN').exists():
-            self.room_group_name = "attendance_updates"
+        if self.user.is_authenticated and await database_sync_to_async(roles.is_admin)(self.user):
+            self.room_group_name = attendance_feed.FEED_GROUP
+            self.latest = {}
+            self.flusher = None
             
             # Join room group
             await self.channel_layer.group_add(
@@ -73,11 +146,17 @@ class AttendanceConsumer(AsyncWebsocketConsumer):
             )
             
             await self.accept()
+            await self.send(text_data=json.dumps({
+                'type': 'attendance_snapshot',
+                'classes': await database_sync_to_async(attendance_feed.day_snapshot)(),
+            }))
         else:
             await self.close()
 
     async def disconnect(self, close_code):
         if hasattr(self, 'room_group_name'):
+            if self.flusher is not None:
+                self.flusher.cancel()
             # Leave room group
             await self.channel_layer.group_discard(
                 self.room_group_name,
@@ -85,23 +164,44 @@ class AttendanceConsumer(AsyncWebsocketConsumer):
             )
 
     async def attendance_update(self, event):
-        # Send attendance update to WebSocket
-        await self.send(text_data=json.dumps({
+        # A newer update of the same class and day replaces the queued one
+        self.latest[(event['class_name'], event['date'])] = {
             'type': 'attendance_update',
             'class_name': event['class_name'],
             'date': event['date'],
             'total_students': event['total_students'],
             'present_count': event['present_count'],
             'absent_count': event['absent_count']
-        }))
+        }
+        if self.flusher is None or self.flusher.done():
+            self.flusher = asyncio.ensure_future(self.flush())
+
+    async def flush(self):
+        try:
+            while self.latest:
+                await asyncio.sleep(getattr(settings, 'ATTENDANCE_COALESCE_WINDOW', 0.5))
+                updates, self.latest = self.latest, {}
+                for update in updates.values():
+                    await self.send(text_data=json.dumps(update))
+        except Exception as e:
+            logger.error(f"Error sending attendance updates: {str(e)}")
 
 
 class ChatConsumer(AsyncWebsocketConsumer):
+    """Class chat rooms with stored history.
+
+    Joining sends the latest page of history; ``{"type": "history", "before": id}``
+    fetches the page before it. Messages get their id and timestamp from the
+    server and are rate limited per user and room before they reach the group.
+    If storing a message had to give it another id, the room gets a
+    ``{"type": "renumbered", "old_id": ..., "id": ...}`` frame.
+    """
+
     async def connect(self):
         self.user = self.scope["user"]
         if self.user.is_authenticated:
             self.room_name = self.scope['url_route']['kwargs']['room_name']
-            self.room_group_name = f'chat_{self.room_name}'
+            self.room_group_name = chat.room_group(self.room_name)
             
             # Join room group
             await self.channel_layer.group_add(
@@ -110,6 +210,7 @@ class ChatConsumer(AsyncWebsocketConsumer):
             )
             
             await self.accept()
+            await self.send_history(None)
         else:
             await self.close()
 
@@ -123,23 +224,53 @@ class ChatConsumer(AsyncWebsocketConsumer):
 
     async def receive(self, text_data):
         text_data_json = json.loads(text_data)
-        message = text_data_json['message']
+        
+        if text_data_json.get('type') == 'history':
+            await self.send_history(text_data_json.get('before'))
+            return
+
+        message = str(text_data_json.get('message', '')).strip()
+        if not message:
+            return
+        try:
+            posted = await database_sync_to_async(chat.post_message)(self.room_name, self.user, message)
+        except Exception as e:
+            logger.error(f"Error posting chat message in {self.room_name}: {str(e)}")
+            await self.send(text_data=json.dumps({'type': 'error', 'error': 'Message could not be sent'}))
+            return
+        if posted is None:
+            await self.send(text_data=json.dumps({'type': 'error', 'error': 'Too many messages, slow down'}))
+            return
         
         # Send message to room group
         await self.channel_layer.group_send(
             self.room_group_name,
-            {
-                'type': 'chat_message',
-                'message': message,
-                'username': self.user.username,
-                'timestamp': text_data_json.get('timestamp', '')
-            }
+            dict(posted, type='chat_message')
         )
 
+    async def send_history(self, before):
+        try:
+            before = int(before) if before is not None else None
+        except (TypeError, ValueError):
+            return
+        page = await database_sync_to_async(chat.history)(self.room_name, before)
+        await self.send(text_data=json.dumps(dict(page, type='chat_history')))
+
     async def chat_message(self, event):
         # Send message to WebSocket
         await self.send(text_data=json.dumps({
+            'id': event['id'],
             'message': event['message'],
             'username': event['username'],
             'timestamp': event['timestamp']
         }))
+
+    async def chat_renumbered(self, event):
+        # The message posted as old_id was stored under a new id
+        await self.send(text_data=json.dumps({
+            'type': 'renumbered',
+            'old_id': event['old_id'],
+            'id': event['id'],
+            'username': event['username'],
+            'timestamp': event['timestamp'],
+        }))
@@ -0,0 +1,135 @@
+"""Attendance rollups: present/absent counts per class and day and per student.
+
+Every attendance write hands the rows it removed and added to
+:func:`apply_attendance_delta` inside its own transaction, so the counters
+always agree with the ``Attendance`` table. Reads then look up one counter
+row (a student) or sum a handful of daily rows (a class over a date range)
+instead of scanning the raw attendance. ``rebuild_attendance_counters``
+recomputes both tables from scratch. Rows without a roll only count towards
+the daily totals. Both drop the cached attendance
+statistics once the transaction commits.
+"""
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+
+from . import models, statistics
+
+
+def attendance_row(record):
+    return record.cl, record.date, record.roll, record.present_status
+
+
+def _deltas(removed, added):
+    daily = defaultdict(lambda: [0, 0])
+    students = defaultdict(lambda: [0, 0])
+    for rows, sign in ((removed, -1), (added, 1)):
+        for cl, date, roll, present_status in rows:
+            position = 0 if present_status == 'Present' else 1
+            daily[(cl, date)][position] += sign
+            # A row without a roll belongs to no student, and NULL never matches a counter row
+            if roll is not None:
+                students[(cl, roll)][position] += sign
+    return daily, students
+
+
+def _keys_filter(field, keys):
+    # (cl, other) pairs grouped by class: one IN list per class
+    by_class = defaultdict(list)
+    for cl, value in keys:
+        by_class[cl].append(value)
+    condition = Q()
+    for cl, values in by_class.items():
+        condition |= Q(cl=cl, **{f'{field}__in': values})
+    return condition
+
+
+def _apply(model, field, deltas):
+    deltas = {key: delta for key, delta in deltas.items() if delta != [0, 0]}
+    if not deltas:
+        return
+    # Make sure every row exists, then lock them so concurrent writers add up
+    model.objects.bulk_create(
+        [model(cl=cl, **{field: value}) for cl, value in deltas],
+        ignore_conflicts=True,
+    )
+    rows = list(model.objects.select_for_update().filter(_keys_filter(field, deltas)))
+    for row in rows:
+        present, absent = deltas[(row.cl, getattr(row, field))]
+        row.present_count = max(row.present_count + present, 0)
+        row.absent_count = max(row.absent_count + absent, 0)
+    model.objects.bulk_update(rows, ['present_count', 'absent_count'], batch_size=500)
+
+
+def invalidate_attendance_statistics():
+    statistics.invalidate_statistics('attendance')
+
+
+def apply_attendance_delta(removed=(), added=()):
+    """Update both rollups for removed and added ``(cl, date, roll, present_status)`` rows"""
+    daily, students = _deltas(list(removed), list(added))
+    with transaction.atomic():
+        _apply(models.AttendanceDailyCount, 'date', daily)
+        _apply(models.StudentAttendanceCount, 'roll', students)
+        transaction.on_commit(invalidate_attendance_statistics)
+
+
+def rebuild_counters():
+    """Recompute both rollups from the Attendance table; returns the row counts"""
+    present = Count('id', filter=Q(present_status='Present'))
+    absent = Count('id', filter=~Q(present_status='Present'))
+    with transaction.atomic():
+        models.AttendanceDailyCount.objects.all().delete()
+        models.StudentAttendanceCount.objects.all().delete()
+        models.AttendanceDailyCount.objects.bulk_create([
+            models.AttendanceDailyCount(cl=cl, date=date, present_count=present_count, absent_count=absent_count)
+            for cl, date, present_count, absent_count in models.Attendance.objects.values_list('cl', 'date').annotate(
+                present=present, absent=absent
+            ).order_by().iterator()
+        ], batch_size=1000)
+        models.StudentAttendanceCount.objects.bulk_create([
+            models.StudentAttendanceCount(cl=cl, roll=roll, present_count=present_count, absent_count=absent_count)
+            for cl, roll, present_count, absent_count in models.Attendance.objects.exclude(
+                roll__isnull=True
+            ).values_list('cl', 'roll').annotate(present=present, absent=absent).order_by().iterator()
+        ], batch_size=1000)
+        transaction.on_commit(invalidate_attendance_statistics)
+    return {
+        'daily': models.AttendanceDailyCount.objects.count(),
+        'students': models.StudentAttendanceCount.objects.count(),
+    }
+
+
+def student_attendance(cl, roll):
+    """(total days, present days) of one student"""
+    counts = models.StudentAttendanceCount.objects.filter(cl=cl, roll=roll).values_list(
+        'present_count', 'absent_count'
+    ).first()
+    if counts is None:
+        return 0, 0
+    present_count, absent_count = counts
+    return present_count + absent_count, present_count
+
+
+def class_attendance(class_name=None, date_from=None, date_to=None):
+    """Present/absent totals over the daily rollup, optionally for one class and a date range"""
+    daily = models.AttendanceDailyCount.objects.all()
+    if class_name:
+        daily = daily.filter(cl=class_name)
+    if date_from:
+        daily = daily.filter(date__gte=date_from)
+    if date_to:
+        daily = daily.filter(date__lte=date_to)
+    totals = daily.aggregate(present=Sum('present_count', default=0), absent=Sum('absent_count', default=0))
+    totals['total'] = totals['present'] + totals['absent']
+    return totals
+
+
+def attendance_by_class():
+    """[{'cl', 'total', 'present', 'absent'}] for every class, from the daily rollup"""
+    rows = models.AttendanceDailyCount.objects.values('cl').annotate(
+        present=Sum('present_count'),
+        absent=Sum('absent_count'),
+    ).order_by('cl')
+    return [dict(row, total=row['present'] + row['absent']) for row in rows]
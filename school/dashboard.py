@@ -0,0 +1,55 @@
+"""Admin dashboard counters.
+
+All teacher and student counters come from one conditional aggregate per
+table and are cached in the default cache until a TeacherExtra or
+StudentExtra row changes (see ``school.signals``).
+"""
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Q, Sum
+
+from . import models
+
+logger = logging.getLogger('school')
+
+DASHBOARD_METRICS_KEY = 'school:dashboard_metrics'
+
+
+def compute_dashboard_metrics():
+    metrics = models.TeacherExtra.objects.aggregate(
+        teachercount=Count('id', filter=Q(status=True)),
+        pendingteachercount=Count('id', filter=Q(status=False)),
+        teachersalary=Sum('salary', filter=Q(status=True)),
+        pendingteachersalary=Sum('salary', filter=Q(status=False)),
+    )
+    metrics.update(models.StudentExtra.objects.aggregate(
+        studentcount=Count('id', filter=Q(status=True)),
+        pendingstudentcount=Count('id', filter=Q(status=False)),
+        studentfee=Sum('fee', filter=Q(status=True), default=0),
+        pendingstudentfee=Sum('fee', filter=Q(status=False)),
+    ))
+    return metrics
+
+
+def get_dashboard_metrics():
+    try:
+        metrics = cache.get(DASHBOARD_METRICS_KEY)
+    except Exception as e:
+        logger.error(f"Error reading dashboard metrics cache: {str(e)}")
+        metrics = None
+    if metrics is None:
+        metrics = compute_dashboard_metrics()
+        try:
+            cache.set(DASHBOARD_METRICS_KEY, metrics, getattr(settings, 'DASHBOARD_METRICS_TIMEOUT', 3600))
+        except Exception as e:
+            logger.error(f"Error writing dashboard metrics cache: {str(e)}")
+    return metrics
+
+
+def invalidate_dashboard_metrics():
+    try:
+        cache.delete(DASHBOARD_METRICS_KEY)
+    except Exception as e:
+        logger.error(f"Error invalidating dashboard metrics cache: {str(e)}")
@@ -0,0 +1,28 @@
+"""DRF filter backends backed by the full-text search index (school.search)."""
+from rest_framework.filters import OrderingFilter, SearchFilter
+
+from . import search
+
+
+class FullTextSearchFilter(SearchFilter):
+    """``?search=`` through the search index, ranked by relevance.
+
+    Viewsets name their index with ``search_entity``; those without one keep the
+    ``search_fields`` icontains lookup of the plain SearchFilter.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        entity_type = getattr(view, 'search_entity', None)
+        query = request.query_params.get(self.search_param, '')
+        if entity_type is None or not search.search_terms(query):
+            return super().filter_queryset(request, queryset, view)
+        return search.rank_queryset(queryset, entity_type, query)
+
+
+class RankedOrderingFilter(OrderingFilter):
+    """OrderingFilter that keeps relevance order for searches without ``?ordering=``"""
+
+    def filter_queryset(self, request, queryset, view):
+        if 'search_rank' in queryset.query.annotations and not request.query_params.get(self.ordering_param):
+            return queryset
+        return super().filter_queryset(request, queryset, view)
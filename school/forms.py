@@ -22,6 +22,14 @@ class StudentExtraForm(forms.ModelForm):
         model=models.StudentExtra
         fields=['roll','cl','mobile','fee','status']
 
+    def clean(self):
+        cleaned_data = super().clean()
+        roll, cl = cleaned_data.get('roll'), cleaned_data.get('cl')
+        # Attendance is recorded per class and roll, so a roll can't be shared within a class
+        if roll and cl and models.StudentExtra.objects.filter(cl=cl, roll=roll).exclude(pk=self.instance.pk).exists():
+            self.add_error('roll', f'Roll {roll} is already used in class {cl}.')
+        return cleaned_data
+
 
 
 #for teacher related form
@@ -210,3 +218,12 @@ class ReportForm(forms.Form):
     date_from = forms.DateField(required=False, widget=forms.DateInput(attrs={'type': 'date'}))
     date_to = forms.DateField(required=False, widget=forms.DateInput(attrs={'type': 'date'}))
     format = forms.ChoiceField(choices=[('pdf', 'PDF'), ('excel', 'Excel'), ('csv', 'CSV')], initial='pdf')
+
+
+class ExportFilterForm(forms.Form):
+    class_name = forms.ChoiceField(choices=classes, required=False)
+    date_from = forms.DateField(required=False)
+    date_to = forms.DateField(required=False)
+    status = forms.ChoiceField(choices=models.FeePayment.PAYMENT_STATUS, required=False)
+    exam = forms.IntegerField(min_value=1, required=False)
+    format = forms.ChoiceField(choices=[('csv', 'CSV'), ('xlsx', 'Excel')], required=False)
@@ -0,0 +1,188 @@
+"""Pooled SMTP email backend.
+
+Django's SMTP backend opens a fresh (TLS) session for every ``send_mail`` call
+and quits it straight after. ``PooledEmailBackend`` hands the authenticated
+connection back to a worker-local pool on ``close()`` instead, so the next
+``send_mail``/``send_mass_mail`` in the same process reuses it. Connections are
+recycled after ``EMAIL_POOL_MAX_MESSAGES`` messages or ``EMAIL_POOL_MAX_IDLE``
+seconds idle, and a send that finds the server gone reconnects once and retries.
+
+Enable with ``EMAIL_BACKEND = 'school.mail.PooledEmailBackend'``.
+"""
+import atexit
+import logging
+import os
+import smtplib
+import threading
+import time
+
+from django.conf import settings
+from django.core.mail.backends.smtp import EmailBackend
+
+logger = logging.getLogger('school')
+
+_lock = threading.Lock()
+_pool = {}
+_pool_pid = os.getpid()
+_stats = {
+    'connections_opened': 0,
+    'connections_reused': 0,
+    'reconnects': 0,
+    'messages_sent': 0,
+    'handshake_seconds': 0.0,
+}
+
+
+class PooledConnection:
+    def __init__(self, connection, handshake_seconds):
+        self.connection = connection
+        self.handshake_seconds = handshake_seconds
+        self.messages_sent = 0
+        self.last_used = time.monotonic()
+
+
+def _pool_settings():
+    return (
+        getattr(settings, 'EMAIL_POOL_SIZE', 4),
+        getattr(settings, 'EMAIL_POOL_MAX_IDLE', 60),
+        getattr(settings, 'EMAIL_POOL_MAX_MESSAGES', 100),
+    )
+
+
+def _quit(pooled):
+    try:
+        pooled.connection.quit()
+    except (smtplib.SMTPException, OSError):
+        try:
+            pooled.connection.close()
+        except (smtplib.SMTPException, OSError):
+            pass
+
+
+def _reset_after_fork():
+    # Sockets must never be shared between a parent and its forked workers
+    global _pool_pid
+    if _pool_pid != os.getpid():
+        _pool.clear()
+        _pool_pid = os.getpid()
+
+
+def checkout(key):
+    _, max_idle, _ = _pool_settings()
+    with _lock:
+        _reset_after_fork()
+        idle = _pool.get(key, [])
+        while idle:
+            pooled = idle.pop()
+            if time.monotonic() - pooled.last_used <= max_idle:
+                _stats['connections_reused'] += 1
+                return pooled
+            _quit(pooled)
+    return None
+
+
+def checkin(key, pooled):
+    pool_size, _, max_messages = _pool_settings()
+    with _lock:
+        _reset_after_fork()
+        idle = _pool.setdefault(key, [])
+        if pooled.messages_sent < max_messages and len(idle) < pool_size:
+            pooled.last_used = time.monotonic()
+            idle.append(pooled)
+            return
+    _quit(pooled)
+
+
+def close_pool():
+    with _lock:
+        connections = [pooled for idle in _pool.values() for pooled in idle]
+        _pool.clear()
+    for pooled in connections:
+        _quit(pooled)
+
+
+atexit.register(close_pool)
+
+
+def get_pool_stats():
+    """Counters for this worker process"""
+    with _lock:
+        stats = dict(_stats)
+        stats['idle_connections'] = sum(len(idle) for idle in _pool.values())
+    opened = stats['connections_opened']
+    stats['avg_handshake_ms'] = round(stats['handshake_seconds'] / opened * 1000, 2) if opened else 0
+    stats['messages_per_connection'] = round(stats['messages_sent'] / opened, 2) if opened else 0
+    return stats
+
+
+class PooledEmailBackend(EmailBackend):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.pooled = None
+
+    @property
+    def pool_key(self):
+        return (self.host, self.port, self.username, self.use_tls, self.use_ssl)
+
+    def open(self):
+        if self.connection:
+            return False
+        pooled = checkout(self.pool_key)
+        if pooled is not None:
+            self.connection = pooled.connection
+            self.pooled = pooled
+            return True
+
+        started = time.monotonic()
+        opened = super().open()
+        if self.connection:
+            handshake_seconds = time.monotonic() - started
+            self.pooled = PooledConnection(self.connection, handshake_seconds)
+            with _lock:
+                _stats['connections_opened'] += 1
+                _stats['handshake_seconds'] += handshake_seconds
+        return opened
+
+    def close(self):
+        if self.connection is None:
+            return
+        pooled, self.pooled = self.pooled, None
+        if pooled is None:
+            super().close()
+            return
+        self.connection = None
+        checkin(self.pool_key, pooled)
+
+    def discard(self):
+        """Drop a broken connection without returning it to the pool"""
+        if self.pooled is not None:
+            _quit(self.pooled)
+        self.connection = None
+        self.pooled = None
+
+    def _send(self, email_message):
+        fail_silently = self.fail_silently
+        self.fail_silently = False
+        try:
+            try:
+                sent = super()._send(email_message)
+            except (smtplib.SMTPServerDisconnected, OSError) as e:
+                # A pooled connection may have been dropped by the server while idle
+                logger.info(f"SMTP connection lost ({e}), reconnecting")
+                with _lock:
+                    _stats['reconnects'] += 1
+                self.discard()
+                self.open()
+                sent = super()._send(email_message)
+        except (smtplib.SMTPException, OSError):
+            if not fail_silently:
+                raise
+            sent = False
+        finally:
+            self.fail_silently = fail_silently
+
+        if sent and self.pooled is not None:
+            self.pooled.messages_sent += 1
+            with _lock:
+                _stats['messages_sent'] += 1
+        return sent
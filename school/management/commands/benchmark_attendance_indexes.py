@@ -0,0 +1,88 @@
+import random
+import time
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Count, Q
+
+from school import models
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a year of attendance for several classes and compare query times on the "
+        "indexed Attendance table against an unindexed copy. Everything is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--classes', type=int, default=10)
+        parser.add_argument('--students', type=int, default=40, help='students per class')
+        parser.add_argument('--days', type=int, default=365)
+        parser.add_argument('--repeat', type=int, default=50, help='runs per query pattern')
+
+    def handle(self, *args, **options):
+        classes = [name for name, _ in models.classes][:options['classes']]
+        rolls = [str(roll) for roll in range(1, options['students'] + 1)]
+        start = date(2023, 1, 1)
+        days = [start + timedelta(days=offset) for offset in range(options['days'])]
+
+        with transaction.atomic():
+            self.seed(classes, rolls, days)
+            table = models.Attendance._meta.db_table
+            with connection.cursor() as cursor:
+                cursor.execute(f'CREATE TEMPORARY TABLE attendance_noindex AS SELECT * FROM {table}')
+
+            self.stdout.write(f"{'query':<28}{'indexed ms':>12}{'no index ms':>14}{'speedup':>10}")
+            for label, build in self.patterns():
+                querysets = [build(random.choice(classes), random.choice(rolls), random.choice(days))
+                             for _ in range(options['repeat'])]
+                indexed = self.time_queries(querysets, table, table)
+                unindexed = self.time_queries(querysets, table, 'attendance_noindex')
+                speedup = unindexed / indexed if indexed else 0
+                self.stdout.write(f"{label:<28}{indexed:>12.3f}{unindexed:>14.3f}{speedup:>9.1f}x")
+
+            with connection.cursor() as cursor:
+                cursor.execute('DROP TABLE attendance_noindex')
+            transaction.set_rollback(True)
+
+    def seed(self, classes, rolls, days):
+        self.stdout.write(f"Seeding {len(classes) * len(rolls) * len(days)} attendance rows...")
+        batch = []
+        for cl in classes:
+            for day in days:
+                for roll in rolls:
+                    batch.append(models.Attendance(
+                        cl=cl, date=day, roll=roll,
+                        present_status='Present' if random.random() < 0.9 else 'Absent',
+                    ))
+                if len(batch) >= 10000:
+                    models.Attendance.objects.bulk_create(batch)
+                    batch = []
+        models.Attendance.objects.bulk_create(batch)
+
+    def patterns(self):
+        attendance = models.Attendance.objects
+        return [
+            ('class day (view/export)', lambda cl, roll, day: attendance.filter(cl=cl, date=day).order_by('roll')),
+            ('class month (report)', lambda cl, roll, day: attendance.filter(
+                cl=cl, date__range=[day, day + timedelta(days=30)]).order_by('date', 'roll')),
+            # grouped on the filtered key so the aggregate stays a queryset we can compile
+            ('student history', lambda cl, roll, day: attendance.filter(cl=cl, roll=roll).values('cl').annotate(
+                total=Count('id'), present=Count('id', filter=Q(present_status='Present')))),
+            ('class statistics', lambda cl, roll, day: attendance.filter(cl=cl, date__gte=day).values('cl').annotate(
+                total=Count('id'), present=Count('id', filter=Q(present_status='Present')))),
+        ]
+
+    def time_queries(self, querysets, table, target):
+        statements = []
+        for queryset in querysets:
+            sql, params = queryset.query.sql_with_params()
+            statements.append((sql.replace(table, target), params))
+        with connection.cursor() as cursor:
+            started = time.perf_counter()
+            for sql, params in statements:
+                cursor.execute(sql, params)
+                cursor.fetchall()
+            elapsed = time.perf_counter() - started
+        return elapsed / len(statements) * 1000
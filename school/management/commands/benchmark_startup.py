@@ -0,0 +1,82 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# What a web or Celery worker imports before serving anything
+APP_MODULES = ['school.views', 'school.api_views', 'school.consumers', 'school.routing', 'school.tasks']
+# What the single services module used to import up front
+HEAVY_MODULES = ['pandas', 'openpyxl', 'reportlab.platypus', 'reportlab.pdfgen.canvas', 'qrcode']
+
+PROBE = '''
+import importlib, json, sys, time
+started = time.perf_counter()
+import django
+django.setup()
+setup_seconds = time.perf_counter() - started
+for name in sys.argv[1:]:
+    importlib.import_module(name)
+ready_seconds = time.perf_counter() - started
+rss_kb = None
+try:
+    with open('/proc/self/status') as status:
+        rss_kb = next(int(line.split()[1]) for line in status if line.startswith('VmRSS:'))
+except (OSError, StopIteration):
+    try:
+        import resource
+        rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        if sys.platform == 'darwin':
+            rss_kb //= 1024
+    except ImportError:
+        pass
+print(json.dumps({
+    'setup': setup_seconds,
+    'ready': ready_seconds,
+    'rss_kb': rss_kb,
+    'modules': len(sys.modules),
+    'heavy': sorted(name for name in %r if name in sys.modules),
+}))
+''' % (HEAVY_MODULES,)
+
+
+class Command(BaseCommand):
+    help = (
+        "Start fresh Python processes and report the median django.setup() time, time until the app "
+        "modules are imported, resident memory and loaded modules, with the report/import libraries "
+        "left lazy and with them imported up front as the old services module did."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=5, help='processes started per scenario')
+
+    def handle(self, *args, **options):
+        scenarios = [
+            ('lazy', APP_MODULES),
+            ('eager', APP_MODULES + HEAVY_MODULES),
+        ]
+        self.stdout.write(
+            f"{'scenario':<10}{'setup ms':>10}{'ready ms':>10}{'rss MB':>9}{'modules':>9}  heavy modules loaded"
+        )
+        for name, modules in scenarios:
+            runs = [self.probe(modules) for _ in range(options['repeat'])]
+            setup = statistics.median(run['setup'] for run in runs) * 1000
+            ready = statistics.median(run['ready'] for run in runs) * 1000
+            rss = [run['rss_kb'] for run in runs if run['rss_kb'] is not None]
+            rss = f"{statistics.median(rss) / 1024:.1f}" if rss else 'n/a'
+            modules_loaded = statistics.median(run['modules'] for run in runs)
+            heavy = ', '.join(runs[-1]['heavy']) or 'none'
+            self.stdout.write(f"{name:<10}{setup:>10.0f}{ready:>10.0f}{rss:>9}{modules_loaded:>9.0f}  {heavy}")
+
+    def probe(self, modules):
+        env = dict(os.environ, DJANGO_SETTINGS_MODULE=settings.SETTINGS_MODULE)
+        result = subprocess.run(
+            [sys.executable, '-c', PROBE, *modules],
+            cwd=settings.BASE_DIR, env=env, capture_output=True, text=True,
+        )
+        if result.returncode != 0:
+            raise CommandError(f"Startup probe failed:\n{result.stderr}")
+        return json.loads(result.stdout.strip().splitlines()[-1])
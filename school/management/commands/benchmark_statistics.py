@@ -0,0 +1,150 @@
+import time
+from datetime import date, timedelta
+
+from django.contrib.auth.models import User
+from django.db import connection, transaction
+from django.db.models import Avg, Count, Sum
+from django.core.management.base import BaseCommand
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from school import api_views, counters, models, statistics
+
+
+# The statistics actions as they were: one COUNT/SUM query per filter
+
+def separate_teacher_statistics():
+    queryset = models.TeacherExtra.objects.all()
+    avg_salary = queryset.filter(status=True).aggregate(avg_salary=Avg('salary'))['avg_salary'] or 0
+    return {
+        'total_teachers': queryset.count(),
+        'active_teachers': queryset.filter(status=True).count(),
+        'pending_teachers': queryset.filter(status=False).count(),
+        'average_salary': round(avg_salary, 2),
+    }
+
+
+def separate_student_statistics():
+    queryset = models.StudentExtra.objects.all()
+    return {
+        'total_students': queryset.count(),
+        'active_students': queryset.filter(status=True).count(),
+        'pending_students': queryset.filter(status=False).count(),
+        'class_distribution': list(queryset.filter(status=True).values('cl').annotate(count=Count('id')).order_by('cl')),
+    }
+
+
+def separate_fee_statistics():
+    queryset = models.FeePayment.objects.all()
+    total_amount = queryset.aggregate(total=Sum('amount'))['total'] or 0
+    paid_amount = queryset.filter(status='paid').aggregate(total=Sum('amount'))['total'] or 0
+    pending_amount = queryset.filter(status='pending').aggregate(total=Sum('amount'))['total'] or 0
+    return {
+        'total_amount': total_amount,
+        'paid_amount': paid_amount,
+        'pending_amount': pending_amount,
+        'collection_rate': round((paid_amount / total_amount * 100) if total_amount > 0 else 0, 2),
+    }
+
+
+def separate_attendance_statistics():
+    queryset = models.Attendance.objects.all()
+    total_records = queryset.count()
+    present_count = queryset.filter(present_status='Present').count()
+    return {
+        'total_records': total_records,
+        'present_count': present_count,
+        'absent_count': queryset.filter(present_status='Absent').count(),
+        'attendance_percentage': round((present_count / total_records * 100) if total_records > 0 else 0, 2),
+    }
+
+
+BENCHMARKS = [
+    ('teachers', separate_teacher_statistics, statistics.teacher_statistics, api_views.TeacherViewSet),
+    ('students', separate_student_statistics, statistics.student_statistics, api_views.StudentViewSet),
+    ('fees', separate_fee_statistics, statistics.fee_statistics, api_views.FeePaymentViewSet),
+    ('attendance', separate_attendance_statistics, statistics.attendance_statistics, api_views.AttendanceViewSet),
+]
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare query counts and latency of the statistics actions: one query per filter, "
+        "one conditional aggregate, and the cached API response. Seeded rows are rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=2000, help='students, teachers and fee payments to seed')
+        parser.add_argument('--days', type=int, default=20, help='days of attendance per student')
+        parser.add_argument('--repeat', type=int, default=20, help='calls per measurement')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            admin = User.objects.create_superuser('statistics-bench', 'statistics-bench@example.com', 'statistics-bench')
+            self.seed(options['rows'], options['days'])
+            results = [self.measure(admin, *benchmark, options['repeat']) for benchmark in BENCHMARKS]
+            transaction.set_rollback(True)
+
+        self.stdout.write(
+            f"{'statistic':<12}{'separate':>18}{'aggregate':>18}{'cached API':>18}"
+        )
+        for name, separate, aggregate, cached in results:
+            self.stdout.write(
+                f"{name:<12}" + ''.join(f"{queries:>5} q {seconds * 1000:>8.2f} ms" for queries, seconds in (separate, aggregate, cached))
+            )
+
+    def measure(self, admin, name, separate, aggregate, viewset, repeat):
+        factory = APIRequestFactory()
+        view = viewset.as_view({'get': 'statistics'})
+
+        def api_call():
+            request = factory.get(f'/api/{name}/statistics/')
+            force_authenticate(request, user=admin)
+            view(request).render()
+
+        statistics.invalidate_statistics(name)
+        api_call()  # fills the cache (and the role cache)
+        return (
+            name,
+            self.time_calls(separate, repeat),
+            self.time_calls(aggregate, repeat),
+            self.time_calls(api_call, repeat),
+        )
+
+    def time_calls(self, function, repeat):
+        with CaptureQueriesContext(connection) as queries:
+            function()
+        started = time.perf_counter()
+        for _ in range(repeat):
+            function()
+        return len(queries), (time.perf_counter() - started) / repeat
+
+    def seed(self, rows, days):
+        User.objects.bulk_create([
+            User(username=f'statistics-bench-{kind}-{i}') for kind in ('teacher', 'student') for i in range(rows)
+        ])
+        users = list(User.objects.filter(username__startswith='statistics-bench-').exclude(username='statistics-bench').order_by('id'))
+        teacher_users = [user for user in users if '-teacher-' in user.username]
+        student_users = [user for user in users if '-student-' in user.username]
+        models.TeacherExtra.objects.bulk_create([
+            models.TeacherExtra(user=user, salary=1000 + i, mobile='000', status=i % 5 != 0)
+            for i, user in enumerate(teacher_users)
+        ])
+        classes = [choice for choice, _ in models.classes]
+        models.StudentExtra.objects.bulk_create([
+            models.StudentExtra(user=user, roll=str(i), cl=classes[i % len(classes)], fee=100, status=i % 7 != 0)
+            for i, user in enumerate(student_users)
+        ])
+        students = list(models.StudentExtra.objects.filter(user__in=student_users))
+        models.FeePayment.objects.bulk_create([
+            models.FeePayment(student=student, amount=100 + i % 50, due_date=date.today(),
+                              status='paid' if i % 3 else 'pending')
+            for i, student in enumerate(students)
+        ])
+        attendance = [
+            models.Attendance(cl=student.cl, roll=student.roll, date=date.today() - timedelta(days=day),
+                              present_status='Present' if (i + day) % 4 else 'Absent')
+            for i, student in enumerate(students) for day in range(days)
+        ]
+        models.Attendance.objects.bulk_create(attendance, batch_size=1000)
+        counters.apply_attendance_delta(added=[counters.attendance_row(record) for record in attendance])
@@ -0,0 +1,97 @@
+from datetime import date, timedelta
+
+from django.contrib.auth.models import Group, User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from school import models
+from school.api_urls import router
+
+
+class Command(BaseCommand):
+    help = (
+        "Call every REST list endpoint with a small and a large dataset and fail if the "
+        "number of queries grows with the number of rows. Everything is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--small', type=int, default=3, help='rows per model in the first run')
+        parser.add_argument('--large', type=int, default=30, help='rows per model in the second run')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            admin = User.objects.create_superuser('querycount-admin', 'querycount@example.com', 'querycount')
+            admin.groups.add(Group.objects.get_or_create(name='ADMIN')[0])
+            self.seed(admin, options['small'], 'a')
+            small = self.count_queries(admin)
+            self.seed(admin, options['large'] - options['small'], 'b')
+            large = self.count_queries(admin)
+            transaction.set_rollback(True)
+
+        failures = []
+        self.stdout.write(f"{'endpoint':<28}{options['small']:>10} rows{options['large']:>10} rows")
+        for prefix in small:
+            self.stdout.write(f"{prefix:<28}{small[prefix]:>15}{large[prefix]:>15}")
+            if small[prefix] != large[prefix]:
+                failures.append(prefix)
+        if failures:
+            raise CommandError(f"Query count depends on result size for: {', '.join(failures)}")
+        self.stdout.write(self.style.SUCCESS('All list endpoints run a constant number of queries'))
+
+    def count_queries(self, user):
+        factory = APIRequestFactory()
+        counts = {}
+        for prefix, viewset, basename in router.registry:
+            if not hasattr(viewset, 'queryset'):
+                continue
+            request = factory.get(f'/api/{prefix}/')
+            force_authenticate(request, user=user)
+            view = viewset.as_view({'get': 'list'})
+            # the first call warms per-user caches (role lookup) that aren't part of the list cost
+            view(request).render()
+            with CaptureQueriesContext(connection) as queries:
+                response = view(request)
+                response.render()
+            if response.status_code != 200:
+                raise CommandError(f"/api/{prefix}/ returned {response.status_code}")
+            counts[prefix] = len(queries)
+        return counts
+
+    def seed(self, admin, count, tag):
+        now = timezone.now()
+        for i in range(count):
+            key = f'{tag}{i}'
+            teacher_user = User.objects.create_user(f'qc-teacher-{key}', first_name='Teacher', last_name=key)
+            teacher = models.TeacherExtra.objects.create(user=teacher_user, salary=1000, mobile='000', status=True)
+            student_user = User.objects.create_user(f'qc-student-{key}', first_name='Student', last_name=key)
+            student = models.StudentExtra.objects.create(user=student_user, roll=key, cl='one', fee=100, status=True)
+            subject = models.Subject.objects.create(name=f'Subject {key}', code=f'QC{key}')
+            assignment = models.Assignment.objects.create(
+                title=f'Assignment {key}', description='-', subject=subject, teacher=teacher,
+                class_name='one', due_date=now + timedelta(days=3),
+            )
+            models.AssignmentSubmission.objects.create(assignment=assignment, student=student, submission_file='qc.txt')
+            models.Notification.objects.create(
+                title=f'Notification {key}', message='-', notification_type='general', recipient=admin,
+            )
+            exam = models.Exam.objects.create(
+                name=f'Exam {key}', exam_type='quiz', subject=subject, class_name='one',
+                exam_date=now + timedelta(days=7), duration_minutes=30, max_marks=10, instructions='-',
+                created_by=teacher,
+            )
+            models.ExamResult.objects.create(exam=exam, student=student, marks_obtained=7)
+            models.FeePayment.objects.create(student=student, amount=100, due_date=date.today())
+            book = models.LibraryBook.objects.create(
+                title=f'Book {key}', author='-', isbn=f'QC{key}', category='-', publisher='-',
+                publication_year=2020, pages=100,
+            )
+            models.BookBorrowing.objects.create(book=book, borrower=student_user, due_date=date.today())
+            models.SchoolEvent.objects.create(
+                title=f'Event {key}', description='-', event_type='academic', start_date=now,
+                end_date=now + timedelta(hours=2), location='-', organizer=admin,
+            )
+            models.Attendance.objects.create(cl='one', roll=key, date=date.today(), present_status='Present')
+            models.AuditLog.objects.create(user=student_user, path=f'/qc/{key}', method='GET', status_code=200)
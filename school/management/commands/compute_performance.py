@@ -0,0 +1,27 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from school import models, services
+
+
+class Command(BaseCommand):
+    help = "Recompute StudentPerformance for a semester in batch (whole school, one class, or only what changed)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--semester', help='e.g. 2024-1 (default: the current semester)')
+        parser.add_argument('--class', dest='class_name', choices=[name for name, _ in models.classes])
+        parser.add_argument('--incremental', action='store_true',
+                            help='only students whose attendance or exam results changed since the last incremental run')
+
+    def handle(self, *args, **options):
+        semester = options['semester'] or services.current_semester()
+        started = time.perf_counter()
+        if options['incremental']:
+            result = services.refresh_changed_performance(semester)
+        else:
+            result = services.compute_performance(semester, class_name=options['class_name'])
+        self.stdout.write(self.style.SUCCESS(
+            f"{semester}: {result['students']} students, {result['created']} rows created, "
+            f"{result['updated']} updated in {time.perf_counter() - started:.2f}s"
+        ))
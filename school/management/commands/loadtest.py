@@ -0,0 +1,211 @@
+import asyncio
+import json
+import statistics
+import threading
+import time
+from collections import defaultdict
+
+from asgiref.sync import async_to_sync
+from asgiref.testing import ApplicationCommunicator
+from django.conf import settings
+from django.contrib.auth.models import Group, User
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+from django.utils import timezone
+
+from school.services.notifications import push_to_users
+
+HTML_PATHS = [
+    '/admin-dashboard',
+    '/admin-view-student',
+    '/admin-view-teacher',
+    '/admin-view-fee/one',
+    '/admin-view-attendance/one',
+]
+API_PATHS = [
+    '/api/students/',
+    '/api/teachers/?fields=id,status,salary',
+    '/api/attendance/',
+    '/api/attendance/statistics/?class_name=one',
+    '/api/fee-payments/statistics/',
+    '/api/dashboard/admin_stats/',
+]
+# Dispatch a Celery task per request (eager under perf_settings)
+POST_PATHS = [
+    '/api/send-notification',
+]
+LOADTEST_USERNAME = 'loadtest-admin'
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate load against the HTML views, the REST API and the WebSockets in this process "
+        "and report throughput and latency. Meant for the schoolmanagement.perf_settings profile."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--duration', type=float, default=10, help='seconds of HTTP load')
+        parser.add_argument('--concurrency', type=int, default=4, help='HTTP client threads')
+        parser.add_argument('--sockets', type=int, default=100, help='notification and chat sockets')
+        parser.add_argument('--messages', type=int, default=10, help='notifications and chat messages per socket')
+        parser.add_argument('--skip-http', action='store_true')
+        parser.add_argument('--skip-websockets', action='store_true')
+
+    def handle(self, *args, **options):
+        backend = settings.CHANNEL_LAYERS['default']['BACKEND']
+        if not options['skip_websockets'] and not backend.endswith('InMemoryChannelLayer'):
+            raise CommandError(
+                f"The WebSocket load runs in this process and needs the in-memory channel layer, not {backend}. "
+                "Use DJANGO_SETTINGS_MODULE=schoolmanagement.perf_settings or --skip-websockets."
+            )
+        admin = self.loadtest_admin()
+        if not options['skip_http']:
+            self.http_load(admin, options['duration'], options['concurrency'])
+        if not options['skip_websockets']:
+            async_to_sync(self.websocket_load)(admin, options['sockets'], options['messages'])
+
+    def loadtest_admin(self):
+        admin, created = User.objects.get_or_create(username=LOADTEST_USERNAME, defaults={'is_staff': True})
+        if created:
+            admin.set_unusable_password()
+            admin.save()
+        admin.groups.add(Group.objects.get_or_create(name='ADMIN')[0])
+        return admin
+
+    # HTTP
+
+    def http_load(self, admin, duration, concurrency):
+        latencies = defaultdict(list)
+        errors = defaultdict(int)
+        lock = threading.Lock()
+        deadline = time.monotonic() + duration
+
+        def worker(offset):
+            # Server errors come back as 500s; raising them would leak across threads
+            client = Client(raise_request_exception=False)
+            client.force_login(admin)
+            paths = HTML_PATHS + API_PATHS + POST_PATHS
+            payload = json.dumps({
+                'recipient_id': admin.id,
+                'title': 'Load test',
+                'message': 'Load test notification',
+            })
+            i = offset
+            while time.monotonic() < deadline:
+                path = paths[i % len(paths)]
+                i += 1
+                started = time.perf_counter()
+                if path in POST_PATHS:
+                    response = client.post(path, payload, content_type='application/json')
+                    # The endpoint reports a failed dispatch in the body, not the status
+                    failed = response.status_code >= 400 or not response.json().get('success')
+                else:
+                    failed = client.get(path).status_code >= 400
+                elapsed = time.perf_counter() - started
+                with lock:
+                    latencies[path].append(elapsed)
+                    if failed:
+                        errors[path] += 1
+
+        threads = [threading.Thread(target=worker, args=(n,)) for n in range(concurrency)]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        total = sum(len(samples) for samples in latencies.values())
+        self.stdout.write(f"HTTP: {total} requests in {elapsed:.1f}s with {concurrency} threads, {total / elapsed:.1f} req/s")
+        self.stdout.write(f"{'path':<46}{'requests':>9}{'errors':>8}{'p50 ms':>9}{'p95 ms':>9}")
+        for path in HTML_PATHS + API_PATHS + POST_PATHS:
+            samples = sorted(latencies[path])
+            if not samples:
+                continue
+            p50 = statistics.median(samples) * 1000
+            p95 = samples[min(int(len(samples) * 0.95), len(samples) - 1)] * 1000
+            self.stdout.write(f"{path:<46}{len(samples):>9}{errors[path]:>8}{p50:>9.1f}{p95:>9.1f}")
+
+    # WebSockets
+
+    async def open_socket(self, application, path, session_key):
+        communicator = ApplicationCommunicator(application, {
+            'type': 'websocket',
+            'path': path,
+            'raw_path': path.encode(),
+            'query_string': b'',
+            'headers': [(b'cookie', f'{settings.SESSION_COOKIE_NAME}={session_key}'.encode())],
+            'subprotocols': [],
+        })
+        await communicator.send_input({'type': 'websocket.connect'})
+        if (await communicator.receive_output(10))['type'] != 'websocket.accept':
+            raise CommandError(f"{path} refused the connection")
+        return communicator
+
+    async def receive_frames(self, communicator, count, timeout=30):
+        frames = []
+        deadline = time.monotonic() + timeout
+        received = 0
+        while received < count and time.monotonic() < deadline:
+            try:
+                message = await communicator.receive_output(max(deadline - time.monotonic(), 0.01))
+            except asyncio.TimeoutError:
+                break
+            frame = json.loads(message['text'])
+            frames.append(frame)
+            received += len(frame['notifications']) if frame.get('type') == 'notifications' else 1
+        return frames, received
+
+    async def close_sockets(self, communicators):
+        for communicator in communicators:
+            await communicator.send_input({'type': 'websocket.disconnect', 'code': 1000})
+            await communicator.wait(10)
+
+    async def websocket_load(self, admin, sockets, messages):
+        from schoolmanagement.routing import application
+
+        client = Client()
+        await asyncio.get_running_loop().run_in_executor(None, client.force_login, admin)
+        session_key = client.cookies[settings.SESSION_COOKIE_NAME].value
+
+        # Notifications: every socket is the admin's, batched per socket by the consumer
+        started = time.perf_counter()
+        communicators = [await self.open_socket(application, '/ws/notifications/', session_key) for _ in range(sockets)]
+        connect_seconds = time.perf_counter() - started
+        started = time.perf_counter()
+        for n in range(messages):
+            await push_to_users([admin.id], {
+                'type': 'notification_message',
+                'title': f'Load test {n}',
+                'message': 'Load test notification',
+                'notification_type': 'general',
+                'created_at': timezone.now().isoformat(),
+            })
+        results = await asyncio.gather(*[self.receive_frames(communicator, messages) for communicator in communicators])
+        elapsed = time.perf_counter() - started
+        await self.close_sockets(communicators)
+        delivered = sum(received for _, received in results)
+        frames = sum(len(received_frames) for received_frames, _ in results)
+        self.stdout.write(
+            f"Notifications: {sockets} sockets connected in {connect_seconds:.2f}s, "
+            f"{delivered}/{sockets * messages} delivered in {frames} frames, {elapsed:.2f}s, "
+            f"{delivered / elapsed:.0f} notifications/s"
+        )
+
+        # Chat: one room, every socket receives the history on join and every message after it
+        rooms = [await self.open_socket(application, '/ws/chat/loadtest/', session_key) for _ in range(sockets)]
+        for communicator in rooms:
+            await communicator.receive_output(10)
+        # Every socket is the load-test admin, who may send CHAT_RATE_LIMIT messages per window
+        sent = min(messages, getattr(settings, 'CHAT_RATE_LIMIT', 20))
+        started = time.perf_counter()
+        for n in range(sent):
+            await rooms[0].send_input({'type': 'websocket.receive', 'text': json.dumps({'message': f'load test {n}'})})
+        results = await asyncio.gather(*[self.receive_frames(communicator, sent) for communicator in rooms])
+        elapsed = time.perf_counter() - started
+        await self.close_sockets(rooms)
+        delivered = sum(received for _, received in results)
+        self.stdout.write(
+            f"Chat: {sent} messages fanned out to {len(rooms)} sockets, "
+            f"{delivered}/{sent * len(rooms)} delivered in {elapsed:.2f}s, {delivered / elapsed:.0f} deliveries/s"
+        )
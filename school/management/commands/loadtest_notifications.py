@@ -0,0 +1,108 @@
+import asyncio
+import json
+import time
+
+from asgiref.sync import async_to_sync
+from asgiref.testing import ApplicationCommunicator
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+from django.utils import timezone
+
+from school.consumers import NotificationConsumer
+from school.services.notifications import push_to_users
+
+# Ids far above real users; the load test never touches the database
+LOADTEST_USER_BASE = 10 ** 9
+
+
+class Command(BaseCommand):
+    help = (
+        "Open many notification sockets on the in-memory channel layer, fan out a burst of "
+        "notifications to every user and report frames, drops and delivery time, once per batch window."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sockets', type=int, default=200, help='connected clients')
+        parser.add_argument('--events', type=int, default=100, help='notifications sent to every client')
+        parser.add_argument(
+            '--window', type=float, action='append',
+            help='NOTIFICATION_BATCH_WINDOW values to compare (default: 0 and 0.05)',
+        )
+        parser.add_argument(
+            '--high-water', type=int,
+            help='override NOTIFICATION_QUEUE_HIGH_WATER to exercise the drop policy',
+        )
+        parser.add_argument('--timeout', type=float, default=30, help='seconds to wait for delivery')
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"{'window':>8}{'frames':>10}{'delivered':>12}{'dropped':>10}{'seconds':>10}{'events/s':>12}")
+        for window in options['window'] or [0, 0.05]:
+            layers = {'default': {
+                'BACKEND': 'channels.layers.InMemoryChannelLayer',
+                # Room for the whole burst in every socket's channel
+                'CONFIG': {'capacity': options['events'] + 100},
+            }}
+            overrides = {'CHANNEL_LAYERS': layers, 'NOTIFICATION_BATCH_WINDOW': window}
+            if options['high_water']:
+                overrides['NOTIFICATION_QUEUE_HIGH_WATER'] = options['high_water']
+            with override_settings(**overrides):
+                frames, delivered, dropped, elapsed = async_to_sync(self.run)(
+                    options['sockets'], options['events'], options['timeout']
+                )
+            expected = options['sockets'] * options['events']
+            if delivered + dropped != expected:
+                raise CommandError(f"Only {delivered + dropped} of {expected} notifications arrived")
+            self.stdout.write(
+                f"{window:>8}{frames:>10}{delivered:>12}{dropped:>10}{elapsed:>10.2f}{delivered / elapsed:>12.0f}"
+            )
+
+    async def run(self, sockets, events, timeout):
+        communicators = []
+        for i in range(sockets):
+            user = User(id=LOADTEST_USER_BASE + i, username=f'loadtest-{i}')
+            communicator = ApplicationCommunicator(NotificationConsumer.as_asgi(), {
+                'type': 'websocket', 'path': '/ws/notifications/', 'headers': [], 'subprotocols': [], 'user': user,
+            })
+            await communicator.send_input({'type': 'websocket.connect'})
+            if (await communicator.receive_output(timeout))['type'] != 'websocket.accept':
+                raise CommandError('Notification socket refused the connection')
+            communicators.append(communicator)
+
+        recipient_ids = [communicator.scope['user'].id for communicator in communicators]
+        started = time.perf_counter()
+        for n in range(events):
+            await push_to_users(recipient_ids, {
+                'type': 'notification_message',
+                'title': f'Load test {n}',
+                'message': 'Load test notification',
+                'notification_type': 'general',
+                'created_at': timezone.now().isoformat(),
+            })
+
+        results = await asyncio.gather(*[self.drain(communicator, events, timeout) for communicator in communicators])
+        elapsed = time.perf_counter() - started
+        for communicator in communicators:
+            await communicator.send_input({'type': 'websocket.disconnect', 'code': 1000})
+            await communicator.wait(timeout)
+        frames = sum(result[0] for result in results)
+        delivered = sum(result[1] for result in results)
+        dropped = sum(result[2] for result in results)
+        return frames, delivered, dropped, elapsed
+
+    async def drain(self, communicator, events, timeout):
+        frames = delivered = dropped = 0
+        deadline = time.monotonic() + timeout
+        while delivered + dropped < events and time.monotonic() < deadline:
+            try:
+                message = await communicator.receive_output(max(deadline - time.monotonic(), 0.01))
+            except asyncio.TimeoutError:
+                break
+            frame = json.loads(message['text'])
+            frames += 1
+            if frame['type'] == 'notification':
+                delivered += 1
+            else:
+                delivered += len(frame['notifications'])
+                dropped += frame['dropped']
+        return frames, delivered, dropped
@@ -0,0 +1,49 @@
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+
+from school import models, services
+
+
+class Command(BaseCommand):
+    help = "Render the QR code of every active student into storage ahead of the first page view"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=None, help='rendering processes (default: all CPUs)')
+        parser.add_argument('--prune', action='store_true', help='delete stored QR images no student uses any more')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        students = models.StudentExtra.objects.filter(status=True).select_related('user')
+        payloads = {services.qr_digest(payload): payload
+                    for payload in (services.student_qr_payload(student) for student in students.iterator())}
+
+        try:
+            stored = {name[:-len('.png')] for name in default_storage.listdir('qr')[1]}
+        except FileNotFoundError:
+            stored = set()
+        missing = [digest for digest in payloads if digest not in stored]
+
+        # Rendering is pure CPU work, storage writes stay in this process
+        with ProcessPoolExecutor(max_workers=options['workers']) as executor:
+            images = executor.map(services.render_qr_png, [payloads[digest] for digest in missing], chunksize=50)
+            for digest, png in zip(missing, images):
+                services.store_qr_code(digest, png)
+        cache.set_many({services.QR_CACHE_PREFIX + digest: True for digest in payloads}, None)
+
+        pruned = 0
+        if options['prune']:
+            unused = stored - set(payloads)
+            for digest in unused:
+                default_storage.delete(services.qr_storage_name(digest))
+            cache.delete_many([services.QR_CACHE_PREFIX + digest for digest in unused])
+            pruned = len(unused)
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(payloads)} students: {len(missing)} QR codes rendered, {len(payloads) - len(missing)} already "
+            f"stored, {pruned} pruned in {elapsed:.1f}s"
+        ))
@@ -0,0 +1,24 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from school import search
+
+
+class Command(BaseCommand):
+    help = "Regenerate the full-text search documents of every searchable object"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--entity', action='append', choices=list(search.SEARCH_ENTITIES),
+            help='only rebuild this entity type (can be repeated)',
+        )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        with transaction.atomic():
+            counts = search.rebuild_index(options['entity'])
+        for entity_type, count in counts.items():
+            self.stdout.write(f"{entity_type:<12}{count:>8} documents")
+        self.stdout.write(self.style.SUCCESS(f"Search index rebuilt in {time.perf_counter() - started:.1f}s"))
@@ -0,0 +1,61 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:24
+
+from django.db import migrations, models
+from django.db.models import Count, Max
+
+
+def remove_duplicate_attendance(apps, schema_editor):
+    # Old take-attendance code could leave several rows for the same student and
+    # day; keep the most recently written one so the unique constraint applies.
+    Attendance = apps.get_model("school", "Attendance")
+    StudentExtra = apps.get_model("school", "StudentExtra")
+    duplicates = list(
+        Attendance.objects.values("cl", "date", "roll")
+        .annotate(keep_id=Max("id"), rows=Count("id"))
+        .filter(rows__gt=1)
+    )
+    # Rows of students who share a roll aren't duplicates: stop rather than
+    # delete their attendance and let the rolls be fixed first
+    shared = {
+        (row["cl"], row["roll"])
+        for row in StudentExtra.objects.values("cl", "roll").annotate(students=Count("id")).filter(students__gt=1)
+    }
+    ambiguous = sorted({(row["cl"], row["roll"]) for row in duplicates if (row["cl"], row["roll"]) in shared})
+    if ambiguous:
+        raise RuntimeError(
+            "Several students share a roll in the same class, so their attendance rows can't be "
+            "deduplicated safely: "
+            + ", ".join(f"class {cl} roll {roll}" for cl, roll in ambiguous)
+            + ". Give each of these students a unique roll and run migrate again."
+        )
+    for duplicate in duplicates:
+        Attendance.objects.filter(
+            cl=duplicate["cl"], date=duplicate["date"], roll=duplicate["roll"]
+        ).exclude(id=duplicate["keep_id"]).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("school", "0013_auditlog_created_at_default"),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_attendance, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name="attendance",
+            index=models.Index(
+                fields=["cl", "roll", "date"], name="attendance_cl_roll_date_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="attendance",
+            index=models.Index(fields=["date"], name="attendance_date_idx"),
+        ),
+        migrations.AddConstraint(
+            model_name="attendance",
+            constraint=models.UniqueConstraint(
+                fields=("cl", "date", "roll"), name="unique_attendance_per_day"
+            ),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:31
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("school", "0015_reportjob"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="attendance",
+            name="attendance_date_idx",
+        ),
+        migrations.AddIndex(
+            model_name="attendance",
+            index=models.Index(fields=["date", "id"], name="attendance_date_id_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="auditlog",
+            index=models.Index(
+                fields=["-created_at", "-id"], name="auditlog_created_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="notification",
+            index=models.Index(
+                fields=["recipient", "-created_at", "-id"],
+                name="notification_inbox_idx",
+            ),
+        ),
+    ]
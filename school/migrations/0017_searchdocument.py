@@ -0,0 +1,118 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:34
+
+from django.db import migrations, models
+
+POSTGRES_INDEX_SQL = [
+    """
+    ALTER TABLE school_searchdocument ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('simple', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('simple', coalesce(body, '')), 'B')
+    ) STORED
+    """,
+    "CREATE INDEX school_searchdocument_vector_idx ON school_searchdocument USING GIN (search_vector)",
+]
+POSTGRES_DROP_SQL = [
+    "DROP INDEX IF EXISTS school_searchdocument_vector_idx",
+    "ALTER TABLE school_searchdocument DROP COLUMN IF EXISTS search_vector",
+]
+
+SQLITE_INDEX_SQL = [
+    """
+    CREATE VIRTUAL TABLE school_searchdocument_fts USING fts5(
+        title, body, content='school_searchdocument', content_rowid='id', tokenize='unicode61'
+    )
+    """,
+    """
+    CREATE TRIGGER school_searchdocument_ai AFTER INSERT ON school_searchdocument BEGIN
+        INSERT INTO school_searchdocument_fts(rowid, title, body) VALUES (new.id, new.title, new.body);
+    END
+    """,
+    """
+    CREATE TRIGGER school_searchdocument_ad AFTER DELETE ON school_searchdocument BEGIN
+        INSERT INTO school_searchdocument_fts(school_searchdocument_fts, rowid, title, body) VALUES ('delete', old.id, old.title, old.body);
+    END
+    """,
+    """
+    CREATE TRIGGER school_searchdocument_au AFTER UPDATE ON school_searchdocument BEGIN
+        INSERT INTO school_searchdocument_fts(school_searchdocument_fts, rowid, title, body) VALUES ('delete', old.id, old.title, old.body);
+        INSERT INTO school_searchdocument_fts(rowid, title, body) VALUES (new.id, new.title, new.body);
+    END
+    """,
+    "INSERT INTO school_searchdocument_fts(school_searchdocument_fts) VALUES ('rebuild')",
+]
+SQLITE_DROP_SQL = [
+    "DROP TRIGGER IF EXISTS school_searchdocument_ai",
+    "DROP TRIGGER IF EXISTS school_searchdocument_ad",
+    "DROP TRIGGER IF EXISTS school_searchdocument_au",
+    "DROP TABLE IF EXISTS school_searchdocument_fts",
+]
+
+
+def create_fulltext_index(apps, schema_editor):
+    # Vendor specific; other backends search the plain table (see school.search)
+    vendor = schema_editor.connection.vendor
+    statements = {"postgresql": POSTGRES_INDEX_SQL, "sqlite": SQLITE_INDEX_SQL}.get(
+        vendor, []
+    )
+    for sql in statements:
+        schema_editor.execute(sql)
+
+
+def drop_fulltext_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    statements = {"postgresql": POSTGRES_DROP_SQL, "sqlite": SQLITE_DROP_SQL}.get(
+        vendor, []
+    )
+    for sql in statements:
+        schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("school", "0016_keyset_pagination_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SearchDocument",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "entity_type",
+                    models.CharField(
+                        choices=[
+                            ("student", "Student"),
+                            ("teacher", "Teacher"),
+                            ("assignment", "Assignment"),
+                            ("exam", "Exam"),
+                            ("book", "Library Book"),
+                            ("event", "Event"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                ("object_id", models.PositiveIntegerField()),
+                ("title", models.CharField(max_length=255)),
+                ("body", models.TextField(blank=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("entity_type", "object_id"),
+                        name="unique_search_document",
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(create_fulltext_index, drop_fulltext_index),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("school", "0017_searchdocument"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="attendance",
+            name="recorded_at",
+            field=models.DateTimeField(auto_now=True, db_index=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="examresult",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True, db_index=True, null=True),
+        ),
+    ]
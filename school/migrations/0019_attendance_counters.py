@@ -0,0 +1,100 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:52
+
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+
+def populate_counters(apps, schema_editor):
+    Attendance = apps.get_model("school", "Attendance")
+    AttendanceDailyCount = apps.get_model("school", "AttendanceDailyCount")
+    StudentAttendanceCount = apps.get_model("school", "StudentAttendanceCount")
+    present = Count("id", filter=Q(present_status="Present"))
+    absent = Count("id", filter=~Q(present_status="Present"))
+    AttendanceDailyCount.objects.bulk_create(
+        [
+            AttendanceDailyCount(
+                cl=cl, date=date, present_count=present_count, absent_count=absent_count
+            )
+            for cl, date, present_count, absent_count in Attendance.objects.values_list(
+                "cl", "date"
+            )
+            .annotate(present=present, absent=absent)
+            .order_by()
+        ],
+        batch_size=1000,
+    )
+    StudentAttendanceCount.objects.bulk_create(
+        [
+            StudentAttendanceCount(
+                cl=cl, roll=roll, present_count=present_count, absent_count=absent_count
+            )
+            for cl, roll, present_count, absent_count in Attendance.objects.exclude(
+                roll__isnull=True
+            )
+            .values_list("cl", "roll")
+            .annotate(present=present, absent=absent)
+            .order_by()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("school", "0018_change_tracking"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="AttendanceDailyCount",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("cl", models.CharField(max_length=10)),
+                ("date", models.DateField()),
+                ("present_count", models.PositiveIntegerField(default=0)),
+                ("absent_count", models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("cl", "date"), name="unique_attendance_daily_count"
+                    )
+                ],
+            },
+        ),
+        migrations.CreateModel(
+            name="StudentAttendanceCount",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("cl", models.CharField(max_length=10)),
+                ("roll", models.CharField(max_length=10, null=True)),
+                ("present_count", models.PositiveIntegerField(default=0)),
+                ("absent_count", models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("cl", "roll"), name="unique_student_attendance_count"
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(populate_counters, migrations.RunPython.noop),
+    ]
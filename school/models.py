@@ -1,4 +1,5 @@
 from django.db import models
+from django.utils import timezone
 from django.contrib.auth.models import User
 # Create your models here.
 
@@ -46,6 +47,48 @@ class Attendance(models.Model):
     date=models.DateField()
     cl=models.CharField(max_length=10)
     present_status = models.CharField(max_length=10)
+    # lets the performance engine recompute only students whose attendance changed
+    recorded_at = models.DateTimeField(auto_now=True, null=True, db_index=True)
+
+    class Meta:
+        # The unique (cl, date, roll) index also serves every cl+date and cl+date-range
+        # lookup (day views, CSV exports, reports, statistics)
+        constraints = [
+            models.UniqueConstraint(fields=['cl', 'date', 'roll'], name='unique_attendance_per_day'),
+        ]
+        indexes = [
+            # per-student history: performance, student dashboard stats
+            models.Index(fields=['cl', 'roll', 'date'], name='attendance_cl_roll_date_idx'),
+            # date filters without a class (API filter, school-wide statistics) and the
+            # (-date, -id) keyset the API pages on
+            models.Index(fields=['date', 'id'], name='attendance_date_id_idx'),
+        ]
+
+
+class AttendanceDailyCount(models.Model):
+    """Present/absent totals of one class on one day, maintained by school.counters"""
+    cl = models.CharField(max_length=10)
+    date = models.DateField()
+    present_count = models.PositiveIntegerField(default=0)
+    absent_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['cl', 'date'], name='unique_attendance_daily_count'),
+        ]
+
+
+class StudentAttendanceCount(models.Model):
+    """All-time present/absent totals of one student (class + roll), maintained by school.counters"""
+    cl = models.CharField(max_length=10)
+    roll = models.CharField(max_length=10, null=True)
+    present_count = models.PositiveIntegerField(default=0)
+    absent_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['cl', 'roll'], name='unique_student_attendance_count'),
+        ]
 
 
 
@@ -60,13 +103,38 @@ class AuditLog(models.Model):
     path = models.CharField(max_length=255)
     method = models.CharField(max_length=10)
     status_code = models.PositiveIntegerField()
-    created_at = models.DateTimeField(auto_now_add=True)
+    # Set by the middleware at request time, rows are inserted later in batches
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='auditlog_created_idx'),
+        ]
 
     def __str__(self):
         username = self.user.username if self.user else 'anon'
         return f"{self.method} {self.path} [{self.status_code}] by {username}"
 
 
+class ChatMessage(models.Model):
+    """One chat room message; rows are appended in batches by school.chat"""
+    room = models.CharField(max_length=100)
+    # Assigned by the server, increases by one per message within a room
+    seq = models.PositiveBigIntegerField()
+    user = models.ForeignKey(User, null=True, blank=True, on_delete=models.SET_NULL)
+    username = models.CharField(max_length=150)
+    message = models.TextField()
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['room', 'seq'], name='unique_chat_message_seq'),
+        ]
+
+    def __str__(self):
+        return f"{self.room} #{self.seq} by {self.username}"
+
+
 # Advanced Features Models
 
 class Subject(models.Model):
@@ -124,6 +192,12 @@ class Notification(models.Model):
     is_read = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
     expires_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # a user's inbox in keyset order (API pagination, unread counts)
+            models.Index(fields=['recipient', '-created_at', '-id'], name='notification_inbox_idx'),
+        ]
     
     def __str__(self):
         return f"{self.title} - {self.recipient.username}"
@@ -159,6 +233,7 @@ class ExamResult(models.Model):
     grade = models.CharField(max_length=2, blank=True)
     remarks = models.TextField(blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True, null=True, db_index=True)
     
     def save(self, *args, **kwargs):
         # Auto-calculate grade based on marks
@@ -283,3 +358,56 @@ class SystemSettings(models.Model):
     
     def __str__(self):
         return f"{self.key}: {self.value}"
+
+
+class ReportJob(models.Model):
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ]
+    
+    requested_by = models.ForeignKey(User, on_delete=models.CASCADE)
+    report_type = models.CharField(max_length=20)
+    class_name = models.CharField(max_length=10, blank=True)
+    date_from = models.DateField(null=True, blank=True)
+    date_to = models.DateField(null=True, blank=True)
+    format = models.CharField(max_length=10)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    file = models.FileField(upload_to='reports/', blank=True)
+    # Hash of the request parameters and the state of the underlying data,
+    # jobs with the same fingerprint can share one generated file
+    fingerprint = models.CharField(max_length=64, blank=True, db_index=True)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+    
+    def __str__(self):
+        return f"{self.report_type} report #{self.id} ({self.status})"
+
+
+class SearchDocument(models.Model):
+    """Denormalised, full-text indexed text of a searchable object (see school.search)"""
+    ENTITY_TYPES = [
+        ('student', 'Student'),
+        ('teacher', 'Teacher'),
+        ('assignment', 'Assignment'),
+        ('exam', 'Exam'),
+        ('book', 'Library Book'),
+        ('event', 'Event'),
+    ]
+    
+    entity_type = models.CharField(max_length=20, choices=ENTITY_TYPES)
+    object_id = models.PositiveIntegerField()
+    title = models.CharField(max_length=255)
+    body = models.TextField(blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['entity_type', 'object_id'], name='unique_search_document'),
+        ]
+    
+    def __str__(self):
+        return f"{self.entity_type} #{self.object_id}: {self.title}"
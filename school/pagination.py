@@ -0,0 +1,169 @@
+"""Keyset pagination for the large API tables.
+
+``KeysetCursorPagination`` pages with an opaque cursor that holds every
+column of an indexed ``(<timestamp>, id)`` ordering, and seeks past it with
+``(a, b) < (x, y)``-style filters instead of COUNT(*) + OFFSET. Rows that
+share a timestamp are paged on the id, so every page costs the same no
+matter how deep the client is. The total is only counted when the client
+asks for it with ``?with_count=1``.
+
+Clients of append-only tables (notifications, audit logs) that sync
+incrementally pass ``?since=<id>`` (0 for the first call) and get the rows
+created after that id in insertion order, plus the ``next_since`` value to
+send next time. Attendance doesn't offer ``since``: taking attendance again
+deletes and re-inserts the day's rows, which an id watermark never reports.
+"""
+import json
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db.models import Q
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import Cursor, CursorPagination
+from rest_framework.response import Response
+
+TRUE_VALUES = ('1', 'true', 'yes')
+
+
+class KeysetCursorPagination(CursorPagination):
+    ordering = ('-created_at', '-id')
+    page_size = getattr(settings, 'API_CURSOR_PAGE_SIZE', 50)
+    page_size_query_param = 'page_size'
+    max_page_size = getattr(settings, 'API_CURSOR_MAX_PAGE_SIZE', 500)
+    count_query_param = 'with_count'
+    since_query_param = 'since'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.count = None
+        self.since = None
+        with_count = request.query_params.get(self.count_query_param, '').lower() in TRUE_VALUES
+
+        since = request.query_params.get(self.since_query_param) if self.since_query_param else None
+        if since is not None:
+            try:
+                since = int(since)
+            except ValueError:
+                raise ValidationError({self.since_query_param: 'A whole number is required.'})
+            queryset = queryset.filter(id__gt=since)
+        if with_count:
+            self.count = queryset.count()
+        if since is not None:
+            return self.paginate_since(queryset, request, since)
+
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.cursor = self.decode_cursor(request)
+        reverse = self.cursor is not None and self.cursor.reverse
+        ordering = [self.flip(field) for field in self.ordering] if reverse else list(self.ordering)
+
+        queryset = queryset.order_by(*ordering)
+        if self.cursor is not None:
+            queryset = queryset.filter(self.seek(ordering, self.cursor.position))
+        rows = list(queryset[:self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        self.page = rows[:self.page_size]
+        if reverse:
+            # Fetched backwards from the cursor: the rows after it exist
+            self.page.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, self.cursor is not None
+        if self.template is not None and (self.has_next or self.has_previous):
+            self.display_page_controls = True
+        return self.page
+
+    def paginate_since(self, queryset, request, since):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        rows = list(queryset.order_by('id')[:self.page_size + 1])
+        self.has_more = len(rows) > self.page_size
+        self.page = rows[:self.page_size]
+        self.since = self.page[-1].id if self.page else since
+        return self.page
+
+    def get_ordering(self, request, queryset, view):
+        # A unique tiebreaker keeps the cursor stable when the client orders by a non-unique field
+        ordering = tuple(super().get_ordering(request, queryset, view))
+        if not any(field.lstrip('-') in ('id', 'pk') for field in ordering):
+            ordering += ('-id' if ordering[0].startswith('-') else 'id',)
+        return ordering
+
+    @staticmethod
+    def flip(field):
+        return field[1:] if field.startswith('-') else f'-{field}'
+
+    @staticmethod
+    def seek(ordering, position):
+        """Rows after ``position`` in ``ordering``, compared column by column"""
+        after = Q()
+        equal = Q()
+        for field, value in zip(ordering, position):
+            name = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            after |= equal & Q(**{f'{name}__{lookup}': value})
+            equal &= Q(**{name: value})
+        return after
+
+    def position_of(self, instance):
+        values = []
+        for field in self.ordering:
+            name = field.lstrip('-')
+            value = instance[name] if isinstance(instance, dict) else getattr(instance, name)
+            values.append(value.isoformat() if hasattr(value, 'isoformat') else value)
+        return json.dumps(values)
+
+    def decode_cursor(self, request):
+        cursor = super().decode_cursor(request)
+        if cursor is None:
+            return None
+        try:
+            position = json.loads(cursor.position)
+        except (TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(position, list) or len(position) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        return Cursor(offset=0, reverse=cursor.reverse, position=position)
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(Cursor(offset=0, reverse=False, position=self.position_of(self.page[-1])))
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor(Cursor(offset=0, reverse=True, position=self.position_of(self.page[0])))
+
+    def get_paginated_response(self, data):
+        if self.since is not None:
+            body = [
+                ('next_since', self.since),
+                ('has_more', self.has_more),
+                ('results', data),
+            ]
+        else:
+            body = [
+                ('next', self.get_next_link()),
+                ('previous', self.get_previous_link()),
+                ('results', data),
+            ]
+        if self.count is not None:
+            body.insert(0, ('count', self.count))
+        return Response(OrderedDict(body))
+
+    def get_paginated_response_schema(self, schema):
+        response_schema = super().get_paginated_response_schema(schema)
+        response_schema['properties']['count'] = {'type': 'integer', 'example': 123}
+        response_schema['properties']['next_since'] = {'type': 'integer', 'nullable': True}
+        response_schema['properties']['has_more'] = {'type': 'boolean'}
+        return response_schema
+
+
+class AttendanceCursorPagination(KeysetCursorPagination):
+    ordering = ('-date', '-id')
+    # Re-taking attendance replaces rows, which an id watermark would miss
+    since_query_param = None
@@ -0,0 +1,85 @@
+"""Cached role resolution behind is_admin / is_teacher / is_student.
+
+A user's groups, TeacherExtra/StudentExtra ids and the student's class are
+loaded with one query,
+kept in the default cache for ``ROLE_CACHE_TIMEOUT`` seconds and memoised on
+the user object, which Django shares for the whole request. The signal
+handlers in ``school.signals`` drop the cached entry whenever group
+membership or a profile changes.
+"""
+import logging
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+
+logger = logging.getLogger('school')
+
+MEMO_ATTRIBUTE = '_school_role'
+NO_ROLE = {
+    'groups': [],
+    'teacher_id': None,
+    'student_id': None,
+    'student_class': None,
+}
+
+
+def role_cache_key(user_id):
+    return f'school:role:{user_id}'
+
+
+def load_role(user_id):
+    rows = User.objects.filter(id=user_id).values_list(
+        'groups__name', 'teacherextra__id', 'studentextra__id', 'studentextra__cl'
+    )
+    info = dict(NO_ROLE, groups=[])
+    for group_name, teacher_id, student_id, student_class in rows:
+        if group_name and group_name not in info['groups']:
+            info['groups'].append(group_name)
+        info.update(teacher_id=teacher_id, student_id=student_id, student_class=student_class)
+    return info
+
+
+def get_role(user):
+    """Groups, profile ids and student class of ``user``, at most one query per request"""
+    if not user.is_authenticated:
+        return NO_ROLE
+    info = getattr(user, MEMO_ATTRIBUTE, None)
+    if info is not None:
+        return info
+
+    key = role_cache_key(user.id)
+    try:
+        info = cache.get(key)
+    except Exception as e:
+        logger.error(f"Error reading role cache: {str(e)}")
+    if info is None:
+        info = load_role(user.id)
+        try:
+            cache.set(key, info, getattr(settings, 'ROLE_CACHE_TIMEOUT', 300))
+        except Exception as e:
+            logger.error(f"Error writing role cache: {str(e)}")
+
+    setattr(user, MEMO_ATTRIBUTE, info)
+    return info
+
+
+def invalidate_role(*user_ids):
+    try:
+        cache.delete_many([role_cache_key(user_id) for user_id in user_ids])
+    except Exception as e:
+        logger.error(f"Error invalidating role cache: {str(e)}")
+
+
+def is_admin(user):
+    return 'ADMIN' in get_role(user)['groups']
+
+
+def is_teacher(user):
+    info = get_role(user)
+    return 'TEACHER' in info['groups'] or info['teacher_id'] is not None
+
+
+def is_student(user):
+    info = get_role(user)
+    return 'STUDENT' in info['groups'] or info['student_id'] is not None
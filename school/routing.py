@@ -4,5 +4,6 @@ from . import consumers
 websocket_urlpatterns = [
     re_path(r'ws/notifications/$', consumers.NotificationConsumer.as_asgi()),
     re_path(r'ws/attendance/$', consumers.AttendanceConsumer.as_asgi()),
-    re_path(r'ws/chat/(?P<room_name>\w+)/$', consumers.ChatConsumer.as_asgi()),
+    # Room names fit ChatMessage.room and, prefixed, a channel layer group name
+    re_path(r'ws/chat/(?P<room_name>\w{1,64})/$', consumers.ChatConsumer.as_asgi()),
 ]
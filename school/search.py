@@ -0,0 +1,276 @@
+"""Full-text search over students, teachers, assignments, exams, books and events.
+
+Each searchable object has one ``SearchDocument`` row holding its
+denormalised text (a student's name, username, roll and class; an exam's
+name, subject and instructions, ...). The signal handlers in
+``school.signals`` keep the rows in sync and ``rebuild_search_index``
+regenerates them in bulk.
+
+The text is indexed by the database:
+
+- PostgreSQL: a generated, weighted ``tsvector`` column with a GIN index,
+  ranked with ``ts_rank``
+- SQLite: an FTS5 external-content table kept up to date by triggers,
+  ranked with ``bm25``
+- anything else: ``icontains`` over the single document table
+
+Callers only deal with object ids in rank order: ``rank_queryset`` narrows
+an entity queryset to the matches and orders it by relevance. The queryset
+it is given (already filtered by class, status, dates, ...) bounds the
+search, so ``SEARCH_RESULT_LIMIT`` applies to the filtered matches.
+"""
+import logging
+import re
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Case, F, Func, IntegerField, Q, Value, When
+
+from . import models
+
+logger = logging.getLogger('school')
+
+# Created by migration 0017 on SQLite
+FTS_TABLE = 'school_searchdocument_fts'
+
+
+# Documents
+
+def _text(*parts):
+    return ' '.join(str(part) for part in parts if part)
+
+
+def student_document(student):
+    user = student.user
+    return _text(user.first_name, user.last_name), _text(user.username, student.roll, student.cl, student.mobile)
+
+
+def teacher_document(teacher):
+    user = teacher.user
+    return _text(user.first_name, user.last_name), _text(user.username, teacher.mobile)
+
+
+def assignment_document(assignment):
+    return assignment.title, _text(assignment.subject.name, assignment.subject.code, assignment.class_name,
+                                   assignment.description)
+
+
+def exam_document(exam):
+    return exam.name, _text(exam.subject.name, exam.subject.code, exam.exam_type, exam.class_name,
+                            exam.instructions)
+
+
+def book_document(book):
+    return book.title, _text(book.author, book.isbn, book.category, book.publisher)
+
+
+def event_document(event):
+    return event.title, _text(event.event_type, event.location, event.description)
+
+
+# entity type -> (model, related objects the document reads, document builder)
+SEARCH_ENTITIES = {
+    'student': (models.StudentExtra, ['user'], student_document),
+    'teacher': (models.TeacherExtra, ['user'], teacher_document),
+    'assignment': (models.Assignment, ['subject'], assignment_document),
+    'exam': (models.Exam, ['subject'], exam_document),
+    'book': (models.LibraryBook, [], book_document),
+    'event': (models.SchoolEvent, [], event_document),
+}
+
+
+def entity_for_model(model):
+    for entity_type, (entity_model, _, _) in SEARCH_ENTITIES.items():
+        if entity_model is model:
+            return entity_type
+    return None
+
+
+def build_document(entity_type, instance):
+    _, _, builder = SEARCH_ENTITIES[entity_type]
+    title, body = builder(instance)
+    return models.SearchDocument(entity_type=entity_type, object_id=instance.pk, title=title[:255], body=body)
+
+
+def index_object(instance):
+    """Create or refresh the search document of one object"""
+    entity_type = entity_for_model(type(instance))
+    if entity_type is None:
+        return
+    document = build_document(entity_type, instance)
+    models.SearchDocument.objects.update_or_create(
+        entity_type=entity_type,
+        object_id=instance.pk,
+        defaults={'title': document.title, 'body': document.body},
+    )
+
+
+def index_objects(entity_type, queryset, batch_size=1000):
+    """Replace the documents of every object in ``queryset``; returns the number indexed"""
+    _, related, _ = SEARCH_ENTITIES[entity_type]
+    queryset = queryset.select_related(*related).order_by('pk')
+    indexed = 0
+    batch = []
+    for instance in queryset.iterator(chunk_size=batch_size):
+        batch.append(build_document(entity_type, instance))
+        if len(batch) >= batch_size:
+            indexed += _replace_documents(entity_type, batch)
+            batch = []
+    if batch:
+        indexed += _replace_documents(entity_type, batch)
+    return indexed
+
+
+def _replace_documents(entity_type, documents):
+    models.SearchDocument.objects.filter(
+        entity_type=entity_type,
+        object_id__in=[document.object_id for document in documents],
+    ).delete()
+    models.SearchDocument.objects.bulk_create(documents)
+    return len(documents)
+
+
+def remove_object(instance):
+    entity_type = entity_for_model(type(instance))
+    if entity_type is not None:
+        models.SearchDocument.objects.filter(entity_type=entity_type, object_id=instance.pk).delete()
+
+
+def rebuild_index(entity_types=None):
+    """Regenerate all documents; returns {entity type: documents written}"""
+    counts = {}
+    for entity_type in entity_types or SEARCH_ENTITIES:
+        model, _, _ = SEARCH_ENTITIES[entity_type]
+        models.SearchDocument.objects.filter(entity_type=entity_type).delete()
+        counts[entity_type] = index_objects(entity_type, model.objects.all())
+    if connection.vendor == 'sqlite' and has_fts5():
+        with connection.cursor() as cursor:
+            cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('optimize')")
+    return counts
+
+
+# Queries
+
+def search_terms(query):
+    return re.findall(r'\w+', query or '')[:10]
+
+
+_fts5_available = None
+
+
+def has_fts5():
+    global _fts5_available
+    if _fts5_available is None:
+        _fts5_available = FTS_TABLE in connection.introspection.table_names()
+    return _fts5_available
+
+
+def search_ids(entity_type, query, limit=None, within=None):
+    """Ids of ``entity_type`` objects matching ``query``, best match first.
+
+    ``within`` is an optional queryset of the candidate objects; the limit
+    applies after it, so filters never hide matches ranked below the cut.
+    """
+    terms = search_terms(query)
+    if not terms:
+        return []
+    limit = limit or getattr(settings, 'SEARCH_RESULT_LIMIT', 500)
+    if within is not None and within.query.is_empty():
+        return []
+    candidates = within.order_by().values('pk') if within is not None else None
+    try:
+        if connection.vendor == 'postgresql':
+            return _postgres_search(entity_type, terms, limit, candidates)
+        if connection.vendor == 'sqlite' and has_fts5():
+            return _sqlite_search(entity_type, terms, limit, candidates)
+    except Exception as e:
+        logger.error(f"Full-text search failed, falling back to a scan: {str(e)}")
+    return _fallback_search(entity_type, terms, limit, candidates)
+
+
+def _candidate_sql(column, candidates):
+    if candidates is None:
+        return '', []
+    sql, params = candidates.query.sql_with_params()
+    return f'AND {column} IN ({sql})', list(params)
+
+
+def _postgres_search(entity_type, terms, limit, candidates):
+    # Every term must match, each as a prefix so partial names still find people
+    tsquery = ' & '.join(f"{term}:*" for term in terms)
+    within, within_params = _candidate_sql('object_id', candidates)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            SELECT object_id FROM school_searchdocument, to_tsquery('simple', %s) query
+            WHERE entity_type = %s AND search_vector @@ query {within}
+            ORDER BY ts_rank(search_vector, query) DESC, object_id
+            LIMIT %s
+            """,
+            [tsquery, entity_type, *within_params, limit],
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+
+def _sqlite_search(entity_type, terms, limit, candidates):
+    match = ' '.join(f'"{term}"*' for term in terms)
+    within, within_params = _candidate_sql('document.object_id', candidates)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            SELECT document.object_id FROM {FTS_TABLE}
+            JOIN school_searchdocument document ON document.id = {FTS_TABLE}.rowid
+            WHERE {FTS_TABLE} MATCH %s AND document.entity_type = %s {within}
+            ORDER BY bm25({FTS_TABLE}, 10.0, 1.0), document.object_id
+            LIMIT %s
+            """,
+            [match, entity_type, *within_params, limit],
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+
+def _fallback_search(entity_type, terms, limit, candidates):
+    documents = models.SearchDocument.objects.filter(entity_type=entity_type)
+    if candidates is not None:
+        documents = documents.filter(object_id__in=candidates)
+    for term in terms:
+        documents = documents.filter(Q(title__icontains=term) | Q(body__icontains=term))
+    return list(documents.order_by('object_id').values_list('object_id', flat=True)[:limit])
+
+
+class RankPosition(Func):
+    """Where a row's pk sits in the ranked id list, as one lookup per row.
+
+    PostgreSQL looks the pk up in an int array, SQLite in a comma-delimited
+    string (the offset grows with the rank); other databases get a CASE.
+    """
+    output_field = IntegerField()
+
+    def __init__(self, ids):
+        super().__init__(F('pk'))
+        self.ids = list(ids)
+
+    def as_sql(self, compiler, connection, **extra_context):
+        pk_sql, pk_params = compiler.compile(self.source_expressions[0])
+        if connection.vendor == 'postgresql':
+            return f'array_position(%s::bigint[], {pk_sql})', [self.ids, *pk_params]
+        if connection.vendor == 'sqlite':
+            delimited = ',' + ','.join(str(object_id) for object_id in self.ids) + ','
+            return f"instr(%s, ',' || {pk_sql} || ',')", [delimited, *pk_params]
+        rank = Case(
+            *[When(pk=object_id, then=Value(position)) for position, object_id in enumerate(self.ids)],
+            output_field=IntegerField(),
+        )
+        return compiler.compile(rank.resolve_expression(compiler.query))
+
+
+def rank_queryset(queryset, entity_type, query):
+    """Narrow ``queryset`` to the objects matching ``query``, ordered by relevance.
+
+    Apply the other filters first: the search runs within ``queryset``. The
+    result is annotated with ``search_rank`` (lower is a better match).
+    """
+    ids = search_ids(entity_type, query, within=queryset)
+    if not ids:
+        return queryset.none()
+    return queryset.filter(pk__in=ids).annotate(search_rank=RankPosition(ids)).order_by('search_rank')
@@ -3,13 +3,102 @@ from django.contrib.auth.models import User
 from . import models
 
 
-class UserSerializer(serializers.ModelSerializer):
+def related_lookups(serializer, prefix=''):
+    """select_related / prefetch_related lookups needed to render ``serializer``.
+
+    Walks the nested serializers of a serializer instance: a nested single object
+    becomes a select_related path, a nested ``many=True`` one a prefetch path
+    (with everything below it following the prefetch).
+    """
+    select_related, prefetch_related = [], []
+    for field in serializer.fields.values():
+        many = isinstance(field, serializers.ListSerializer)
+        child = field.child if many else field
+        if not isinstance(child, serializers.BaseSerializer) or field.source == '*':
+            continue
+        path = prefix + field.source.replace('.', '__')
+        child_select, child_prefetch = related_lookups(child, path + '__')
+        if many:
+            prefetch_related += [path] + child_select + child_prefetch
+        else:
+            select_related += [path] + child_select
+            prefetch_related += child_prefetch
+    return select_related, prefetch_related
+
+
+def optimize_queryset(queryset, serializer):
+    """Join or prefetch every relation ``serializer`` will render"""
+    select_related, prefetch_related = related_lookups(serializer)
+    if select_related:
+        queryset = queryset.select_related(*select_related)
+    if prefetch_related:
+        queryset = queryset.prefetch_related(*prefetch_related)
+    return queryset
+
+
+def split_paths(paths):
+    """Split ``['exam', 'exam.subject', 'id']`` into top-level names and per-name sub-paths"""
+    names, nested = set(), {}
+    for path in paths:
+        name, _, rest = path.partition('.')
+        names.add(name)
+        if rest:
+            nested.setdefault(name, []).append(rest)
+    return names, nested
+
+
+class DynamicFieldsModelSerializer(serializers.ModelSerializer):
+    """ModelSerializer that can be pruned per request.
+
+    ``fields`` keeps only the listed fields (``exam.name`` selects inside a nested
+    object), ``expand`` lists the nested objects to render in full. Once either is
+    given, nested objects that were not asked for are rendered as primary keys, so
+    their serializers never run and ``related_lookups`` does not join them.
+    With neither the serializer behaves like a plain ModelSerializer.
+    """
+
+    def __init__(self, *args, **kwargs):
+        fields = kwargs.pop('fields', None)
+        expand = kwargs.pop('expand', None)
+        super().__init__(*args, **kwargs)
+        if fields is not None or expand is not None:
+            self.prune(fields, expand or [])
+
+    def prune(self, fields, expand):
+        if fields is not None:
+            requested, nested_fields = split_paths(fields)
+        else:
+            requested, nested_fields = None, {}
+        expanded, nested_expand = split_paths(expand)
+
+        for name in list(self.fields):
+            if requested is not None and name not in requested:
+                del self.fields[name]
+                continue
+            field = self.fields[name]
+            many = isinstance(field, serializers.ListSerializer)
+            child = field.child if many else field
+            if not isinstance(child, serializers.BaseSerializer):
+                continue
+            options = {'many': many, 'read_only': True}
+            if field.source != name:
+                options['source'] = field.source
+            if name in expanded or name in nested_fields:
+                if isinstance(child, DynamicFieldsModelSerializer):
+                    self.fields[name] = type(child)(
+                        fields=nested_fields.get(name), expand=nested_expand.get(name, []), **options
+                    )
+            else:
+                self.fields[name] = serializers.PrimaryKeyRelatedField(**options)
+
+
+class UserSerializer(DynamicFieldsModelSerializer):
     class Meta:
         model = User
         fields = ['id', 'username', 'first_name', 'last_name', 'email']
 
 
-class TeacherExtraSerializer(serializers.ModelSerializer):
+class TeacherExtraSerializer(DynamicFieldsModelSerializer):
     user = UserSerializer(read_only=True)
     
     class Meta:
@@ -17,21 +106,32 @@ class TeacherExtraSerializer(serializers.ModelSerializer):
         fields = ['id', 'user', 'salary', 'joindate', 'mobile', 'status']
 
 
-class StudentExtraSerializer(serializers.ModelSerializer):
+class StudentExtraSerializer(DynamicFieldsModelSerializer):
     user = UserSerializer(read_only=True)
     
     class Meta:
         model = models.StudentExtra
         fields = ['id', 'user', 'roll', 'mobile', 'fee', 'cl', 'status']
 
+    def validate(self, attrs):
+        roll = attrs.get('roll', getattr(self.instance, 'roll', None))
+        cl = attrs.get('cl', getattr(self.instance, 'cl', None))
+        # Attendance is recorded per class and roll, so a roll can't be shared within a class
+        taken = models.StudentExtra.objects.filter(cl=cl, roll=roll)
+        if self.instance is not None:
+            taken = taken.exclude(pk=self.instance.pk)
+        if roll and taken.exists():
+            raise serializers.ValidationError({'roll': f'Roll {roll} is already used in class {cl}.'})
+        return attrs
 
-class SubjectSerializer(serializers.ModelSerializer):
+
+class SubjectSerializer(DynamicFieldsModelSerializer):
     class Meta:
         model = models.Subject
         fields = ['id', 'name', 'code', 'description', 'created_at']
 
 
-class AssignmentSerializer(serializers.ModelSerializer):
+class AssignmentSerializer(DynamicFieldsModelSerializer):
     subject = SubjectSerializer(read_only=True)
     teacher = TeacherExtraSerializer(read_only=True)
     
@@ -41,7 +141,7 @@ class AssignmentSerializer(serializers.ModelSerializer):
                 'due_date', 'max_marks', 'created_at', 'is_active']
 
 
-class AssignmentSubmissionSerializer(serializers.ModelSerializer):
+class AssignmentSubmissionSerializer(DynamicFieldsModelSerializer):
     assignment = AssignmentSerializer(read_only=True)
     student = StudentExtraSerializer(read_only=True)
     
@@ -51,7 +151,7 @@ class AssignmentSubmissionSerializer(serializers.ModelSerializer):
                 'submitted_at', 'marks_obtained', 'feedback', 'is_graded']
 
 
-class NotificationSerializer(serializers.ModelSerializer):
+class NotificationSerializer(DynamicFieldsModelSerializer):
     recipient = UserSerializer(read_only=True)
     
     class Meta:
@@ -60,7 +160,7 @@ class NotificationSerializer(serializers.ModelSerializer):
                 'is_read', 'created_at', 'expires_at']
 
 
-class ExamSerializer(serializers.ModelSerializer):
+class ExamSerializer(DynamicFieldsModelSerializer):
     subject = SubjectSerializer(read_only=True)
     created_by = TeacherExtraSerializer(read_only=True)
     
@@ -70,7 +170,7 @@ class ExamSerializer(serializers.ModelSerializer):
                 'duration_minutes', 'max_marks', 'instructions', 'created_by', 'created_at']
 
 
-class ExamResultSerializer(serializers.ModelSerializer):
+class ExamResultSerializer(DynamicFieldsModelSerializer):
     exam = ExamSerializer(read_only=True)
     student = StudentExtraSerializer(read_only=True)
     
@@ -79,7 +179,7 @@ class ExamResultSerializer(serializers.ModelSerializer):
         fields = ['id', 'exam', 'student', 'marks_obtained', 'grade', 'remarks', 'created_at']
 
 
-class FeePaymentSerializer(serializers.ModelSerializer):
+class FeePaymentSerializer(DynamicFieldsModelSerializer):
     student = StudentExtraSerializer(read_only=True)
     
     class Meta:
@@ -88,14 +188,14 @@ class FeePaymentSerializer(serializers.ModelSerializer):
                 'payment_method', 'transaction_id', 'notes', 'created_at']
 
 
-class LibraryBookSerializer(serializers.ModelSerializer):
+class LibraryBookSerializer(DynamicFieldsModelSerializer):
     class Meta:
         model = models.LibraryBook
         fields = ['id', 'title', 'author', 'isbn', 'category', 'publisher',
                 'publication_year', 'pages', 'status', 'added_date']
 
 
-class BookBorrowingSerializer(serializers.ModelSerializer):
+class BookBorrowingSerializer(DynamicFieldsModelSerializer):
     book = LibraryBookSerializer(read_only=True)
     borrower = UserSerializer(read_only=True)
     
@@ -105,7 +205,7 @@ class BookBorrowingSerializer(serializers.ModelSerializer):
                 'fine_amount', 'is_returned']
 
 
-class SchoolEventSerializer(serializers.ModelSerializer):
+class SchoolEventSerializer(DynamicFieldsModelSerializer):
     organizer = UserSerializer(read_only=True)
     
     class Meta:
@@ -114,7 +214,7 @@ class SchoolEventSerializer(serializers.ModelSerializer):
                 'location', 'organizer', 'is_public', 'created_at']
 
 
-class StudentPerformanceSerializer(serializers.ModelSerializer):
+class StudentPerformanceSerializer(DynamicFieldsModelSerializer):
     student = StudentExtraSerializer(read_only=True)
     subject = SubjectSerializer(read_only=True)
     
@@ -124,13 +224,21 @@ class StudentPerformanceSerializer(serializers.ModelSerializer):
                 'average_marks', 'grade', 'remarks', 'created_at']
 
 
-class AttendanceSerializer(serializers.ModelSerializer):
+class AttendanceSerializer(DynamicFieldsModelSerializer):
     class Meta:
         model = models.Attendance
         fields = ['id', 'roll', 'date', 'cl', 'present_status']
 
 
-class NoticeSerializer(serializers.ModelSerializer):
+class NoticeSerializer(DynamicFieldsModelSerializer):
     class Meta:
         model = models.Notice
         fields = ['id', 'date', 'by', 'message']
+
+
+class AuditLogSerializer(DynamicFieldsModelSerializer):
+    user = UserSerializer(read_only=True)
+
+    class Meta:
+        model = models.AuditLog
+        fields = ['id', 'user', 'path', 'method', 'status_code', 'created_at']
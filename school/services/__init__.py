@@ -0,0 +1,70 @@
+"""Business logic behind the views, the API, the consumers and the Celery tasks.
+
+The helpers live in submodules grouped by what they pull in:
+
+- ``attendance``: taking attendance
+- ``performance``: StudentPerformance computation
+- ``notifications``: e-mail, in-app notifications and WebSocket pushes
+- ``qr``: student QR codes (qrcode)
+- ``reporting``: reports and exports (reportlab, openpyxl)
+- ``importing``: bulk imports (pandas, openpyxl)
+
+``services.<name>`` keeps working for every helper, but a submodule is only
+imported the first time one of its names is used (PEP 562), and the heavy
+libraries only when a function that needs them runs. ``django.setup()`` and
+a fresh worker therefore don't pay for pandas or reportlab until a report or
+an import actually happens. Celery task names are pinned to
+``school.services.<name>`` so queued jobs survive the split; ``school.tasks``
+registers them with the worker.
+"""
+import importlib
+
+_SUBMODULES = {
+    'attendance': [
+        'DuplicateRollError', 'record_attendance',
+    ],
+    'performance': [
+        'PERFORMANCE_LAST_RUN_KEY', 'grade_for', 'current_semester', 'semester_date_range',
+        'compute_performance', 'changed_student_ids', 'refresh_changed_performance',
+        'update_student_performance', 'calculate_student_performance',
+    ],
+    'notifications': [
+        'send_notification_email', 'RECIPIENT_GROUPS', 'resolve_recipients', 'push_to_users', 'send_bulk_notification',
+        'send_attendance_reminder', 'send_assignment_reminder', 'send_fee_reminder',
+        'send_real_time_attendance_update',
+    ],
+    'qr': [
+        'QR_CACHE_PREFIX', 'student_qr_payload', 'qr_digest', 'qr_storage_name', 'render_qr_png',
+        'store_qr_code', 'ensure_qr_codes', 'generate_qr_code_for_student',
+    ],
+    'reporting': [
+        'build_attendance_pivot', 'attendance_pivot_rows', 'generate_attendance_report',
+        'generate_pdf_attendance_report', 'generate_excel_attendance_report', 'generate_csv_attendance_report',
+        'Echo', 'stream_csv', 'write_xlsx', 'export_attendance_rows', 'export_fee_rows',
+        'export_exam_result_rows', 'EXPORTS', 'iter_export', 'REPORT_FORMATS', 'report_filename',
+        'report_fingerprint', 'submit_report_job', 'notify_report_ready', 'generate_report_job',
+    ],
+    'importing': [
+        'open_import_file', 'count_import_rows', 'read_import_chunks', 'hash_passwords',
+        'password_hasher_pool', 'write_profile_chunk', 'write_students', 'write_teachers', 'write_subjects',
+        'write_books', 'USER_COLUMNS', 'IMPORT_SCHEMAS', 'existing_keys', 'validate_rows', 'run_import',
+        'import_students', 'bulk_import_students', 'bulk_import_job',
+    ],
+}
+_LOCATIONS = {name: module for module, names in _SUBMODULES.items() for name in names}
+
+__all__ = sorted(_LOCATIONS)
+
+
+def __getattr__(name):
+    module = _LOCATIONS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f'{__name__}.{module}'), name)
+    # Later lookups find it directly, without coming back here
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LOCATIONS))
@@ -0,0 +1,52 @@
+"""Taking attendance: one transaction per class and day, counters included"""
+from django.db import transaction
+
+from .. import counters, models
+
+
+class DuplicateRollError(ValueError):
+    """Several students of a class share a roll, so their attendance can't be told apart"""
+
+    def __init__(self, class_name, rolls):
+        self.class_name = class_name
+        self.rolls = rolls
+        super().__init__(
+            f"Roll {', '.join(rolls)} is used by more than one student in class {class_name}. "
+            "Give each student a unique roll before taking attendance."
+        )
+
+
+def record_attendance(class_name, date, statuses, rolls=None):
+    """Replace a class's attendance for one day in a single transaction.
+
+    ``statuses`` is aligned with ``rolls`` (the class roster ordered by roll when
+    not given), as posted by the take-attendance forms. Returns the per-class
+    totals in the shape ``send_real_time_attendance_update`` expects. Raises
+    ``DuplicateRollError`` when the roster repeats a roll.
+    """
+    if rolls is None:
+        rolls = list(models.StudentExtra.objects.filter(cl=class_name).order_by('roll').values_list('roll', flat=True))
+    seen = set()
+    duplicates = sorted({roll for roll in rolls if roll in seen or seen.add(roll)})
+    if duplicates:
+        raise DuplicateRollError(class_name, duplicates)
+
+    records = [
+        models.Attendance(cl=class_name, date=date, roll=roll, present_status=present_status)
+        for roll, present_status in zip(rolls, statuses)
+    ]
+    with transaction.atomic():
+        day = models.Attendance.objects.select_for_update().filter(cl=class_name, date=date)
+        removed = list(day.values_list('cl', 'date', 'roll', 'present_status'))
+        day.delete()
+        models.Attendance.objects.bulk_create(records)
+        counters.apply_attendance_delta(removed, [counters.attendance_row(record) for record in records])
+
+    present_count = sum(1 for record in records if record.present_status == 'Present')
+    return {
+        'class_name': class_name,
+        'date': date,
+        'total_students': len(records),
+        'present_count': present_count,
+        'absent_count': len(records) - present_count,
+    }
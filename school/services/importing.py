@@ -0,0 +1,368 @@
+"""Chunked bulk imports of students, teachers, subjects and library books.
+
+pandas and openpyxl are only imported once a file is actually read, so the
+web process that queues ``bulk_import_job`` doesn't load them.
+"""
+import itertools
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import django
+from django.contrib.auth.hashers import make_password
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import transaction
+from celery import shared_task
+
+from .. import models
+
+logger = logging.getLogger('school')
+
+
+def open_import_file(file_path):
+    """Uploaded files live in default_storage, scripts may pass a local path"""
+    if os.path.exists(file_path):
+        return open(file_path, 'rb')
+    return default_storage.open(file_path, 'rb')
+
+
+def count_import_rows(file_path):
+    import openpyxl
+    
+    with open_import_file(file_path) as handle:
+        if file_path.endswith('.xlsx'):
+            sheet = openpyxl.load_workbook(handle, read_only=True).active
+            return max((sheet.max_row or 1) - 1, 0)
+        return max(sum(1 for _ in handle) - 1, 0)
+
+
+def read_import_chunks(file_path, chunk_size):
+    """Yield the file as DataFrames of ``chunk_size`` rows, all values as strings"""
+    import openpyxl
+    import pandas as pd
+    
+    with open_import_file(file_path) as handle:
+        if not file_path.endswith('.xlsx'):
+            yield from pd.read_csv(handle, chunksize=chunk_size, dtype=str, keep_default_na=False)
+            return
+        rows = openpyxl.load_workbook(handle, read_only=True).active.iter_rows(values_only=True)
+        header = [str(column).strip() if column is not None else '' for column in next(rows, [])]
+        start = 0
+        while True:
+            chunk = list(itertools.islice(rows, chunk_size))
+            if not chunk:
+                return
+            frame = pd.DataFrame(chunk, columns=header, index=range(start, start + len(chunk)))
+            yield frame.astype(object).where(frame.notna(), '').astype(str)
+            start += len(chunk)
+
+
+def hash_passwords(passwords, executor):
+    # One PBKDF2 run per user dominates an import, spread them over all cores
+    return list(executor.map(make_password, passwords, chunksize=max(len(passwords) // 32, 1)))
+
+
+def password_hasher_pool():
+    workers = getattr(settings, 'IMPORT_HASH_WORKERS', None) or os.cpu_count() or 1
+    # Celery prefork workers are daemonic and may not fork; hashlib's PBKDF2
+    # releases the GIL so threads still use every core there
+    if multiprocessing.current_process().daemon:
+        return ThreadPoolExecutor(max_workers=workers)
+    return ProcessPoolExecutor(max_workers=workers, initializer=django.setup)
+
+
+def write_profile_chunk(valid, hashed_passwords, group, build_profile):
+    """Users, their profiles and group membership of one chunk in a single transaction; returns the profile ids"""
+    with transaction.atomic():
+        models.User.objects.bulk_create([
+            models.User(
+                username=row.username, first_name=row.first_name, last_name=row.last_name,
+                email=row.email, password=password,
+            )
+            for row, password in zip(valid.itertuples(), hashed_passwords)
+        ])
+        # Not every backend returns primary keys from bulk_create
+        user_ids = dict(models.User.objects.filter(username__in=list(valid['username'])).values_list('username', 'id'))
+        profiles = [build_profile(row, user_ids[row.username]) for row in valid.itertuples()]
+        profile_model = type(profiles[0])
+        profile_model.objects.bulk_create(profiles)
+        membership = models.User.groups.through
+        membership.objects.bulk_create([
+            membership(user_id=user_id, group_id=group.id) for user_id in user_ids.values()
+        ])
+    return list(profile_model.objects.filter(user_id__in=user_ids.values()).values_list('id', flat=True))
+
+
+def write_students(valid, context):
+    return write_profile_chunk(valid, context['passwords'], context['group'], lambda row, user_id: models.StudentExtra(
+        user_id=user_id, roll=row.roll, mobile=row.mobile, fee=int(row.fee), cl=row.cl, status=True,
+    ))
+
+
+def write_teachers(valid, context):
+    return write_profile_chunk(valid, context['passwords'], context['group'], lambda row, user_id: models.TeacherExtra(
+        user_id=user_id, salary=int(row.salary), mobile=row.mobile, status=True,
+    ))
+
+
+def write_subjects(valid, context):
+    with transaction.atomic():
+        models.Subject.objects.bulk_create([
+            models.Subject(name=row.name, code=row.code, description=row.description)
+            for row in valid.itertuples()
+        ], ignore_conflicts=True)
+    return list(models.Subject.objects.filter(code__in=list(valid['code'])).values_list('id', flat=True))
+
+
+def write_books(valid, context):
+    with transaction.atomic():
+        models.LibraryBook.objects.bulk_create([
+            models.LibraryBook(
+                title=row.title, author=row.author, isbn=row.isbn, category=row.category,
+                publisher=row.publisher, publication_year=int(row.publication_year), pages=int(row.pages),
+            )
+            for row in valid.itertuples()
+        ], ignore_conflicts=True)
+    return list(models.LibraryBook.objects.filter(isbn__in=list(valid['isbn'])).values_list('id', flat=True))
+
+
+USER_COLUMNS = {'username': 150, 'first_name': 150, 'last_name': 150, 'email': 254}
+
+# upload type -> how file columns map onto rows of the target models.
+# required/optional: column names (optional ones with their default), rename: column -> model field,
+# limits: max length, numbers: non-negative integers, choices: allowed values,
+# unique: the natural key, existing ones are errors or - with skip_existing - left alone,
+# roll_per_class: a roll may be used once per class (attendance is keyed by class and roll),
+# group/search: group the created users join and search index entity to refresh
+IMPORT_SCHEMAS = {
+    'students': {
+        'required': ['username', 'first_name', 'last_name', 'password', 'roll'],
+        'optional': {'email': '', 'mobile': '', 'fee': 0, 'class': 'one'},
+        'rename': {'class': 'cl'},
+        'limits': dict(USER_COLUMNS, roll=10, mobile=40),
+        'numbers': ['fee'],
+        'choices': {'class': [name for name, _ in models.classes]},
+        'unique': 'username',
+        'skip_existing': False,
+        'roll_per_class': True,
+        'group': 'STUDENT',
+        'search': 'student',
+        'writer': write_students,
+    },
+    'teachers': {
+        'required': ['username', 'first_name', 'last_name', 'password', 'salary'],
+        'optional': {'email': '', 'mobile': ''},
+        'rename': {},
+        'limits': dict(USER_COLUMNS, mobile=40),
+        'numbers': ['salary'],
+        'choices': {},
+        'unique': 'username',
+        'skip_existing': False,
+        'roll_per_class': False,
+        'group': 'TEACHER',
+        'search': 'teacher',
+        'writer': write_teachers,
+    },
+    'subjects': {
+        'required': ['name', 'code'],
+        'optional': {'description': ''},
+        'rename': {},
+        'limits': {'name': 100, 'code': 10},
+        'numbers': [],
+        'choices': {},
+        'unique': 'code',
+        'skip_existing': True,
+        'roll_per_class': False,
+        'group': None,
+        'search': None,
+        'writer': write_subjects,
+    },
+    'books': {
+        'required': ['title', 'author', 'isbn', 'category', 'publisher', 'publication_year', 'pages'],
+        'optional': {},
+        'rename': {},
+        'limits': {'title': 200, 'author': 100, 'isbn': 20, 'category': 50, 'publisher': 100},
+        'numbers': ['publication_year', 'pages'],
+        'choices': {},
+        'unique': 'isbn',
+        'skip_existing': True,
+        'roll_per_class': False,
+        'group': None,
+        'search': 'book',
+        'writer': write_books,
+    },
+}
+
+
+def existing_keys(upload_type, keys):
+    model, field = {
+        'students': (models.User, 'username'),
+        'teachers': (models.User, 'username'),
+        'subjects': (models.Subject, 'code'),
+        'books': (models.LibraryBook, 'isbn'),
+    }[upload_type]
+    return set(model.objects.filter(**{f'{field}__in': keys}).values_list(field, flat=True))
+
+
+def existing_class_rolls(class_names, rolls):
+    rows = models.StudentExtra.objects.filter(cl__in=class_names, roll__in=rolls).values_list('cl', 'roll')
+    return {f'roll:{cl}\t{roll}' for cl, roll in rows}
+
+
+def validate_rows(upload_type, df, seen_keys):
+    """Vectorised checks of one chunk.
+
+    Returns (valid rows, {row index: error}, number of rows skipped because
+    they already exist).
+    """
+    import pandas as pd
+    
+    schema = IMPORT_SCHEMAS[upload_type]
+    df = df.rename(columns=lambda column: str(column).strip().lower())
+    missing_columns = [column for column in schema['required'] if column not in df.columns]
+    if missing_columns:
+        raise ValueError(f"Missing columns: {', '.join(missing_columns)}")
+    for column, default in schema['optional'].items():
+        if column not in df.columns:
+            df[column] = str(default)
+    df = df[schema['required'] + list(schema['optional'])].apply(lambda column: column.str.strip())
+    for column, default in schema['optional'].items():
+        df[column] = df[column].replace('', str(default))
+    for column, choices in schema['choices'].items():
+        df[column] = df[column].str.lower()
+    errors = pd.Series('', index=df.index)
+
+    def flag(mask, message):
+        errors[mask & (errors == '')] = message
+
+    for column in schema['required']:
+        flag(df[column] == '', f"{column} is required")
+    for column in schema['numbers']:
+        df[column] = pd.to_numeric(df[column], errors='coerce')
+    for column, limit in schema['limits'].items():
+        flag(df[column].str.len() > limit, f"{column} is longer than {limit} characters")
+    for column, choices in schema['choices'].items():
+        flag(~df[column].isin(choices), f"unknown {column}")
+    for column in schema['numbers']:
+        flag(df[column].isna() | (df[column] < 0) | (df[column] % 1 != 0), f"{column} must be a positive whole number")
+
+    key = schema['unique']
+    flag(df[key].duplicated(keep='first') | df[key].isin(seen_keys), f"duplicate {key} in file")
+    seen_keys.update(df[key])
+    if schema['roll_per_class']:
+        class_rolls = 'roll:' + df['class'] + '\t' + df['roll']
+        taken = existing_class_rolls(set(df['class']), set(df['roll']))
+        flag(
+            class_rolls.duplicated(keep='first') | class_rolls.isin(seen_keys) | class_rolls.isin(taken),
+            "roll is already used in this class",
+        )
+        seen_keys.update(class_rolls)
+    existing = df[key].isin(existing_keys(upload_type, list(df[key])))
+    if schema['skip_existing']:
+        skip = existing & (errors == '')
+    else:
+        skip = pd.Series(False, index=df.index)
+        flag(existing, f"{key} already exists")
+
+    valid = df[(errors == '') & ~skip].rename(columns=schema['rename'])
+    return valid, errors[errors != ''].to_dict(), int(skip.sum())
+
+
+def run_import(upload_type, file_path, chunk_size=None, progress=None):
+    """Chunked, schema-driven import of students, teachers, subjects or books.
+
+    Each chunk is validated with pandas, user passwords are hashed in a worker
+    pool and the rows are written with bulk inserts in one transaction per
+    chunk, so a failing chunk never leaves half-created objects behind.
+    ``progress(processed, total)`` is called after every chunk.
+    """
+    from django.contrib.auth.models import Group
+    from .. import dashboard, search, statistics
+
+    schema = IMPORT_SCHEMAS[upload_type]
+    chunk_size = chunk_size or getattr(settings, 'IMPORT_CHUNK_SIZE', 500)
+    total = count_import_rows(file_path)
+    context = {'group': Group.objects.get_or_create(name=schema['group'])[0] if schema['group'] else None}
+    seen_keys = set()
+    imported_count = 0
+    skipped_count = 0
+    processed = 0
+    errors = {}
+    started = time.monotonic()
+
+    with password_hasher_pool() as executor:
+        for chunk in read_import_chunks(file_path, chunk_size):
+            valid, row_errors, skipped = validate_rows(upload_type, chunk, seen_keys)
+            errors.update(row_errors)
+            skipped_count += skipped
+            if len(valid):
+                try:
+                    if 'password' in valid:
+                        context['passwords'] = hash_passwords(list(valid['password']), executor)
+                    object_ids = schema['writer'](valid, context)
+                    imported_count += len(object_ids)
+                    # bulk_create sends no post_save, so refresh the search documents here
+                    if schema['search']:
+                        model = search.SEARCH_ENTITIES[schema['search']][0]
+                        search.index_objects(schema['search'], model.objects.filter(id__in=object_ids))
+                except Exception as e:
+                    logger.error(f"Error importing {upload_type} chunk at row {valid.index[0] + 1}: {str(e)}")
+                    errors.update((index, str(e)) for index in valid.index)
+            processed += len(chunk)
+            if progress:
+                progress(processed, total)
+
+    if imported_count and schema['group']:
+        dashboard.invalidate_dashboard_metrics()
+        statistics.invalidate_statistics(upload_type)
+    elapsed = time.monotonic() - started
+    rows_per_second = round(processed / elapsed, 1) if elapsed else 0
+    logger.info(f"Imported {imported_count}/{processed} {upload_type} in {elapsed:.1f}s ({rows_per_second} rows/s)")
+    return {
+        'imported_count': imported_count,
+        'skipped_count': skipped_count,
+        'processed_count': processed,
+        'elapsed_seconds': round(elapsed, 2),
+        'rows_per_second': rows_per_second,
+        # Row numbers match the spreadsheet data rows, starting at 1
+        'errors': [f"Row {index + 1}: {message}" for index, message in sorted(errors.items())],
+        'success': True,
+    }
+
+
+def import_students(file_path, chunk_size=None, progress=None):
+    return run_import('students', file_path, chunk_size, progress)
+
+
+def bulk_import_students(file_path):
+    """Bulk import students from Excel/CSV file"""
+    try:
+        return import_students(file_path)
+    except Exception as e:
+        return {
+            'imported_count': 0,
+            'errors': [str(e)],
+            'success': False
+        }
+
+
+@shared_task(bind=True, name='school.services.bulk_import_job')
+def bulk_import_job(self, upload_type, file_path, delete_file=True):
+    """Run a bulk import on a worker and report progress through the task state"""
+    def progress(processed, total):
+        try:
+            self.update_state(state='PROGRESS', meta={'processed': processed, 'total': total})
+        except Exception as e:
+            logger.error(f"Error reporting import progress: {str(e)}")
+
+    try:
+        result = run_import(upload_type, file_path, progress=progress)
+    except Exception as e:
+        logger.error(f"Error importing {upload_type} from {file_path}: {str(e)}")
+        result = {'imported_count': 0, 'errors': [str(e)], 'success': False}
+    finally:
+        if delete_file:
+            default_storage.delete(file_path)
+    return result
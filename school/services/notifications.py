@@ -0,0 +1,248 @@
+"""Notifications: e-mail, bulk in-app notifications, reminders and WebSocket pushes"""
+import asyncio
+import logging
+from django.core.mail import send_mail, send_mass_mail, get_connection
+from django.conf import settings
+from django.utils import timezone
+from datetime import timedelta
+from celery import shared_task
+from channels.layers import get_channel_layer
+from asgiref.sync import async_to_sync
+
+from .. import attendance_feed, models
+
+logger = logging.getLogger('school')
+
+
+@shared_task(name='school.services.send_notification_email')
+def send_notification_email(user_id, title, message, notification_type):
+    """Send email notification to user"""
+    try:
+        user = models.User.objects.get(id=user_id)
+        
+        # Create notification in database
+        notification = models.Notification.objects.create(
+            title=title,
+            message=message,
+            notification_type=notification_type,
+            recipient=user
+        )
+        
+        # Send real-time notification via WebSocket
+        async_to_sync(get_channel_layer().group_send)(
+            f"notifications_{user.id}",
+            {
+                'type': 'notification_message',
+                'title': title,
+                'message': message,
+                'notification_type': notification_type,
+                'created_at': notification.created_at.isoformat()
+            }
+        )
+        
+        # Send email if user has email
+        if user.email:
+            send_mail(
+                subject=f"School Management System - {title}",
+                message=message,
+                from_email=settings.EMAIL_HOST_USER,
+                recipient_list=[user.email],
+                fail_silently=True,
+            )
+        
+        logger.info(f"Notification sent to user {user.username}")
+        
+    except Exception as e:
+        logger.error(f"Error sending notification: {str(e)}")
+
+
+# Recipient groups for send_bulk_notification, mapped to the lookup prefix of
+# their profile relation on User
+RECIPIENT_GROUPS = {
+    'users': '',
+    'students': 'studentextra__',
+    'teachers': 'teacherextra__',
+}
+
+
+def resolve_recipients(recipient_spec):
+    """Turn a JSON-serialisable recipient spec into a User queryset.
+
+    e.g. ``{'group': 'students', 'filters': {'cl': 'five', 'status': True}}``,
+    ``{'group': 'users', 'filters': {'is_active': True}}`` or ``{'user_ids': [1, 2]}``
+    """
+    group = recipient_spec.get('group', 'users')
+    prefix = RECIPIENT_GROUPS[group]
+    queryset = models.User.objects.all()
+    if prefix:
+        queryset = queryset.filter(**{f'{prefix}isnull': False})
+    if 'user_ids' in recipient_spec:
+        queryset = queryset.filter(id__in=recipient_spec['user_ids'])
+    filters = {f'{prefix}{field}': value for field, value in recipient_spec.get('filters', {}).items()}
+    return queryset.filter(**filters)
+
+
+async def push_to_users(user_ids, event):
+    """Send one event to each user's ``notifications_<id>`` group, concurrently"""
+    channel_layer = get_channel_layer()
+    results = await asyncio.gather(*[
+        channel_layer.group_send(f"notifications_{user_id}", event)
+        for user_id in user_ids
+    ], return_exceptions=True)
+    # One full channel doesn't stop the others; the rows are there to reload
+    failed = [result for result in results if isinstance(result, Exception)]
+    if failed:
+        logger.error(f"WebSocket push failed for {len(failed)} of {len(user_ids)} users: {str(failed[0])}")
+
+
+@shared_task(name='school.services.send_bulk_notification')
+def send_bulk_notification(recipient_spec, title, message, notification_type, chunk_size=None):
+    """Notify a whole group of users in chunks.
+
+    Per chunk: one bulk_create of Notification rows, one WebSocket message to
+    each recipient's own group (only their sockets receive it) and one
+    send_mass_mail, all mail going over a single SMTP connection for the whole run.
+    A failing step is logged and the run moves on: the WebSocket push is best
+    effort, and a chunk whose rows or mail fail doesn't stop the next chunks.
+    Returns the number of recipients whose Notification rows were written.
+    """
+    chunk_size = chunk_size or getattr(settings, 'NOTIFICATION_CHUNK_SIZE', 500)
+    recipients = resolve_recipients(recipient_spec).order_by('id')
+    subject = f"School Management System - {title}"
+    sent = 0
+    failed = 0
+    last_id = 0
+    
+    connection = get_connection(fail_silently=True)
+    try:
+        connection.open()
+        while True:
+            chunk = list(recipients.filter(id__gt=last_id).values_list('id', 'email')[:chunk_size])
+            if not chunk:
+                break
+            last_id = chunk[-1][0]
+            
+            try:
+                notifications = models.Notification.objects.bulk_create([
+                    models.Notification(
+                        title=title,
+                        message=message,
+                        notification_type=notification_type,
+                        recipient_id=user_id
+                    )
+                    for user_id, email in chunk
+                ])
+                sent += len(chunk)
+            except Exception as e:
+                logger.error(f"Error saving bulk notification for {len(chunk)} users: {str(e)}")
+                notifications = None
+                failed += len(chunk)
+            
+            if notifications:
+                try:
+                    async_to_sync(push_to_users)(
+                        [user_id for user_id, email in chunk],
+                        {
+                            'type': 'notification_message',
+                            'title': title,
+                            'message': message,
+                            'notification_type': notification_type,
+                            'created_at': notifications[0].created_at.isoformat()
+                        }
+                    )
+                except Exception as e:
+                    logger.error(f"Error pushing bulk notification to {len(chunk)} users: {str(e)}")
+            
+            try:
+                send_mass_mail(
+                    [(subject, message, settings.EMAIL_HOST_USER, [email]) for user_id, email in chunk if email],
+                    fail_silently=True,
+                    connection=connection,
+                )
+            except Exception as e:
+                logger.error(f"Error mailing bulk notification to {len(chunk)} users: {str(e)}")
+        
+        if failed:
+            logger.error(f"Bulk notification '{title}' saved for {sent} users, failed for {failed}")
+        else:
+            logger.info(f"Bulk notification '{title}' sent to {sent} users")
+    except Exception as e:
+        logger.error(f"Error sending bulk notification: {str(e)}")
+    finally:
+        connection.close()
+    
+    return sent
+
+
+@shared_task(name='school.services.send_attendance_reminder')
+def send_attendance_reminder():
+    """Send attendance reminder to teachers"""
+    try:
+        send_bulk_notification(
+            {'group': 'teachers', 'filters': {'status': True}},
+            "Attendance Reminder",
+            "Please mark attendance for your classes today.",
+            "attendance"
+        )
+        logger.info("Attendance reminders sent to all teachers")
+    except Exception as e:
+        logger.error(f"Error sending attendance reminders: {str(e)}")
+
+
+@shared_task(name='school.services.send_assignment_reminder')
+def send_assignment_reminder():
+    """Send assignment due date reminders"""
+    try:
+        tomorrow = timezone.now() + timedelta(days=1)
+        assignments = list(models.Assignment.objects.filter(
+            due_date__date=tomorrow.date(),
+            is_active=True
+        ))
+        
+        for assignment in assignments:
+            send_bulk_notification(
+                {'group': 'students', 'filters': {'cl': assignment.class_name, 'status': True}},
+                f"Assignment Due Tomorrow: {assignment.title}",
+                f"Assignment '{assignment.title}' is due tomorrow. Please submit it on time.",
+                "assignment"
+            )
+        
+        logger.info(f"Assignment reminders sent for {len(assignments)} assignments")
+    except Exception as e:
+        logger.error(f"Error sending assignment reminders: {str(e)}")
+
+
+@shared_task(name='school.services.send_fee_reminder')
+def send_fee_reminder():
+    """Send fee payment reminders"""
+    try:
+        overdue_payments = models.FeePayment.objects.filter(
+            status='pending',
+            due_date__lt=timezone.now().date()
+        )
+        
+        for payment in overdue_payments:
+            send_notification_email.delay(
+                payment.student.user.id,
+                "Fee Payment Overdue",
+                f"Your fee payment of ${payment.amount} is overdue. Please make the payment as soon as possible.",
+                "fee"
+            )
+        
+        logger.info(f"Fee reminders sent for {overdue_payments.count()} overdue payments")
+    except Exception as e:
+        logger.error(f"Error sending fee reminders: {str(e)}")
+
+
+def send_real_time_attendance_update(class_name, date, total_students, present_count, absent_count):
+    """Send real-time attendance update via WebSocket"""
+    try:
+        async_to_sync(get_channel_layer().group_send)(
+            attendance_feed.FEED_GROUP,
+            dict(
+                attendance_feed.attendance_update(class_name, date, total_students, present_count, absent_count),
+                type='attendance_update',
+            )
+        )
+    except Exception as e:
+        logger.error(f"Error sending real-time attendance update: {str(e)}")
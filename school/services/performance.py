@@ -0,0 +1,187 @@
+"""StudentPerformance: grades, semesters and batch (re)computation"""
+import logging
+import re
+from datetime import datetime
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Avg, Count, F, Q
+from django.utils import timezone
+from celery import shared_task
+
+from .. import models
+
+logger = logging.getLogger('school')
+
+
+PERFORMANCE_LAST_RUN_KEY = 'performance_last_run'
+
+
+def grade_for(percentage):
+    if percentage >= 90:
+        return 'A+'
+    elif percentage >= 80:
+        return 'A'
+    elif percentage >= 70:
+        return 'B+'
+    elif percentage >= 60:
+        return 'B'
+    elif percentage >= 50:
+        return 'C'
+    return 'F'
+
+
+def current_semester(today=None):
+    today = today or timezone.localdate()
+    return f"{today.year}-{1 if today.month <= 6 else 2}"
+
+
+def semester_date_range(semester):
+    """(first day, last day) of ``semester``, None when it can't be resolved.
+
+    ``SEMESTER_DATE_RANGES`` maps semester names to ISO dates; otherwise
+    ``YYYY-1`` is January-June and ``YYYY-2`` July-December.
+    """
+    configured = getattr(settings, 'SEMESTER_DATE_RANGES', {}).get(semester)
+    if configured:
+        return tuple(datetime.strptime(day, '%Y-%m-%d').date() for day in configured)
+    match = re.fullmatch(r'(\d{4})-([12])', semester or '')
+    if not match:
+        return None
+    year = int(match.group(1))
+    if match.group(2) == '1':
+        return datetime(year, 1, 1).date(), datetime(year, 6, 30).date()
+    return datetime(year, 7, 1).date(), datetime(year, 12, 31).date()
+
+
+def compute_performance(semester, class_name=None, student_ids=None):
+    """Recompute StudentPerformance for a semester in a fixed number of queries.
+
+    One grouped aggregate gives attendance per (class, roll), another the
+    average exam percentage per (student, subject); the rows are then
+    upserted with bulk_update/bulk_create. Limit the run with ``class_name``
+    or ``student_ids``.
+    """
+    students = models.StudentExtra.objects.all()
+    if class_name:
+        students = students.filter(cl=class_name)
+    if student_ids is not None:
+        students = students.filter(id__in=student_ids)
+    student_by_roll = {(cl, roll): student_id for student_id, cl, roll in students.values_list('id', 'cl', 'roll')}
+    if not student_by_roll:
+        return {'students': 0, 'created': 0, 'updated': 0}
+    ids = list(student_by_roll.values())
+
+    date_range = semester_date_range(semester)
+    if date_range is None:
+        logger.warning(f"Unknown semester {semester!r}, using all attendance and exams")
+
+    classes = {cl for cl, _ in student_by_roll}
+    results = models.ExamResult.objects.filter(student_id__in=ids, exam__max_marks__gt=0)
+    if date_range:
+        results = results.filter(exam__exam_date__date__range=date_range)
+        # Semester totals need the raw rows, all-time ones come from the per-student rollup
+        per_roll = models.Attendance.objects.filter(cl__in=classes, date__range=date_range).values_list(
+            'cl', 'roll'
+        ).annotate(total=Count('id'), present=Count('id', filter=Q(present_status='Present'))).order_by()
+    else:
+        per_roll = models.StudentAttendanceCount.objects.filter(cl__in=classes).values_list(
+            'cl', 'roll', F('present_count') + F('absent_count'), 'present_count'
+        )
+    attendance_percentage = {}
+    for cl, roll, total, present in per_roll:
+        student_id = student_by_roll.get((cl, roll))
+        if student_id is not None:
+            attendance_percentage[student_id] = round(present * 100 / total, 2) if total else 0
+
+    marks = results.values_list('student_id', 'exam__subject_id').annotate(
+        average=Avg(F('marks_obtained') * 100.0 / F('exam__max_marks'))
+    ).order_by()
+
+    existing = {}
+    for performance in models.StudentPerformance.objects.filter(semester=semester, student_id__in=ids).order_by('id'):
+        existing.setdefault((performance.student_id, performance.subject_id), performance)
+
+    to_create, to_update = [], []
+    for student_id, subject_id, average in marks:
+        average = round(average, 2)
+        values = {
+            'attendance_percentage': attendance_percentage.get(student_id, 0),
+            'average_marks': average,
+            'grade': grade_for(average),
+        }
+        performance = existing.get((student_id, subject_id))
+        if performance is None:
+            to_create.append(models.StudentPerformance(
+                student_id=student_id, subject_id=subject_id, semester=semester, **values
+            ))
+        else:
+            for field, value in values.items():
+                setattr(performance, field, value)
+            to_update.append(performance)
+
+    with transaction.atomic():
+        models.StudentPerformance.objects.bulk_update(
+            to_update, ['attendance_percentage', 'average_marks', 'grade'], batch_size=500
+        )
+        models.StudentPerformance.objects.bulk_create(to_create, batch_size=500)
+    return {'students': len(ids), 'created': len(to_create), 'updated': len(to_update)}
+
+
+def changed_student_ids(since):
+    """Students with attendance or exam results recorded after ``since``"""
+    changed_rolls = set(models.Attendance.objects.filter(recorded_at__gte=since).values_list('cl', 'roll').distinct())
+    student_ids = set(models.ExamResult.objects.filter(updated_at__gte=since).values_list('student_id', flat=True))
+    if changed_rolls:
+        rolls = Q()
+        for cl in {cl for cl, _ in changed_rolls}:
+            rolls |= Q(cl=cl, roll__in=[roll for roll_cl, roll in changed_rolls if roll_cl == cl])
+        student_ids.update(models.StudentExtra.objects.filter(rolls).values_list('id', flat=True))
+    return student_ids
+
+
+def refresh_changed_performance(semester=None):
+    """Recompute only the students whose data changed since the previous incremental run"""
+    semester = semester or current_semester()
+    started = timezone.now()
+    last_run = models.SystemSettings.objects.filter(key=PERFORMANCE_LAST_RUN_KEY).values_list('value', flat=True).first()
+    if last_run:
+        result = compute_performance(semester, student_ids=changed_student_ids(datetime.fromisoformat(last_run)))
+    else:
+        result = compute_performance(semester)
+    # Taken before computing so changes made during the run are picked up next time
+    models.SystemSettings.objects.update_or_create(
+        key=PERFORMANCE_LAST_RUN_KEY,
+        defaults={'value': started.isoformat(), 'description': 'Last incremental StudentPerformance run'},
+    )
+    return result
+
+
+@shared_task(name='school.services.update_student_performance')
+def update_student_performance(semester=None, class_name=None, incremental=False):
+    """Batch StudentPerformance refresh for the whole school, a class, or what changed"""
+    try:
+        if incremental:
+            result = refresh_changed_performance(semester)
+        else:
+            result = compute_performance(semester or current_semester(), class_name=class_name)
+        logger.info(f"StudentPerformance refreshed: {result}")
+        return result
+    except Exception as e:
+        logger.error(f"Error updating student performance: {str(e)}")
+        return None
+
+
+def calculate_student_performance(student_id, semester):
+    """Recompute one student's performance for ``semester``.
+
+    Returns a list of the student's StudentPerformance rows, one per subject,
+    or None on error. It used to return a single row; performance is now
+    stored per (student, subject).
+    """
+    try:
+        compute_performance(semester, student_ids=[student_id])
+        return list(models.StudentPerformance.objects.filter(student_id=student_id, semester=semester))
+        
+    except Exception as e:
+        logger.error(f"Error calculating student performance: {str(e)}")
+        return None
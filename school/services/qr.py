@@ -0,0 +1,86 @@
+"""Content-addressed student QR codes"""
+import hashlib
+import logging
+from io import BytesIO
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+
+from .. import models
+
+logger = logging.getLogger('school')
+
+
+QR_CACHE_PREFIX = 'school:qr:'
+
+
+def student_qr_payload(student):
+    return f"Student ID: {student.id}\nName: {student.get_name}\nRoll: {student.roll}\nClass: {student.cl}"
+
+
+def qr_digest(payload):
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def qr_storage_name(digest):
+    return f'qr/{digest}.png'
+
+
+def render_qr_png(payload):
+    """PNG bytes of the QR code for ``payload`` (no Django access, safe in worker processes)"""
+    import qrcode
+    
+    qr = qrcode.QRCode(version=1, box_size=10, border=5)
+    qr.add_data(payload)
+    qr.make(fit=True)
+    
+    img = qr.make_image(fill_color="black", back_color="white")
+    
+    buffer = BytesIO()
+    img.save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+def store_qr_code(digest, png):
+    name = qr_storage_name(digest)
+    saved = default_storage.save(name, ContentFile(png))
+    # Another worker stored the same content first, keep the canonical name
+    if saved != name:
+        default_storage.delete(saved)
+
+
+def ensure_qr_codes(payloads):
+    """Content-addressed QR images for ``payloads``; returns their digests in order.
+
+    Images are stored once per distinct payload under ``qr/<sha256>.png``. A
+    cache entry per digest saves the storage lookup on later requests.
+    """
+    digests = [qr_digest(payload) for payload in payloads]
+    known = cache.get_many([QR_CACHE_PREFIX + digest for digest in digests])
+    stored = {}
+    for payload, digest in zip(payloads, digests):
+        key = QR_CACHE_PREFIX + digest
+        if key in known or key in stored:
+            continue
+        if not default_storage.exists(qr_storage_name(digest)):
+            store_qr_code(digest, render_qr_png(payload))
+        stored[key] = True
+    if stored:
+        cache.set_many(stored, None)
+    return digests
+
+
+def generate_qr_code_for_student(student_id):
+    """Generate QR code for student ID"""
+    try:
+        import base64
+        
+        student = models.StudentExtra.objects.select_related('user').get(id=student_id)
+        digest = ensure_qr_codes([student_qr_payload(student)])[0]
+        with default_storage.open(qr_storage_name(digest), 'rb') as image:
+            # Convert to base64 for embedding in HTML
+            return base64.b64encode(image.read()).decode()
+        
+    except Exception as e:
+        logger.error(f"Error generating QR code: {str(e)}")
+        return None
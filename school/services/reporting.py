@@ -0,0 +1,404 @@
+"""Attendance reports (PDF, Excel, CSV), streamed exports and queued report jobs.
+
+reportlab and openpyxl are imported by the functions that render those
+formats, so CSV exports and job bookkeeping don't load them.
+"""
+import csv
+import hashlib
+import logging
+import tempfile
+from io import BytesIO, TextIOWrapper
+from django.core.files.base import ContentFile
+from django.db.models import Count, Max
+from django.urls import reverse
+from django.utils import timezone
+from celery import shared_task
+
+from .. import models
+from .notifications import send_notification_email
+
+logger = logging.getLogger('school')
+
+
+def build_attendance_pivot(class_name, date_from, date_to):
+    """Pull a class's attendance for a date range once and pivot it into a roll x date grid.
+
+    Every report writer consumes the returned dict instead of querying per cell.
+    """
+    records = (
+        models.Attendance.objects.filter(cl=class_name, date__range=[date_from, date_to])
+        .order_by('date', 'roll')
+        .values_list('roll', 'date', 'present_status')
+    )
+
+    grid = {}
+    dates = set()
+    total_records = present_count = absent_count = 0
+    for roll, date, present_status in records:
+        total_records += 1
+        grid.setdefault(roll, {})[date] = 'P' if present_status == 'Present' else 'A'
+        dates.add(date)
+        if present_status == 'Present':
+            present_count += 1
+        elif present_status == 'Absent':
+            absent_count += 1
+
+    return {
+        'class_name': class_name,
+        'dates': sorted(dates),
+        'rolls': sorted(grid, key=str),
+        'grid': grid,
+        'summary': {
+            'total_records': total_records,
+            'present_count': present_count,
+            'absent_count': absent_count,
+            'attendance_percentage': (present_count / total_records * 100) if total_records > 0 else 0,
+        },
+    }
+
+
+def attendance_pivot_rows(pivot):
+    """Header plus one row per roll, with '-' where no attendance was taken"""
+    yield ['Roll'] + [str(date) for date in pivot['dates']]
+    for roll in pivot['rolls']:
+        marks = pivot['grid'][roll]
+        yield [str(roll)] + [marks.get(date, '-') for date in pivot['dates']]
+
+
+def generate_attendance_report(class_name, date_from, date_to, format='pdf'):
+    """Generate attendance report"""
+    try:
+        pivot = build_attendance_pivot(class_name, date_from, date_to)
+        
+        if format == 'pdf':
+            return generate_pdf_attendance_report(pivot, class_name, date_from, date_to)
+        elif format == 'excel':
+            return generate_excel_attendance_report(pivot, class_name, date_from, date_to)
+        elif format == 'csv':
+            return generate_csv_attendance_report(pivot, class_name, date_from, date_to)
+    except Exception as e:
+        logger.error(f"Error generating attendance report: {str(e)}")
+        return None
+
+
+def generate_pdf_attendance_report(pivot, class_name, date_from, date_to):
+    """Generate PDF attendance report"""
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import letter
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
+    
+    buffer = BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=letter)
+    styles = getSampleStyleSheet()
+    story = []
+    
+    # Title
+    title_style = ParagraphStyle(
+        'CustomTitle',
+        parent=styles['Heading1'],
+        fontSize=16,
+        spaceAfter=30,
+        alignment=1  # Center alignment
+    )
+    story.append(Paragraph(f"Attendance Report - Class {class_name}", title_style))
+    story.append(Paragraph(f"Period: {date_from} to {date_to}", styles['Normal']))
+    story.append(Spacer(1, 20))
+    
+    # Statistics table
+    summary = pivot['summary']
+    stats_data = [
+        ['Total Records', str(summary['total_records'])],
+        ['Present', str(summary['present_count'])],
+        ['Absent', str(summary['absent_count'])],
+        ['Attendance %', f"{summary['attendance_percentage']:.2f}%"]
+    ]
+    
+    stats_table = Table(stats_data, colWidths=[200, 100])
+    stats_table.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, 0), 14),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+        ('GRID', (0, 0), (-1, -1), 1, colors.black)
+    ]))
+    
+    story.append(stats_table)
+    story.append(Spacer(1, 20))
+    
+    # Detailed attendance table
+    if pivot['rolls']:
+        table_data = list(attendance_pivot_rows(pivot))
+        
+        # Create table
+        attendance_table = Table(table_data, colWidths=[60] + [40] * len(pivot['dates']))
+        attendance_table.setStyle(TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, 0), 10),
+            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+            ('GRID', (0, 0), (-1, -1), 1, colors.black),
+            ('FONTSIZE', (0, 1), (-1, -1), 8)
+        ]))
+        
+        story.append(attendance_table)
+    
+    doc.build(story)
+    buffer.seek(0)
+    return buffer
+
+
+def generate_excel_attendance_report(pivot, class_name, date_from, date_to):
+    """Generate Excel attendance report"""
+    import openpyxl
+    
+    buffer = BytesIO()
+    workbook = openpyxl.Workbook()
+    worksheet = workbook.active
+    worksheet.title = f"Attendance Report - Class {class_name}"
+    
+    # Title
+    worksheet['A1'] = f"Attendance Report - Class {class_name}"
+    worksheet['A2'] = f"Period: {date_from} to {date_to}"
+    
+    # Statistics
+    summary = pivot['summary']
+    worksheet['A4'] = 'Total Records'
+    worksheet['B4'] = summary['total_records']
+    worksheet['A5'] = 'Present'
+    worksheet['B5'] = summary['present_count']
+    worksheet['A6'] = 'Absent'
+    worksheet['B6'] = summary['absent_count']
+    worksheet['A7'] = 'Attendance %'
+    worksheet['B7'] = f"{summary['attendance_percentage']:.2f}%"
+    
+    # Detailed data, header on row 9
+    if pivot['rolls']:
+        for row, values in enumerate(attendance_pivot_rows(pivot), start=9):
+            for column, value in enumerate(values, start=1):
+                worksheet.cell(row=row, column=column, value=value)
+    
+    workbook.save(buffer)
+    buffer.seek(0)
+    return buffer
+
+
+def generate_csv_attendance_report(pivot, class_name, date_from, date_to):
+    """Generate CSV attendance report: the same roll x date grid as the PDF and Excel ones"""
+    buffer = BytesIO()
+    # Encode straight into the buffer instead of building the text and copying it
+    text = TextIOWrapper(buffer, encoding='utf-8', newline='', write_through=True)
+    csv.writer(text, lineterminator='\n').writerows(attendance_pivot_rows(pivot))
+    text.detach()
+    buffer.seek(0)
+    return buffer
+
+
+class Echo:
+    """Pseudo-buffer for csv.writer: hands each formatted line straight back"""
+    def write(self, value):
+        return value
+
+
+def stream_csv(header, rows):
+    """Yield a CSV file line by line without building it in memory"""
+    writer = csv.writer(Echo(), lineterminator='\n')
+    yield writer.writerow(header)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def write_xlsx(header, rows, title):
+    """Write rows to a write-only workbook backed by a temporary file.
+
+    openpyxl's write-only mode flushes each row to disk, so memory stays flat
+    regardless of the number of rows. Returns the open file, rewound.
+    """
+    import openpyxl
+    
+    workbook = openpyxl.Workbook(write_only=True)
+    worksheet = workbook.create_sheet(title=title[:31])
+    worksheet.append(header)
+    for row in rows:
+        worksheet.append(list(row))
+    output = tempfile.TemporaryFile()
+    workbook.save(output)
+    output.seek(0)
+    return output
+
+
+def export_attendance_rows(filters):
+    queryset = models.Attendance.objects.all()
+    if filters.get('class_name'):
+        queryset = queryset.filter(cl=filters['class_name'])
+    if filters.get('date_from'):
+        queryset = queryset.filter(date__gte=filters['date_from'])
+    if filters.get('date_to'):
+        queryset = queryset.filter(date__lte=filters['date_to'])
+    return queryset.order_by('cl', 'date', 'roll').values_list('roll', 'cl', 'date', 'present_status')
+
+
+def export_fee_rows(filters):
+    queryset = models.FeePayment.objects.all()
+    if filters.get('class_name'):
+        queryset = queryset.filter(student__cl=filters['class_name'])
+    if filters.get('status'):
+        queryset = queryset.filter(status=filters['status'])
+    if filters.get('date_from'):
+        queryset = queryset.filter(due_date__gte=filters['date_from'])
+    if filters.get('date_to'):
+        queryset = queryset.filter(due_date__lte=filters['date_to'])
+    return queryset.order_by('due_date', 'id').values_list(
+        'student__roll', 'student__cl', 'student__user__first_name', 'student__user__last_name',
+        'amount', 'due_date', 'payment_date', 'status', 'payment_method', 'transaction_id'
+    )
+
+
+def export_exam_result_rows(filters):
+    queryset = models.ExamResult.objects.all()
+    if filters.get('class_name'):
+        queryset = queryset.filter(exam__class_name=filters['class_name'])
+    if filters.get('exam'):
+        queryset = queryset.filter(exam_id=filters['exam'])
+    if filters.get('date_from'):
+        queryset = queryset.filter(exam__exam_date__date__gte=filters['date_from'])
+    if filters.get('date_to'):
+        queryset = queryset.filter(exam__exam_date__date__lte=filters['date_to'])
+    return queryset.order_by('exam__exam_date', 'exam_id', 'student__roll').values_list(
+        'exam__name', 'exam__subject__name', 'exam__class_name', 'exam__exam_date',
+        'student__roll', 'student__user__first_name', 'student__user__last_name',
+        'marks_obtained', 'exam__max_marks', 'grade'
+    )
+
+
+# name -> (header, row source); every source is a flat values_list so the joins
+# happen in SQL and rows can be streamed with .iterator()
+EXPORTS = {
+    'attendance': (
+        ['Roll', 'Class', 'Date', 'Status'],
+        export_attendance_rows,
+    ),
+    'fees': (
+        ['Roll', 'Class', 'First Name', 'Last Name', 'Amount', 'Due Date', 'Payment Date',
+         'Status', 'Payment Method', 'Transaction ID'],
+        export_fee_rows,
+    ),
+    'exam-results': (
+        ['Exam', 'Subject', 'Class', 'Exam Date', 'Roll', 'First Name', 'Last Name',
+         'Marks Obtained', 'Max Marks', 'Grade'],
+        export_exam_result_rows,
+    ),
+}
+
+
+def iter_export(name, filters):
+    """Header and a server-side row iterator for one of the EXPORTS"""
+    header, source = EXPORTS[name]
+    return header, source(filters).iterator(chunk_size=2000)
+
+
+REPORT_FORMATS = {
+    'pdf': ('pdf', 'application/pdf'),
+    'excel': ('xlsx', 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'),
+    'csv': ('csv', 'text/csv'),
+}
+
+
+def report_filename(job):
+    extension = REPORT_FORMATS[job.format][0]
+    return f"{job.report_type}_report_{job.class_name}_{job.date_from}_{job.date_to}.{extension}"
+
+
+def report_fingerprint(report_type, class_name, date_from, date_to, format):
+    """Identify a report by its parameters and the current state of its data.
+
+    Re-taking attendance replaces rows with new, higher ids, deletions lower the
+    count and edits in place bump the auto_now ``recorded_at``, so each of them
+    produces a new fingerprint.
+    """
+    data_version = models.Attendance.objects.filter(
+        cl=class_name,
+        date__range=[date_from, date_to]
+    ).aggregate(rows=Count('id'), last_id=Max('id'), last_recorded=Max('recorded_at'))
+    key = (
+        f"{report_type}|{class_name}|{date_from}|{date_to}|{format}|"
+        f"{data_version['rows']}|{data_version['last_id']}|{data_version['last_recorded']}"
+    )
+    return hashlib.sha256(key.encode()).hexdigest()
+
+
+def submit_report_job(user, report_type, class_name, date_from, date_to, format):
+    """Queue a report, reusing an already generated file when nothing changed"""
+    job = models.ReportJob.objects.create(
+        requested_by=user,
+        report_type=report_type,
+        class_name=class_name or '',
+        date_from=date_from,
+        date_to=date_to,
+        format=format,
+        fingerprint=report_fingerprint(report_type, class_name, date_from, date_to, format),
+    )
+    
+    cached = models.ReportJob.objects.filter(
+        fingerprint=job.fingerprint,
+        status='done'
+    ).exclude(file='').exclude(id=job.id).order_by('-completed_at').first()
+    
+    if cached and cached.file.storage.exists(cached.file.name):
+        job.file.name = cached.file.name
+        job.status = 'done'
+        job.completed_at = timezone.now()
+        job.save(update_fields=['file', 'status', 'completed_at'])
+        notify_report_ready(job)
+    else:
+        generate_report_job.delay(job.id)
+    
+    return job
+
+
+def notify_report_ready(job):
+    send_notification_email.delay(
+        job.requested_by_id,
+        "Report Ready",
+        f"Your {job.report_type} report for class {job.class_name} ({job.date_from} to {job.date_to}) "
+        f"is ready: {reverse('report-job-download', args=[job.id])}",
+        "general"
+    )
+
+
+@shared_task(name='school.services.generate_report_job')
+def generate_report_job(job_id):
+    """Render a queued report and store it under MEDIA_ROOT"""
+    try:
+        job = models.ReportJob.objects.get(id=job_id)
+    except models.ReportJob.DoesNotExist:
+        logger.error(f"Report job {job_id} not found")
+        return
+    
+    job.status = 'running'
+    job.save(update_fields=['status'])
+    
+    try:
+        report_data = generate_attendance_report(job.class_name, job.date_from, job.date_to, job.format)
+        if report_data is None:
+            raise ValueError('Error generating report.')
+        
+        job.file.save(report_filename(job), ContentFile(report_data.getvalue()), save=False)
+        job.status = 'done'
+        job.completed_at = timezone.now()
+        job.save(update_fields=['file', 'status', 'completed_at'])
+        notify_report_ready(job)
+        logger.info(f"Report job {job.id} finished")
+        
+    except Exception as e:
+        job.status = 'failed'
+        job.error = str(e)
+        job.completed_at = timezone.now()
+        job.save(update_fields=['status', 'error', 'completed_at'])
+        logger.error(f"Error generating report job {job.id}: {str(e)}")
@@ -0,0 +1,97 @@
+from django.contrib.auth.models import User
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from . import dashboard, models, roles, search, statistics
+
+
+# Role cache: group membership, approval and deletion change what
+# is_admin / is_teacher / is_student return
+
+@receiver(m2m_changed, sender=User.groups.through)
+def invalidate_role_on_group_change(sender, instance, action, reverse, pk_set, **kwargs):
+    if isinstance(instance, User):
+        if action.startswith('post_'):
+            roles.invalidate_role(instance.id)
+    elif action == 'pre_clear':
+        # group.user_set.clear() doesn't say which users were removed
+        roles.invalidate_role(*instance.user_set.values_list('id', flat=True))
+    elif action in ('post_add', 'post_remove') and pk_set:
+        roles.invalidate_role(*pk_set)
+
+
+@receiver(post_save, sender=models.TeacherExtra)
+@receiver(post_delete, sender=models.TeacherExtra)
+@receiver(post_save, sender=models.StudentExtra)
+@receiver(post_delete, sender=models.StudentExtra)
+def invalidate_role_on_profile_change(sender, instance, **kwargs):
+    roles.invalidate_role(instance.user_id)
+
+
+@receiver(post_delete, sender=User)
+def invalidate_role_on_user_delete(sender, instance, **kwargs):
+    roles.invalidate_role(instance.id)
+
+
+# Dashboard counters are computed from TeacherExtra and StudentExtra only
+
+@receiver(post_save, sender=models.TeacherExtra)
+@receiver(post_delete, sender=models.TeacherExtra)
+@receiver(post_save, sender=models.StudentExtra)
+@receiver(post_delete, sender=models.StudentExtra)
+def invalidate_dashboard_metrics(sender, **kwargs):
+    dashboard.invalidate_dashboard_metrics()
+
+
+# Cached API statistics, keyed by a version per statistic
+
+STATISTICS_SOURCES = {
+    models.TeacherExtra: 'teachers',
+    models.StudentExtra: 'students',
+    models.FeePayment: 'fees',
+}
+
+
+def invalidate_model_statistics(sender, **kwargs):
+    statistics.invalidate_statistics(STATISTICS_SOURCES[sender])
+
+
+for statistics_model in STATISTICS_SOURCES:
+    post_save.connect(invalidate_model_statistics, sender=statistics_model, dispatch_uid=f'statistics_save_{statistics_model.__name__}')
+    post_delete.connect(invalidate_model_statistics, sender=statistics_model, dispatch_uid=f'statistics_delete_{statistics_model.__name__}')
+
+
+# Search documents denormalise the object and a few related names
+
+SEARCHABLE_MODELS = [model for model, _, _ in search.SEARCH_ENTITIES.values()]
+
+
+def update_search_document(sender, instance, raw=False, **kwargs):
+    if not raw:
+        search.index_object(instance)
+
+
+def remove_search_document(sender, instance, **kwargs):
+    search.remove_object(instance)
+
+
+for searchable_model in SEARCHABLE_MODELS:
+    post_save.connect(update_search_document, sender=searchable_model, dispatch_uid=f'search_save_{searchable_model.__name__}')
+    post_delete.connect(remove_search_document, sender=searchable_model, dispatch_uid=f'search_delete_{searchable_model.__name__}')
+
+
+@receiver(post_save, sender=User)
+def update_profile_search_documents(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    # New users get their document once the profile is created, logins only touch last_login
+    if created or raw or (update_fields and set(update_fields) <= {'last_login', 'password'}):
+        return
+    search.index_objects('student', models.StudentExtra.objects.filter(user=instance))
+    search.index_objects('teacher', models.TeacherExtra.objects.filter(user=instance))
+
+
+@receiver(post_save, sender=models.Subject)
+def update_subject_search_documents(sender, instance, created, raw=False, **kwargs):
+    if created or raw:
+        return
+    search.index_objects('assignment', models.Assignment.objects.filter(subject=instance))
+    search.index_objects('exam', models.Exam.objects.filter(subject=instance))
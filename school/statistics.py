@@ -0,0 +1,156 @@
+"""Statistics behind the API ``statistics`` actions and the analytics page.
+
+Each group of numbers comes from a single ``aggregate()`` whose metrics are
+narrowed with ``filter=Q(...)`` instead of one COUNT/SUM query per filter.
+The API responses are cached per statistic and the query parameters it
+reads, so unrelated parameters don't fan out into extra entries. Every
+statistic has a version number in the cache that ``school.signals`` (and
+the bulk writers that bypass signals) bump when the underlying rows
+change, so stale entries are never read again and simply expire.
+"""
+import functools
+import hashlib
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Avg, Count, Q, Sum
+from rest_framework.response import Response
+
+from . import counters, models
+
+logger = logging.getLogger('school')
+
+
+def conditional_aggregate(queryset, **metrics):
+    """Compute every metric in one query.
+
+    Each metric is ``(aggregate class, field, condition)``; the condition is a
+    ``Q`` or None for the whole queryset. Empty results give 0, not None.
+    """
+    # COUNT is never NULL and refuses a default
+    return queryset.aggregate(**{
+        name: function(field, filter=condition) if function is Count else function(field, filter=condition, default=0)
+        for name, (function, field, condition) in metrics.items()
+    })
+
+
+def _percentage(part, total):
+    return round(part / total * 100, 2) if total else 0
+
+
+def teacher_statistics():
+    totals = conditional_aggregate(
+        models.TeacherExtra.objects.all(),
+        total_teachers=(Count, 'id', None),
+        active_teachers=(Count, 'id', Q(status=True)),
+        pending_teachers=(Count, 'id', Q(status=False)),
+        average_salary=(Avg, 'salary', Q(status=True)),
+    )
+    totals['average_salary'] = round(totals['average_salary'], 2)
+    return totals
+
+
+def student_statistics():
+    # Grouping by class gives the distribution and, summed up, the totals
+    rows = models.StudentExtra.objects.values('cl').annotate(
+        total=Count('id'),
+        active=Count('id', filter=Q(status=True)),
+    ).order_by('cl')
+    total_students = active_students = 0
+    class_distribution = []
+    for row in rows:
+        total_students += row['total']
+        active_students += row['active']
+        if row['active']:
+            class_distribution.append({'cl': row['cl'], 'count': row['active']})
+    return {
+        'total_students': total_students,
+        'active_students': active_students,
+        'pending_students': total_students - active_students,
+        'class_distribution': class_distribution,
+    }
+
+
+def fee_statistics():
+    totals = conditional_aggregate(
+        models.FeePayment.objects.all(),
+        total_amount=(Sum, 'amount', None),
+        paid_amount=(Sum, 'amount', Q(status='paid')),
+        pending_amount=(Sum, 'amount', Q(status='pending')),
+    )
+    totals['collection_rate'] = _percentage(totals['paid_amount'], totals['total_amount'])
+    return totals
+
+
+def attendance_statistics(class_name=None, date_from=None, date_to=None):
+    # Already a single aggregate over the daily rollup
+    totals = counters.class_attendance(class_name, date_from, date_to)
+    return {
+        'total_records': totals['total'],
+        'present_count': totals['present'],
+        'absent_count': totals['absent'],
+        'attendance_percentage': _percentage(totals['present'], totals['total']),
+    }
+
+
+# Response cache
+
+def version_key(name):
+    return f'school:statistics:{name}:version'
+
+
+def statistics_version(name):
+    try:
+        return cache.get_or_set(version_key(name), 1, None)
+    except Exception as e:
+        logger.error(f"Error reading statistics version: {str(e)}")
+        return None
+
+
+def invalidate_statistics(*names):
+    for name in names:
+        try:
+            cache.incr(version_key(name))
+        except ValueError:
+            # Never read yet, nothing cached under it
+            pass
+        except Exception as e:
+            logger.error(f"Error invalidating {name} statistics: {str(e)}")
+
+
+def statistics_cache_key(name, version, params):
+    query = '&'.join(f'{key}={value}' for key, value in sorted(params.items()))
+    return f'school:statistics:{name}:v{version}:{hashlib.md5(query.encode()).hexdigest()}'
+
+
+def cached_statistics(name, params=()):
+    """Cache what a viewset ``statistics`` action returns, per value of ``params``.
+
+    ``params`` names the query parameters the action reads; any others are
+    left out of the key. The action returns a plain dict; ``Response``
+    wrapping happens here.
+    """
+    def decorator(action):
+        @functools.wraps(action)
+        def wrapper(viewset, request, *args, **kwargs):
+            version = statistics_version(name)
+            if version is None:
+                return Response(action(viewset, request, *args, **kwargs))
+            key = statistics_cache_key(
+                name, version, {param: request.query_params.get(param, '') for param in params}
+            )
+            try:
+                data = cache.get(key)
+            except Exception as e:
+                logger.error(f"Error reading statistics cache: {str(e)}")
+                data = None
+            if data is None:
+                data = action(viewset, request, *args, **kwargs)
+                try:
+                    cache.set(key, data, getattr(settings, 'STATISTICS_CACHE_TIMEOUT', 300))
+                except Exception as e:
+                    logger.error(f"Error writing statistics cache: {str(e)}")
+            return Response(data)
+        return wrapper
+    return decorator
@@ -0,0 +1,29 @@
+"""Celery task registry for ``app.autodiscover_tasks()``.
+
+The tasks are defined in ``school.audit`` and the ``school.services``
+submodules, which the web process only imports on first use; the worker
+imports them all here.
+"""
+from .audit import flush_audit_events
+from .services.importing import bulk_import_job
+from .services.notifications import (
+    send_assignment_reminder,
+    send_attendance_reminder,
+    send_bulk_notification,
+    send_fee_reminder,
+    send_notification_email,
+)
+from .services.performance import update_student_performance
+from .services.reporting import generate_report_job
+
+__all__ = [
+    'bulk_import_job',
+    'flush_audit_events',
+    'generate_report_job',
+    'send_assignment_reminder',
+    'send_attendance_reminder',
+    'send_bulk_notification',
+    'send_fee_reminder',
+    'send_notification_email',
+    'update_student_performance',
+]
@@ -1,9 +1,8 @@
 from django.shortcuts import render,redirect,reverse, get_object_or_404
-from . import forms,models
-# from . import services  # Commented out for migration creation
-from django.db.models import Sum, Avg, Count, Q
+from . import counters,dashboard,forms,models,roles,search,services,statistics
+from django.db.models import Avg, Count
 from django.contrib.auth.models import Group
-from django.http import HttpResponseRedirect, HttpResponse, JsonResponse
+from django.http import HttpResponseRedirect, HttpResponse, JsonResponse, FileResponse, Http404, HttpResponseNotModified
 from django.contrib.auth.decorators import login_required,user_passes_test
 from django.conf import settings
 from django.core.mail import send_mail
@@ -21,6 +20,7 @@ from django.core.files.storage import default_storage
 from django.core.files.base import ContentFile
 import json
 import logging
+import re
 # from channels.layers import get_channel_layer
 # from asgiref.sync import async_to_sync
 
@@ -135,22 +135,13 @@ def teacher_signup_view(request):
 
 
 #for checking user is techer , student or admin
+#roles are cached per request and across requests, see school/roles.py
 def is_admin(user):
-    return user.groups.filter(name='ADMIN').exists()
+    return roles.is_admin(user)
 def is_teacher(user):
-    if user.groups.filter(name='TEACHER').exists():
-        return True
-    try:
-        return models.TeacherExtra.objects.filter(user_id=user.id).exists()
-    except Exception:
-        return False
+    return roles.is_teacher(user)
 def is_student(user):
-    if user.groups.filter(name='STUDENT').exists():
-        return True
-    try:
-        return models.StudentExtra.objects.filter(user_id=user.id).exists()
-    except Exception:
-        return False
+    return roles.is_student(user)
 
 
 @never_cache
@@ -175,14 +166,9 @@ def logout_view(request):
 class AuditLoggingMiddleware(MiddlewareMixin):
     def process_response(self, request, response):
         try:
-            from .models import AuditLog
-            user = request.user if hasattr(request, 'user') and request.user.is_authenticated else None
-            AuditLog.objects.create(
-                user=user,
-                path=request.path[:255],
-                method=getattr(request, 'method', 'GET')[:10],
-                status_code=getattr(response, 'status_code', 0),
-            )
+            # Buffered, the actual INSERT happens in batches (see school/audit.py)
+            from .audit import record_request
+            record_request(request, response)
         except Exception:
             pass
         return response
@@ -195,33 +181,23 @@ class AuditLoggingMiddleware(MiddlewareMixin):
 @user_passes_test(is_admin)
 @never_cache
 def admin_dashboard_view(request):
-    teachercount=models.TeacherExtra.objects.all().filter(status=True).count()
-    pendingteachercount=models.TeacherExtra.objects.all().filter(status=False).count()
-
-    studentcount=models.StudentExtra.objects.all().filter(status=True).count()
-    pendingstudentcount=models.StudentExtra.objects.all().filter(status=False).count()
+    #counters come from one cached aggregate per table, see school/dashboard.py
+    metrics=dashboard.get_dashboard_metrics()
 
-    teachersalary=models.TeacherExtra.objects.filter(status=True).aggregate(Sum('salary'))
-    pendingteachersalary=models.TeacherExtra.objects.filter(status=False).aggregate(Sum('salary'))
+    notice=models.Notice.objects.all().order_by('-date','-id')[:settings.DASHBOARD_NOTICE_LIMIT]
 
-    studentfee=models.StudentExtra.objects.filter(status=True).aggregate(Sum('fee',default=0))
-    pendingstudentfee=models.StudentExtra.objects.filter(status=False).aggregate(Sum('fee'))
-
-    notice=models.Notice.objects.all()
-
-    #aggregate function return dictionary so fetch data from dictionay
     mydict={
-        'teachercount':teachercount,
-        'pendingteachercount':pendingteachercount,
+        'teachercount':metrics['teachercount'],
+        'pendingteachercount':metrics['pendingteachercount'],
 
-        'studentcount':studentcount,
-        'pendingstudentcount':pendingstudentcount,
+        'studentcount':metrics['studentcount'],
+        'pendingstudentcount':metrics['pendingstudentcount'],
 
-        'teachersalary':teachersalary['salary__sum'],
-        'pendingteachersalary':pendingteachersalary['salary__sum'],
+        'teachersalary':metrics['teachersalary'],
+        'pendingteachersalary':metrics['pendingteachersalary'],
 
-        'studentfee':studentfee['fee__sum'],
-        'pendingstudentfee':pendingstudentfee['fee__sum'],
+        'studentfee':metrics['studentfee'],
+        'pendingstudentfee':metrics['pendingstudentfee'],
 
         'notice':notice
 
@@ -508,14 +484,11 @@ def admin_take_attendance_view(request,cl):
             Attendances=request.POST.getlist('present_status')
             date=form.cleaned_data['date']
             # Overwrite existing attendance for this class and date
-            models.Attendance.objects.filter(date=date, cl=cl).delete()
-            for i in range(len(Attendances)):
-                AttendanceModel=models.Attendance()
-                AttendanceModel.cl=cl
-                AttendanceModel.date=date
-                AttendanceModel.present_status=Attendances[i]
-                AttendanceModel.roll=students[i].roll
-                AttendanceModel.save()
+            try:
+                totals=services.record_attendance(cl,date,Attendances,rolls=[student.roll for student in students])
+            except services.DuplicateRollError as e:
+                return render(request,'school/admin_take_attendance.html',{'students':students,'aform':form,'error':str(e)})
+            services.send_real_time_attendance_update(**totals)
             return redirect('admin-attendance')
         else:
             print('form invalid')
@@ -554,12 +527,12 @@ def admin_export_attendance_csv(request, cl):
     except ValueError:
         return redirect('admin-view-attendance', cl=cl)
 
-    rows = models.Attendance.objects.filter(cl=cl, date=date).order_by('roll')
+    rows = models.Attendance.objects.filter(cl=cl, date=date).order_by('roll').values_list('roll','cl','date','present_status')
 
     def row_iter():
         yield 'roll,class,date,status\n'
-        for r in rows:
-            yield f"{r.roll},{r.cl},{r.date},{r.present_status}\n"
+        for roll, row_cl, row_date, present_status in rows.iterator():
+            yield f"{roll},{row_cl},{row_date},{present_status}\n"
 
     response = StreamingHttpResponse(row_iter(), content_type='text/csv')
     response['Content-Disposition'] = f'attachment; filename="attendance_{cl}_{date}.csv"'
@@ -653,14 +626,11 @@ def teacher_take_attendance_view(request,cl):
             Attendances=request.POST.getlist('present_status')
             date=form.cleaned_data['date']
             # Overwrite existing attendance for this class and date
-            models.Attendance.objects.filter(date=date, cl=cl).delete()
-            for i in range(len(Attendances)):
-                AttendanceModel=models.Attendance()
-                AttendanceModel.cl=cl
-                AttendanceModel.date=date
-                AttendanceModel.present_status=Attendances[i]
-                AttendanceModel.roll=students[i].roll
-                AttendanceModel.save()
+            try:
+                totals=services.record_attendance(cl,date,Attendances,rolls=[student.roll for student in students])
+            except services.DuplicateRollError as e:
+                return render(request,'school/teacher_take_attendance.html',{'students':students,'aform':form,'error':str(e)})
+            services.send_real_time_attendance_update(**totals)
             return redirect('teacher-attendance')
         else:
             print('form invalid')
@@ -699,12 +669,12 @@ def teacher_export_attendance_csv(request, cl):
     except ValueError:
         return redirect('teacher-view-attendance', cl=cl)
 
-    rows = models.Attendance.objects.filter(cl=cl, date=date).order_by('roll')
+    rows = models.Attendance.objects.filter(cl=cl, date=date).order_by('roll').values_list('roll','cl','date','present_status')
 
     def row_iter():
         yield 'roll,class,date,status\n'
-        for r in rows:
-            yield f"{r.roll},{r.cl},{r.date},{r.present_status}\n"
+        for roll, row_cl, row_date, present_status in rows.iterator():
+            yield f"{roll},{row_cl},{row_date},{present_status}\n"
 
     response = StreamingHttpResponse(row_iter(), content_type='text/csv')
     response['Content-Disposition'] = f'attachment; filename="attendance_{cl}_{date}.csv"'
@@ -807,26 +777,16 @@ def advanced_analytics_view(request):
     """Advanced analytics dashboard with charts and insights"""
     
     # Student Statistics
-    total_students = models.StudentExtra.objects.filter(status=True).count()
-    class_distribution = models.StudentExtra.objects.filter(status=True).values('cl').annotate(count=Count('id')).order_by('cl')
+    student_stats = statistics.student_statistics()
     
     # Teacher Statistics
-    total_teachers = models.TeacherExtra.objects.filter(status=True).count()
-    avg_salary = models.TeacherExtra.objects.filter(status=True).aggregate(avg_salary=Avg('salary'))['avg_salary'] or 0
+    teacher_stats = statistics.teacher_statistics()
     
     # Attendance Statistics
-    attendance_stats = models.Attendance.objects.values('cl').annotate(
-        total=Count('id'),
-        present=Count('id', filter=Q(present_status='Present')),
-        absent=Count('id', filter=Q(present_status='Absent'))
-    ).order_by('cl')
+    attendance_stats = counters.attendance_by_class()
     
     # Fee Collection Statistics
-    fee_stats = models.FeePayment.objects.aggregate(
-        total_amount=Sum('amount'),
-        paid_amount=Sum('amount', filter=Q(status='paid')),
-        pending_amount=Sum('amount', filter=Q(status='pending'))
-    )
+    fee_stats = statistics.fee_statistics()
     
     # Recent Activities
     recent_notices = models.Notice.objects.all().order_by('-date')[:5]
@@ -842,10 +802,10 @@ def advanced_analytics_view(request):
     ).order_by('semester')
     
     context = {
-        'total_students': total_students,
-        'class_distribution': list(class_distribution),
-        'total_teachers': total_teachers,
-        'avg_salary': round(avg_salary, 2),
+        'total_students': student_stats['active_students'],
+        'class_distribution': student_stats['class_distribution'],
+        'total_teachers': teacher_stats['active_teachers'],
+        'avg_salary': teacher_stats['average_salary'],
         'attendance_stats': list(attendance_stats),
         'fee_stats': fee_stats,
         'recent_notices': recent_notices,
@@ -885,15 +845,13 @@ def create_assignment_view(request):
             assignment.teacher = models.TeacherExtra.objects.get(user=request.user)
             assignment.save()
             
-            # Send notifications to students
-            students = models.StudentExtra.objects.filter(cl=assignment.class_name, status=True)
-            for student in students:
-                services.send_notification_email.delay(
-                    student.user.id,
-                    f"New Assignment: {assignment.title}",
-                    f"A new assignment '{assignment.title}' has been assigned. Due date: {assignment.due_date}",
-                    "assignment"
-                )
+            # Send notifications to students, fanned out by the worker
+            services.send_bulk_notification.delay(
+                {'group': 'students', 'filters': {'cl': assignment.class_name, 'status': True}},
+                f"New Assignment: {assignment.title}",
+                f"A new assignment '{assignment.title}' has been assigned. Due date: {assignment.due_date}",
+                "assignment"
+            )
             
             messages.success(request, 'Assignment created successfully!')
             return redirect('teacher-assignments')
@@ -1055,15 +1013,13 @@ def create_event_view(request):
             event.organizer = request.user
             event.save()
             
-            # Send notifications to all users
-            users = models.User.objects.filter(is_active=True)
-            for user in users:
-                services.send_notification_email.delay(
-                    user.id,
-                    f"New Event: {event.title}",
-                    f"A new event '{event.title}' has been scheduled for {event.start_date}",
-                    "general"
-                )
+            # Send notifications to all users, fanned out by the worker
+            services.send_bulk_notification.delay(
+                {'group': 'users', 'filters': {'is_active': True}},
+                f"New Event: {event.title}",
+                f"A new event '{event.title}' has been scheduled for {event.start_date}",
+                "general"
+            )
             
             messages.success(request, 'Event created successfully!')
             return redirect('event-management')
@@ -1094,80 +1050,60 @@ def advanced_search_view(request):
             
             if search_type == 'student':
                 qs = models.StudentExtra.objects.all()
-                if query:
-                    qs = qs.filter(
-                        Q(user__first_name__icontains=query) |
-                        Q(user__last_name__icontains=query) |
-                        Q(roll__icontains=query)
-                    )
                 if class_name:
                     qs = qs.filter(cl=class_name)
                 if status:
                     qs = qs.filter(status=(status == 'active'))
+                if query:
+                    qs = search.rank_queryset(qs, 'student', query)
                 results = qs[:50]  # Limit results
                 
             elif search_type == 'teacher':
                 qs = models.TeacherExtra.objects.all()
-                if query:
-                    qs = qs.filter(
-                        Q(user__first_name__icontains=query) |
-                        Q(user__last_name__icontains=query)
-                    )
                 if status:
                     qs = qs.filter(status=(status == 'active'))
+                if query:
+                    qs = search.rank_queryset(qs, 'teacher', query)
                 results = qs[:50]
                 
             elif search_type == 'assignment':
                 qs = models.Assignment.objects.all()
-                if query:
-                    qs = qs.filter(
-                        Q(title__icontains=query) |
-                        Q(description__icontains=query)
-                    )
                 if class_name:
                     qs = qs.filter(class_name=class_name)
                 if date_from:
                     qs = qs.filter(created_at__gte=date_from)
                 if date_to:
                     qs = qs.filter(created_at__lte=date_to)
+                if query:
+                    qs = search.rank_queryset(qs, 'assignment', query)
                 results = qs[:50]
                 
             elif search_type == 'exam':
                 qs = models.Exam.objects.all()
-                if query:
-                    qs = qs.filter(
-                        Q(name__icontains=query) |
-                        Q(instructions__icontains=query)
-                    )
                 if class_name:
                     qs = qs.filter(class_name=class_name)
                 if date_from:
                     qs = qs.filter(exam_date__gte=date_from)
                 if date_to:
                     qs = qs.filter(exam_date__lte=date_to)
+                if query:
+                    qs = search.rank_queryset(qs, 'exam', query)
                 results = qs[:50]
                 
             elif search_type == 'book':
                 qs = models.LibraryBook.objects.all()
                 if query:
-                    qs = qs.filter(
-                        Q(title__icontains=query) |
-                        Q(author__icontains=query) |
-                        Q(isbn__icontains=query)
-                    )
+                    qs = search.rank_queryset(qs, 'book', query)
                 results = qs[:50]
                 
             elif search_type == 'event':
                 qs = models.SchoolEvent.objects.all()
-                if query:
-                    qs = qs.filter(
-                        Q(title__icontains=query) |
-                        Q(description__icontains=query)
-                    )
                 if date_from:
                     qs = qs.filter(start_date__gte=date_from)
                 if date_to:
                     qs = qs.filter(start_date__lte=date_to)
+                if query:
+                    qs = search.rank_queryset(qs, 'event', query)
                 results = qs[:50]
     else:
         form = forms.AdvancedSearchForm()
@@ -1194,13 +1130,15 @@ def bulk_upload_view(request):
             # Save uploaded file
             file_path = default_storage.save(f'temp/{file.name}', ContentFile(file.read()))
             
+            queued = False
             try:
-                if upload_type == 'students':
-                    result = services.bulk_import_students(file_path)
-                    if result['success']:
-                        messages.success(request, f"Successfully imported {result['imported_count']} students!")
-                    else:
-                        messages.error(request, f"Import failed: {', '.join(result['errors'])}")
+                if upload_type in services.IMPORT_SCHEMAS:
+                    # The worker deletes the file once the import has finished
+                    task = services.bulk_import_job.delay(upload_type, file_path)
+                    queued = True
+                    if request.headers.get('x-requested-with') == 'XMLHttpRequest':
+                        return JsonResponse(import_job_payload(task.id), status=202)
+                    messages.success(request, f"{upload_type.capitalize()} import started. Track it at {reverse('bulk-upload-status', args=[task.id])}")
                 else:
                     messages.info(request, f"Bulk upload for {upload_type} is not implemented yet.")
                     
@@ -1208,7 +1146,8 @@ def bulk_upload_view(request):
                 messages.error(request, f"Error processing file: {str(e)}")
             finally:
                 # Clean up temp file
-                default_storage.delete(file_path)
+                if not queued:
+                    default_storage.delete(file_path)
             
             return redirect('bulk-upload')
     else:
@@ -1217,12 +1156,37 @@ def bulk_upload_view(request):
     return render(request, 'school/bulk_upload.html', {'form': form})
 
 
+def import_job_payload(task_id):
+    from celery.result import AsyncResult
+    result = AsyncResult(task_id)
+    payload = {
+        'task_id': task_id,
+        'state': result.state,
+        'status_url': reverse('bulk-upload-status', args=[task_id]),
+    }
+    if result.state == 'PROGRESS':
+        payload.update(result.info or {})
+    elif result.state == 'SUCCESS':
+        payload['result'] = result.result
+    elif result.state == 'FAILURE':
+        payload['error'] = str(result.result)
+    return payload
+
+
+@login_required(login_url='adminlogin')
+@user_passes_test(is_admin)
+@never_cache
+def bulk_upload_status_view(request, task_id):
+    """Poll a running bulk import"""
+    return JsonResponse(import_job_payload(task_id))
+
+
 # Report Generation
 @login_required(login_url='adminlogin')
 @user_passes_test(is_admin)
 @never_cache
 def generate_report_view(request):
-    """Generate various reports"""
+    """Queue report generation, the file is built by a Celery worker"""
     if request.method == 'POST':
         form = forms.ReportForm(request.POST)
         if form.is_valid():
@@ -1237,24 +1201,11 @@ def generate_report_view(request):
                     messages.error(request, 'Date range is required for attendance report.')
                     return redirect('generate-report')
                 
-                report_data = services.generate_attendance_report(class_name, date_from, date_to, format)
+                job = services.submit_report_job(request.user, report_type, class_name, date_from, date_to, format)
                 
-                if report_data:
-                    response = HttpResponse(content_type='application/octet-stream')
-                    if format == 'pdf':
-                        response['Content-Type'] = 'application/pdf'
-                        response['Content-Disposition'] = f'attachment; filename="attendance_report_{class_name}_{date_from}_{date_to}.pdf"'
-                    elif format == 'excel':
-                        response['Content-Type'] = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-                        response['Content-Disposition'] = f'attachment; filename="attendance_report_{class_name}_{date_from}_{date_to}.xlsx"'
-                    elif format == 'csv':
-                        response['Content-Type'] = 'text/csv'
-                        response['Content-Disposition'] = f'attachment; filename="attendance_report_{class_name}_{date_from}_{date_to}.csv"'
-                    
-                    response.write(report_data.getvalue())
-                    return response
-                else:
-                    messages.error(request, 'Error generating report.')
+                if request.headers.get('x-requested-with') == 'XMLHttpRequest':
+                    return JsonResponse(report_job_payload(job), status=202)
+                messages.success(request, f'Report job #{job.id} submitted. You will be notified when it is ready.')
             else:
                 messages.info(request, f'Report type "{report_type}" is not implemented yet.')
             
@@ -1265,6 +1216,67 @@ def generate_report_view(request):
     return render(request, 'school/generate_report.html', {'form': form})
 
 
+def report_job_payload(job):
+    payload = {
+        'job_id': job.id,
+        'status': job.status,
+        'status_url': reverse('report-job-status', args=[job.id]),
+    }
+    if job.status == 'done':
+        payload['download_url'] = reverse('report-job-download', args=[job.id])
+    elif job.status == 'failed':
+        payload['error'] = job.error
+    return payload
+
+
+@login_required(login_url='adminlogin')
+@user_passes_test(is_admin)
+@never_cache
+def report_job_status_view(request, job_id):
+    """Poll a queued report"""
+    job = get_object_or_404(models.ReportJob, id=job_id)
+    return JsonResponse(report_job_payload(job))
+
+
+@login_required(login_url='adminlogin')
+@user_passes_test(is_admin)
+@never_cache
+def report_job_download_view(request, job_id):
+    """Download a finished report"""
+    job = get_object_or_404(models.ReportJob, id=job_id, status='done')
+    response = FileResponse(job.file.open('rb'), as_attachment=True, filename=services.report_filename(job))
+    response['Content-Type'] = services.REPORT_FORMATS[job.format][1]
+    return response
+
+
+# Streaming Exports
+@login_required(login_url='adminlogin')
+@user_passes_test(is_admin)
+@never_cache
+def export_data_view(request, dataset):
+    """Stream attendance, fee or exam result exports as CSV or XLSX"""
+    if dataset not in services.EXPORTS:
+        return JsonResponse({'error': f'Unknown export "{dataset}"'}, status=404)
+    
+    form = forms.ExportFilterForm(request.GET)
+    if not form.is_valid():
+        return JsonResponse({'error': 'Invalid export filters', 'errors': form.errors}, status=400)
+    
+    filters = form.cleaned_data
+    header, rows = services.iter_export(dataset, filters)
+    filename = f"{dataset}_{timezone.now().strftime('%Y%m%d')}"
+    
+    if filters['format'] == 'xlsx':
+        output = services.write_xlsx(header, rows, title=dataset)
+        response = FileResponse(output, as_attachment=True, filename=f'{filename}.xlsx')
+        response['Content-Type'] = services.REPORT_FORMATS['excel'][1]
+        return response
+    
+    response = StreamingHttpResponse(services.stream_csv(header, rows), content_type='text/csv')
+    response['Content-Disposition'] = f'attachment; filename="{filename}.csv"'
+    return response
+
+
 # Real-time Notifications
 @login_required
 @never_cache
@@ -1306,18 +1318,35 @@ def mark_notification_read(request, notification_id):
 @never_cache
 def student_qr_codes_view(request):
     """Generate QR codes for students"""
-    students = models.StudentExtra.objects.filter(status=True).order_by('roll')
+    students = models.StudentExtra.objects.filter(status=True).select_related('user').order_by('roll', 'id')
     
-    qr_codes = []
-    for student in students:
-        qr_code = services.generate_qr_code_for_student(student.id)
-        if qr_code:
-            qr_codes.append({
-                'student': student,
-                'qr_code': qr_code
-            })
+    # Pagination
+    paginator = Paginator(students, settings.QR_CODES_PER_PAGE)
+    page = paginator.get_page(request.GET.get('page'))
     
-    return render(request, 'school/student_qr_codes.html', {'qr_codes': qr_codes})
+    # Images are stored once per payload and served from qr_code_view
+    digests = services.ensure_qr_codes([services.student_qr_payload(student) for student in page])
+    qr_codes = [
+        {'student': student, 'qr_url': reverse('qr-code', args=[digest])}
+        for student, digest in zip(page, digests)
+    ]
+    
+    return render(request, 'school/student_qr_codes.html', {'qr_codes': qr_codes, 'page_obj': page})
+
+
+@login_required(login_url='adminlogin')
+@user_passes_test(is_admin)
+def qr_code_view(request, digest):
+    """Serve a stored QR image; the name is its content hash so it never changes"""
+    name = services.qr_storage_name(digest)
+    if not re.fullmatch(r'[0-9a-f]{64}', digest) or not default_storage.exists(name):
+        raise Http404('QR code not found')
+    if request.headers.get('If-None-Match') == f'"{digest}"':
+        return HttpResponseNotModified()
+    response = FileResponse(default_storage.open(name, 'rb'), content_type='image/png')
+    response['Cache-Control'] = f'private, max-age={settings.QR_CODE_MAX_AGE}, immutable'
+    response['ETag'] = f'"{digest}"'
+    return response
 
 
 # Performance Analytics
@@ -1382,22 +1411,25 @@ def system_settings_view(request):
 def api_dashboard_stats(request):
     """API endpoint for dashboard statistics"""
     if is_admin(request.user):
+        metrics = dashboard.get_dashboard_metrics()
         stats = {
-            'teachers': models.TeacherExtra.objects.filter(status=True).count(),
-            'students': models.StudentExtra.objects.filter(status=True).count(),
-            'pending_teachers': models.TeacherExtra.objects.filter(status=False).count(),
-            'pending_students': models.StudentExtra.objects.filter(status=False).count(),
+            'teachers': metrics['teachercount'],
+            'students': metrics['studentcount'],
+            'pending_teachers': metrics['pendingteachercount'],
+            'pending_students': metrics['pendingstudentcount'],
         }
     elif is_teacher(request.user):
-        teacher = models.TeacherExtra.objects.get(user=request.user)
+        # The cached role already holds the profile ids
+        teacher_id = roles.get_role(request.user)['teacher_id']
+        assignments = models.Assignment.objects.filter(teacher_id=teacher_id) if teacher_id else models.Assignment.objects.none()
         stats = {
-            'assignments': models.Assignment.objects.filter(teacher=teacher).count(),
-            'classes': models.Assignment.objects.filter(teacher=teacher).values('class_name').distinct().count(),
+            'assignments': assignments.count(),
+            'classes': assignments.values('class_name').distinct().count(),
         }
     elif is_student(request.user):
-        student = models.StudentExtra.objects.get(user=request.user)
+        role = roles.get_role(request.user)
         stats = {
-            'assignments': models.Assignment.objects.filter(class_name=student.cl, is_active=True).count(),
+            'assignments': models.Assignment.objects.filter(class_name=role['student_class'], is_active=True).count(),
             'notifications': models.Notification.objects.filter(recipient=request.user, is_read=False).count(),
         }
     else:
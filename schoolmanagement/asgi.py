@@ -9,8 +9,7 @@ https://docs.djangoproject.com/en/3.0/howto/deployment/asgi/
 
 import os
 
-from django.core.asgi import get_asgi_application
-
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'schoolmanagement.settings')
 
-application = get_asgi_application()
+# HTTP and WebSockets (see routing.py)
+from schoolmanagement.routing import application  # noqa: F401
@@ -0,0 +1,60 @@
+"""
+Self-contained profile for running and load testing on one machine.
+
+Everything that needs Redis in settings.py is swapped for an in-process
+backend: locmem cache, in-memory channel layer and eager Celery. The
+database comes from DATABASE_URL (e.g. a local Postgres) and falls back to
+SQLite in perf.sqlite3. The REST API and Channels are enabled.
+
+    DJANGO_SETTINGS_MODULE=schoolmanagement.perf_settings python manage.py migrate
+    DJANGO_SETTINGS_MODULE=schoolmanagement.perf_settings python manage.py loadtest
+"""
+
+from .settings import *
+
+DEBUG = False
+ALLOWED_HOSTS = ['*']
+
+INSTALLED_APPS = INSTALLED_APPS + [
+    app for app in ['rest_framework', 'rest_framework.authtoken', 'django_filters', 'channels']
+    if app not in INSTALLED_APPS
+]
+ROOT_URLCONF = 'schoolmanagement.perf_urls'
+
+DATABASES = {
+    'default': dj_database_url.config(
+        default='sqlite:///' + os.path.join(BASE_DIR, 'perf.sqlite3'),
+        conn_max_age=60,
+    )
+}
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'school-perf',
+    }
+}
+
+CHANNEL_LAYERS = {
+    'default': {
+        'BACKEND': 'channels.layers.InMemoryChannelLayer',
+        'CONFIG': {
+            'capacity': 1000,  # messages queued per channel before group_send starts dropping
+        },
+    },
+}
+
+# Tasks run inline in the web process
+CELERY_BROKER_URL = 'memory://'
+CELERY_RESULT_BACKEND = 'cache+memory://'
+CELERY_TASK_ALWAYS_EAGER = True
+CELERY_TASK_EAGER_PROPAGATES = False
+
+EMAIL_BACKEND = 'django.core.mail.backends.locmem.EmailBackend'
+
+# Log to the console only, at WARNING, so logging doesn't dominate the numbers
+LOGGING['loggers']['school'] = {
+    'handlers': ['console'],
+    'level': 'WARNING',
+    'propagate': False,
+}
@@ -0,0 +1,8 @@
+"""URLs of the performance profile: the site plus the REST API"""
+from django.urls import include, path
+
+from .urls import urlpatterns as site_urlpatterns
+
+urlpatterns = site_urlpatterns + [
+    path('', include('school.api_urls')),
+]
@@ -1,10 +1,14 @@
+from django.core.asgi import get_asgi_application
+
+# Set up Django before the consumers import the models
+django_asgi_application = get_asgi_application()
+
 from channels.auth import AuthMiddlewareStack
 from channels.routing import ProtocolTypeRouter, URLRouter
-from django.urls import path, include
 from school.routing import websocket_urlpatterns
 
 application = ProtocolTypeRouter({
-    'http': None,  # Django's ASGI application will handle HTTP requests
+    'http': django_asgi_application,
     'websocket': AuthMiddlewareStack(
         URLRouter(
             websocket_urlpatterns
@@ -160,7 +160,10 @@ STATIC_DIR,
 LOGIN_REDIRECT_URL='/afterlogin'
 
 #for contact us give your gmail id and password
-EMAIL_BACKEND ='django.core.mail.backends.smtp.EmailBackend'
+EMAIL_BACKEND ='school.mail.PooledEmailBackend' # SMTP backend that keeps connections open between sends
+EMAIL_POOL_SIZE = 4 # idle connections kept per worker
+EMAIL_POOL_MAX_IDLE = 60 # seconds before an idle connection is dropped
+EMAIL_POOL_MAX_MESSAGES = 100 # messages before a connection is recycled
 EMAIL_HOST = 'smtp.gmail.com'
 EMAIL_USE_TLS = True
 EMAIL_PORT = 587
@@ -206,6 +209,28 @@ REST_FRAMEWORK = {
     ],
 }
 
+# Keyset (cursor) pagination used by the large endpoints: attendance, notifications,
+# audit logs. ?with_count=1 adds the total; ?since=<id> syncs notifications and audit logs incrementally
+API_CURSOR_PAGE_SIZE = 50
+API_CURSOR_MAX_PAGE_SIZE = 500
+
+# Full-text search (school.search): most ranked matches a search returns
+SEARCH_RESULT_LIMIT = 500
+
+# Bulk student import: rows validated and inserted per transaction, and password
+# hashing workers (None uses every CPU)
+IMPORT_CHUNK_SIZE = 500
+IMPORT_HASH_WORKERS = None
+
+# Student QR codes: cards per page and browser cache lifetime of the
+# content-addressed images (a year, they never change)
+QR_CODES_PER_PAGE = 50
+QR_CODE_MAX_AGE = 31536000
+
+# StudentPerformance semesters, name -> (first day, last day). Names not listed
+# here follow the YYYY-1 (January-June) / YYYY-2 (July-December) pattern
+SEMESTER_DATE_RANGES = {}
+
 # CORS Settings
 CORS_ALLOWED_ORIGINS = [
     "http://localhost:3000",
@@ -223,6 +248,23 @@ CHANNEL_LAYERS = {
     },
 }
 
+# Notifications
+NOTIFICATION_CHUNK_SIZE = 500  # recipients per bulk_create / WebSocket message / send_mass_mail
+NOTIFICATION_BATCH_WINDOW = 0.05  # seconds a socket collects notifications before sending them as one frame
+NOTIFICATION_BATCH_SIZE = 100  # most notifications per frame
+NOTIFICATION_QUEUE_HIGH_WATER = 500  # queued per socket before the oldest are dropped (reported to the client)
+ATTENDANCE_COALESCE_WINDOW = 0.5  # seconds a dashboard socket waits so only the latest update per class/day is sent
+
+# Chat
+CHAT_FLUSH_SIZE = 100  # buffered messages that trigger a bulk insert
+CHAT_FLUSH_INTERVAL = 1.0  # seconds a message may wait in the buffer
+CHAT_BUFFER_MAX = 10000  # buffered messages kept while the database is unreachable, oldest dropped first
+CHAT_WRITE_ATTEMPTS = 5  # flushes a message may fail before it is dropped
+CHAT_HISTORY_PAGE_SIZE = 50  # messages per history page (sent on join)
+CHAT_RATE_LIMIT = 20  # messages per user and room per window
+CHAT_RATE_WINDOW = 10  # seconds
+CHAT_MESSAGE_MAX_LENGTH = 2000
+
 # Celery Configuration
 CELERY_BROKER_URL = 'redis://localhost:6379'
 CELERY_RESULT_BACKEND = 'redis://localhost:6379'
@@ -246,6 +288,17 @@ X_FRAME_OPTIONS = 'DENY'
 # Rate Limiting
 RATELIMIT_USE_CACHE = 'default'
 
+# Audit Logging (buffered, see school/audit.py)
+AUDIT_LOG_BUFFER_SIZE = 10000       # events kept in memory per worker before the oldest are dropped
+AUDIT_LOG_FLUSH_SIZE = 200          # bulk_create once this many events are queued
+AUDIT_LOG_FLUSH_INTERVAL = 5        # ... or once the oldest queued event is this many seconds old
+AUDIT_LOG_FLUSH_ASYNC = False       # hand batches to Celery instead of writing from the web worker
+AUDIT_LOG_EXCLUDE_PATHS = ['/static/', '/media/', '/favicon.ico']
+AUDIT_LOG_SAMPLE_RATE = 1.0
+AUDIT_LOG_PATH_SAMPLE_RATES = {
+    # '/api/dashboard-stats': 0.1,
+}
+
 # Cache Configuration
 CACHES = {
     'default': {
@@ -254,6 +307,11 @@ CACHES = {
     }
 }
 
+ROLE_CACHE_TIMEOUT = 300  # seconds a user's groups/profile ids stay cached (invalidated by signals)
+DASHBOARD_METRICS_TIMEOUT = 3600  # admin dashboard counters, also invalidated by signals
+STATISTICS_CACHE_TIMEOUT = 300  # API statistics responses, dropped early by signals when their rows change
+DASHBOARD_NOTICE_LIMIT = 20  # latest notices shown on the admin dashboard
+
 # Logging Configuration
 LOGGING = {
     'version': 1,
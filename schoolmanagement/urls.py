@@ -105,9 +105,13 @@ urlpatterns = [
     
     # Bulk Upload
     path('bulk-upload', views.bulk_upload_view, name='bulk-upload'),
+    path('bulk-upload/<str:task_id>/status', views.bulk_upload_status_view, name='bulk-upload-status'),
     
     # Report Generation
     path('generate-report', views.generate_report_view, name='generate-report'),
+    path('report-jobs/<int:job_id>', views.report_job_status_view, name='report-job-status'),
+    path('report-jobs/<int:job_id>/download', views.report_job_download_view, name='report-job-download'),
+    path('export/<str:dataset>', views.export_data_view, name='export-data'),
     
     # Notifications
     path('notifications', views.notifications_view, name='notifications'),
@@ -115,6 +119,7 @@ urlpatterns = [
     
     # QR Codes
     path('student-qr-codes', views.student_qr_codes_view, name='student-qr-codes'),
+    path('qr/<str:digest>.png', views.qr_code_view, name='qr-code'),
     
     # Performance Analytics
     path('performance-analytics', views.performance_analytics_view, name='performance-analytics'),